@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Batch enhancement: N calls to /api/prompts/enhance vs one /api/prompts/enhance/batch.
+
+Points the provider clients at the bundled mock provider
+(mock_llm_server.py, ``--latency-ms`` per completion) and drives the Flask
+app in-process. For each batch size it enhances fresh prompts (cold: every
+prompt is a cache miss and a provider call) and then the same prompts again
+(warm: every prompt is a cache hit), reporting wall time and prompts/s for
+
+  single  one POST /api/prompts/enhance per prompt, back to back
+  batch   one POST /api/prompts/enhance/batch carrying all of them
+
+Usage: python benchmarks/bench_batch_enhance.py [--sizes 1,10,100] [--latency-ms 50] [--concurrency 8]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import MockConfig, MockLLMServer
+
+
+def timed(call):
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1,10,100', help='comma-separated batch sizes')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='mock provider latency per completion')
+    parser.add_argument('--concurrency', type=int, default=8, help='BATCH_PROVIDER_CONCURRENCY')
+    parser.add_argument('--techniques', default='zero_shot_cot,role_prompting,negative_prompts')
+    args = parser.parse_args()
+
+    server = MockLLMServer(port=0, config=MockConfig(latency=f"fixed:{args.latency_ms}")).start()
+
+    # The app reads these at import time
+    os.environ.update(
+        MOCK_LLM_URL=server.url,
+        BATCH_MAX_PROMPTS=str(max(int(size) for size in args.sizes.split(','))),
+        BATCH_PROVIDER_CONCURRENCY=str(args.concurrency),
+        PROVIDER_PREWARM_CONNECTIONS='0',
+        REQUEST_LOG='false'
+    )
+    from src.main import app
+
+    client = app.test_client()
+    techniques = args.techniques.split(',')
+    rows = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        run_id = uuid.uuid4().hex[:8]
+        single_prompts = [f'Explain topic {i} of run {run_id} for a new engineer' for i in range(size)]
+        batch_prompts = [f'Explain topic {i} of batch {run_id} for a new engineer' for i in range(size)]
+
+        def single():
+            for prompt in single_prompts:
+                client.post('/api/prompts/enhance', json={'prompt': prompt, 'techniques': techniques})
+
+        def batch():
+            response = client.post('/api/prompts/enhance/batch', json={'prompts': batch_prompts, 'techniques': techniques})
+            assert response.status_code == 200, response.get_json()
+
+        for phase in ('cold', 'warm'):
+            single_seconds, batch_seconds = timed(single), timed(batch)
+            rows.append((size, phase, single_seconds, batch_seconds))
+    server.shutdown()
+
+    print(f"mock provider {args.latency_ms:.0f}ms per completion, batch provider pool of {args.concurrency}")
+    print(f"{'size':>5} {'cache':>5} | {'single ms':>10} {'prompts/s':>10} | {'batch ms':>10} {'prompts/s':>10} | {'speedup':>7}")
+    for size, phase, single_seconds, batch_seconds in rows:
+        print(f"{size:>5} {phase:>5} | {single_seconds * 1000:>10.1f} {size / single_seconds:>10.1f} | "
+              f"{batch_seconds * 1000:>10.1f} {size / batch_seconds:>10.1f} | {single_seconds / batch_seconds:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Trace-driven hit rate simulator: plain LRU vs LRU with TinyLFU admission.
+
+Replays a sequence of cache keys against the in-process LRU cache at several
+capacities, inserting on every miss exactly like ``cache_result`` does, and
+reports the hit rate with and without the admission filter. The trace is
+either the JSON request log (the ``cache_key`` digest that enhance requests
+log), a file of keys one per line, or a synthetic workload mixing a
+Zipf-distributed set of repeated prompts, whose popular set drifts over
+time, with one-off prompts that are never seen again.
+
+Usage: python benchmarks/bench_cache_admission.py [--trace requests.log] [--sizes 500,2000,10000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache_admission import TinyLFUAdmission
+from src.utils.enhancement_cache import LRUTTLCache
+
+
+def load_trace(path):
+    keys = []
+    with open(path) as trace_file:
+        for line in trace_file:
+            line = line.strip()
+            if line.startswith('{'):
+                key = json.loads(line).get('cache_key')
+                if key:
+                    keys.append(key)
+            elif line:
+                keys.append(line)
+    return keys
+
+
+def synthetic_trace(requests, distinct, skew, one_off_ratio, phases, seed):
+    rng = random.Random(seed)
+    weights = [1.0 / (rank ** skew) for rank in range(1, distinct + 1)]
+    keys = []
+    one_offs = 0
+    per_phase = requests // phases
+    for phase in range(phases):
+        # Each phase shifts which prompts are popular, so stale frequency must age out
+        offset = phase * distinct // 2
+        ranks = rng.choices(range(distinct), weights=weights, k=per_phase)
+        for rank in ranks:
+            if rng.random() < one_off_ratio:
+                keys.append(f"llm:once:{one_offs}")
+                one_offs += 1
+            else:
+                keys.append(f"llm:repeat:{rank + offset}")
+    return keys
+
+
+def replay(keys, size, admission):
+    cache = LRUTTLCache(max_size=size, ttl=float('inf'),
+                        admission=TinyLFUAdmission(size) if admission else None)
+    hits = 0
+    for key in keys:
+        if cache.get(key, now=0.0) is not None:
+            hits += 1
+        else:
+            cache.put(key, key, now=0.0)
+    return hits / len(keys) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trace', help='JSON request log, or a file of cache keys one per line')
+    parser.add_argument('--sizes', default='500,2000,10000')
+    parser.add_argument('--requests', type=int, default=300000)
+    parser.add_argument('--distinct', type=int, default=50000, help='distinct repeated prompts per phase')
+    parser.add_argument('--skew', type=float, default=0.9, help='Zipf exponent of repeated prompts')
+    parser.add_argument('--one-off-ratio', type=float, default=0.6, help='share of never-repeated prompts')
+    parser.add_argument('--phases', type=int, default=3, help='popularity shifts in the synthetic trace')
+    args = parser.parse_args()
+
+    if args.trace:
+        keys = load_trace(args.trace)
+        source = args.trace
+    else:
+        keys = synthetic_trace(args.requests, args.distinct, args.skew,
+                               args.one_off_ratio, args.phases, seed=11)
+        source = f"synthetic ({args.one_off_ratio:.0%} one-off, {args.phases} phases)"
+
+    print(f"Trace: {source}, {len(keys)} requests, {len(set(keys))} distinct keys")
+    print(f"{'capacity':>9} | {'LRU':>8} {'TinyLFU':>8} {'delta':>7} | {'replay s':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        lru = replay(keys, size, admission=False)
+        start = time.perf_counter()
+        tinylfu = replay(keys, size, admission=True)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>9} | {lru:>7.2f}% {tinylfu:>7.2f}% {tinylfu - lru:>+6.2f} | {elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
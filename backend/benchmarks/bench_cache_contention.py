@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Multi-threaded contention benchmark for the enhancement cache.
+
+Worker threads run a read-heavy mix of ``lookup_cached_result`` and
+``cache_result`` calls against a warm cache while a maintenance thread keeps
+purging expired entries, polling ``get_performance_stats`` and running a
+tag invalidation scan, as the cleanup worker, dashboard and admin endpoint
+do in production. The in-process tier is run with a single lock
+(``stripes=1``) and lock-striped, and throughput plus p99/p99.9 lookup
+latency are reported as the thread count grows.
+
+Usage: python benchmarks/bench_cache_contention.py [--threads 1,2,4,8,16] [--seconds 2]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache_backends import InProcessBackend
+from src.utils.performance_optimizer import performance_optimizer
+
+SAMPLE_RESULT = {
+    'enhanced_prompt': 'Step-by-step reasoning with examples. ' * 40,
+    'success': True,
+    'provider_used': 'openai',
+    'method': 'llm',
+    'techniques_used': ['zero_shot_cot'],
+    'cached': False
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0
+
+
+def run(optimizer, threads, seconds, keys, write_ratio):
+    stop = threading.Event()
+    operations = [0] * threads
+    latencies = [[] for _ in range(threads)]
+
+    def worker(index):
+        rng = random.Random(index)
+        local_latencies = latencies[index]
+        done = 0
+        while not stop.is_set():
+            key = keys[rng.randrange(len(keys))]
+            if rng.random() < write_ratio:
+                optimizer.cache_result(key, SAMPLE_RESULT)
+            else:
+                start = time.perf_counter_ns()
+                optimizer.lookup_cached_result(key)
+                local_latencies.append(time.perf_counter_ns() - start)
+            done += 1
+        operations[index] = done
+
+    def maintenance():
+        while not stop.is_set():
+            optimizer.cache.purge_expired()
+            optimizer.get_performance_stats()
+            # Admin invalidation scans every entry for matching tags
+            optimizer.invalidate_cache(techniques=['not_cached'])
+            time.sleep(0.01)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    pool.append(threading.Thread(target=maintenance))
+    for thread in pool:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in pool:
+        thread.join()
+
+    all_latencies = [sample for samples in latencies for sample in samples]
+    return (sum(operations) / seconds, percentile(all_latencies, 99) / 1000,
+            percentile(all_latencies, 99.9) / 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', default='1,2,4,8,16')
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    args = parser.parse_args()
+
+    optimizer = performance_optimizer
+    keys = [f"llm:{i:064x}:bench" for i in range(args.entries)]
+
+    print(f"{'threads':>7} | {'1 lock ops/s':>12} {'p99 us':>8} {'p999 us':>8} | "
+          f"{'striped ops/s':>13} {'p99 us':>8} {'p999 us':>8}")
+    for threads in (int(t) for t in args.threads.split(',')):
+        row = []
+        for stripes in (1, 16):
+            optimizer.cache = InProcessBackend(max_size=args.entries, ttl=3600, stripes=stripes)
+            for key in keys:
+                optimizer.cache_result(key, SAMPLE_RESULT)
+            row.append(run(optimizer, threads, args.seconds, keys, args.write_ratio))
+        (single_ops, single_p99, single_p999), (striped_ops, striped_p99, striped_p999) = row
+        print(f"{threads:>7} | {single_ops:>12,.0f} {single_p99:>8.1f} {single_p999:>8.1f} | "
+              f"{striped_ops:>13,.0f} {striped_p99:>8.1f} {striped_p999:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
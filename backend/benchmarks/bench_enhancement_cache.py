@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the enhancement cache hot path.
+
+Fills the cache to each target size and then times individual
+``get_cached_result`` / ``cache_result`` calls at capacity, where every
+insert also evicts. Latency should stay flat as the cache grows.
+
+Usage: python benchmarks/bench_enhancement_cache.py [--sizes 1000,10000,...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache_backends import InProcessBackend
+from src.utils.performance_optimizer import performance_optimizer
+
+SAMPLE_RESULT = {
+    'enhanced_prompt': 'x' * 2048,
+    'success': True,
+    'provider_used': 'openai',
+    'method': 'llm',
+    'cached': False
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def run(size, operations):
+    optimizer = performance_optimizer
+    optimizer.cache = InProcessBackend(max_size=size, ttl=optimizer.cache_hard_ttl)
+    for i in range(size):
+        optimizer.cache_result(f"llm:{i}", SAMPLE_RESULT)
+
+    get_times = []
+    put_times = []
+    for i in range(operations):
+        key = f"llm:{(i * 7919) % size}"
+        start = time.perf_counter_ns()
+        optimizer.get_cached_result(key)
+        get_times.append(time.perf_counter_ns() - start)
+
+        start = time.perf_counter_ns()
+        optimizer.cache_result(f"new:{size}:{i}", SAMPLE_RESULT)
+        put_times.append(time.perf_counter_ns() - start)
+
+    return get_times, put_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000')
+    parser.add_argument('--operations', type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} | {'get p50':>9} {'get p99':>9} | {'put p50':>9} {'put p99':>9}  (microseconds)")
+    for size in (int(s) for s in args.sizes.split(',')):
+        get_times, put_times = run(size, args.operations)
+        print(
+            f"{size:>10} | "
+            f"{percentile(get_times, 50) / 1000:>9.2f} {percentile(get_times, 99) / 1000:>9.2f} | "
+            f"{percentile(put_times, 50) / 1000:>9.2f} {percentile(put_times, 99) / 1000:>9.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate lookup cost and accuracy at scale.
+
+Indexes synthetic prompts, then looks up four kinds of queries: cosmetic
+variants (casing, punctuation, politeness), one-word edits, word-order
+swaps and unrelated prompts. Reports per-lookup latency, hit rate, and
+wrong matches (a hit on a prompt other than the one the query was derived
+from, or any hit for a swap or an unrelated prompt, whose meaning differs).
+One-word edits only match in long prompts: each edit changes two shingles.
+
+Usage: python benchmarks/bench_near_duplicates.py [--entries 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.prompt_fingerprint import NearDuplicateIndex
+
+NAMESPACE = 'llm:bench'
+
+
+def make_vocabulary(rng, size):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def make_prompt(rng, vocabulary):
+    return ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(10, 25)))
+
+
+def cosmetic_variant(rng, prompt):
+    words = prompt.split()
+    words[0] = words[0].capitalize()
+    return rng.choice(['Please ', 'Could you ', '']) + ' '.join(words) + rng.choice(['?', '!', '.', ' please'])
+
+
+def one_word_edit(rng, prompt, vocabulary):
+    words = prompt.split()
+    words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary))
+    return ' '.join(words)
+
+
+def word_order_swap(rng, prompt):
+    words = prompt.split()
+    i = rng.randrange(len(words) - 1)
+    words[i], words[i + 1] = words[i + 1], words[i]
+    return ' '.join(words)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(index, queries):
+    latencies = []
+    hits = wrong = 0
+    for expected_key, query in queries:
+        start = time.perf_counter_ns()
+        match = index.find(query, NAMESPACE)
+        latencies.append(time.perf_counter_ns() - start)
+        if match is not None:
+            hits += 1
+            if match[0] != expected_key:
+                wrong += 1
+    return latencies, hits, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--threshold', type=float, default=0.9)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng, 5000)
+    prompts = [make_prompt(rng, vocabulary) for _ in range(args.entries)]
+
+    index = NearDuplicateIndex(max_entries=args.entries, threshold=args.threshold)
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        index.add(f"key:{i}", prompt, NAMESPACE)
+    build_seconds = time.perf_counter() - start
+
+    sample = rng.sample(range(args.entries), args.queries)
+    workloads = {
+        'cosmetic variants': [(f"key:{i}", cosmetic_variant(rng, prompts[i])) for i in sample],
+        'one-word edits': [(f"key:{i}", one_word_edit(rng, prompts[i], vocabulary)) for i in sample],
+        'word-order swaps': [(None, word_order_swap(rng, prompts[i])) for i in sample],
+        'unrelated prompts': [(None, make_prompt(rng, vocabulary)) for _ in sample]
+    }
+
+    print(f"Indexed {args.entries} prompts in {build_seconds:.1f}s "
+          f"({build_seconds / args.entries * 1e6:.0f}us per insert)")
+    print(f"{'workload':>18} | {'p50 us':>8} {'p99 us':>8} | {'hit rate':>8} {'wrong':>6}")
+    for name, queries in workloads.items():
+        latencies, hits, wrong = measure(index, queries)
+        print(f"{name:>18} | {percentile(latencies, 50) / 1000:>8.1f} {percentile(latencies, 99) / 1000:>8.1f} | "
+              f"{hits / len(queries) * 100:>7.1f}% {wrong:>6}")
+    print(f"Candidates rejected by Jaccard verification (false positives): {index.stats['false_positives']}")
+
+
+if __name__ == '__main__':
+    main()
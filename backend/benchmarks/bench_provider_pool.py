@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Provider calls: a new OpenAI client per request vs the pooled client registry.
+
+Starts the bundled mock provider (mock_llm_server.py, HTTP/1.1 keep-alive)
+sleeping ``--handshake-ms`` on every new connection, standing in for TCP +
+TLS setup to the real API, and ``--latency-ms`` per request.
+Worker threads then issue chat completions two ways:
+
+  before  build ``OpenAI(...)`` (and its HTTP pool) inside every call
+  after   ``ProviderClients.openai()``, one client and pool per process
+
+and reports p50/p99 latency, throughput and connections the server accepted.
+
+Usage: python benchmarks/bench_provider_pool.py [--threads 8] [--calls 50] [--handshake-ms 30]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from openai import OpenAI
+
+from mock_llm_server import MockConfig, MockLLMServer
+from src.utils.provider_clients import ProviderClients
+
+
+def complete(client):
+    client.chat.completions.create(
+        model='gpt-3.5-turbo',
+        messages=[{'role': 'user', 'content': 'Explain recursion'}],
+        max_tokens=800
+    )
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(label, call, threads, calls, server):
+    server.reset_stats()
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(calls):
+            start = time.perf_counter()
+            call()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(worker) for _ in range(threads)]:
+            future.result()
+    wall = time.perf_counter() - start
+    return (label, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000,
+            len(latencies) / wall, server.stats_snapshot().get('connections', 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--calls', type=int, default=50, help='calls per thread')
+    parser.add_argument('--handshake-ms', type=float, default=30.0, help='delay per new connection')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='delay per request')
+    args = parser.parse_args()
+
+    server = MockLLMServer(port=0, config=MockConfig(
+        latency=f"fixed:{args.latency_ms}", connect_ms=args.handshake_ms, completion_words=80
+    )).start()
+    base_url = f"{server.url}/v1"
+
+    def per_call_client():
+        # The previous enhance_with_openai: a fresh client, pool and connection per request
+        with httpx.Client(timeout=8.0) as http_client:
+            complete(OpenAI(api_key='bench', base_url=base_url, http_client=http_client, timeout=8.0))
+
+    os.environ.update(OPENAI_API_KEY='bench', OPENAI_BASE_URL=base_url)
+    registry = ProviderClients(max_connections=max(args.threads, 1), max_keepalive=max(args.threads, 1))
+
+    def pooled_client():
+        with registry.lease('openai'):
+            complete(registry.openai())
+
+    rows = [
+        run('before (client per call)', per_call_client, args.threads, args.calls, server),
+        run('after (pooled registry)', pooled_client, args.threads, args.calls, server)
+    ]
+    server.shutdown()
+
+    print(f"{args.threads} threads x {args.calls} calls, {args.handshake_ms:.0f}ms connection setup, "
+          f"{args.latency_ms:.0f}ms provider latency")
+    print(f"{'client':>26} | {'p50 ms':>8} {'p99 ms':>8} | {'req/s':>8} | {'connections':>11}")
+    for label, p50, p99, throughput, connections in rows:
+        print(f"{label:>26} | {p50:>8.1f} {p99:>8.1f} | {throughput:>8.1f} | {connections:>11}")
+    print(f"pool after run: {registry.pool_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Per-technique cost report over a prompt corpus.
+
+Runs every technique on its own and every preset over each prompt through
+the profiled PromptTechniques builders, then reports per technique the CPU
+time spent, the characters and estimated tokens it adds to the prompt sent
+to the provider, and per preset the summed token overhead. Use it to find
+the blocks worth pruning or shortening.
+
+The corpus is a text file with one prompt per line, or JSONL with a
+``prompt`` (or ``original_text``) field; without one a small built-in
+corpus spanning the role-detection domains is used.
+
+Usage: python benchmarks/bench_technique_costs.py [--corpus prompts.jsonl] [--method llm] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.prompt_techniques import PromptTechniques
+from src.utils.technique_profiler import TechniqueProfiler, profile_apply
+
+BUILTIN_CORPUS = [
+    'Analyze this sales data and find the statistics that explain the drop in Q3 revenue',
+    'Review this Python code for performance problems and suggest better programming patterns',
+    'Draft a market entry strategy for a business selling refurbished laptops in Europe',
+    'Come up with a creative design concept for a sustainable coffee shop',
+    'Summarize recent research on sleep and memory consolidation for a literature study',
+    'Explain how DNS resolution works to a new support engineer',
+    'Please could you write a short and friendly reminder email about the team offsite next week',
+    'Make sure that the migration plan covers rollback as well as data validation in order to avoid downtime'
+]
+
+
+def load_corpus(path):
+    prompts = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                record = json.loads(line)
+                line = record.get('prompt') or record.get('original_text') or ''
+            if line:
+                prompts.append(line)
+    return prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--corpus', help='text (one prompt per line) or JSONL file')
+    parser.add_argument('--method', default='llm', choices=['llm', 'compression'])
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the corpus, for stable CPU times')
+    args = parser.parse_args()
+
+    prompts = load_corpus(args.corpus) if args.corpus else BUILTIN_CORPUS
+    technique_sets = [[technique] for technique in PromptTechniques.TECHNIQUES]
+    technique_sets += list(PromptTechniques.PRESETS.values())
+
+    # The profiled path must produce exactly the production prompt
+    for prompt in prompts:
+        for techniques in technique_sets:
+            expected = PromptTechniques.apply_techniques(prompt, techniques, args.method)
+            assert profile_apply(prompt, techniques, args.method)[0] == expected
+
+    profiler = TechniqueProfiler(sample_rate=1.0)
+    profiler.profile_corpus(prompts * args.repeat, technique_sets, args.method)
+    report = profiler.report()
+
+    print(f"{len(prompts)} prompts x {len(technique_sets)} technique sets x {args.repeat} passes "
+          f"(method={args.method}, tokens via {report['tokenizer']})")
+    print(f"{'technique':>24} | {'cpu us':>8} {'chars':>8} {'tokens':>8} | template")
+    for row in report['techniques']:
+        print(f"{row['technique']:>24} | {row['cpu_us_mean']:>8.2f} {row['chars_added_mean']:>8.1f} "
+              f"{row['tokens_added_mean']:>8.1f} | {'yes' if row['has_template'] else 'no'}")
+
+    print()
+    print(f"{'preset':>24} | {'cpu us':>8} {'tokens':>8} | techniques")
+    for row in report['presets']:
+        print(f"{row['preset']:>24} | {row['cpu_us_mean']:>8.2f} {row['tokens_added_mean']:>8.1f} | "
+              f"{', '.join(row['techniques'])}")
+
+
+if __name__ == '__main__':
+    main()
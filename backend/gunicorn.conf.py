@@ -0,0 +1,31 @@
+"""
+Gunicorn Configuration
+Worker lifecycle hooks for Prometheus multiprocess metrics and provider pre-warming
+"""
+
+import os
+import shutil
+
+# Loaded automatically by gunicorn from the working directory. Bind address,
+# worker count and timeouts stay on the command line (see docker-compose).
+
+
+def on_starting(server):
+    """Start every master run with an empty metrics directory"""
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def post_fork(server, worker):
+    """Warm the new worker's provider connection pool in the background"""
+    from src.utils.provider_clients import provider_clients
+    provider_clients.prewarm_from_env()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges so they stop counting towards the total"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
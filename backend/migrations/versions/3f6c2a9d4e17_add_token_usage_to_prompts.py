@@ -0,0 +1,36 @@
+"""Add provider, method, techniques and token usage to prompts
+
+Revision ID: 3f6c2a9d4e17
+Revises: 89535f5ad61b
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c2a9d4e17'
+down_revision = '89535f5ad61b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('prompts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('provider', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('method', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('techniques', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('input_tokens', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('output_tokens', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('enhanced_tokens', sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('prompts', schema=None) as batch_op:
+        batch_op.drop_column('enhanced_tokens')
+        batch_op.drop_column('output_tokens')
+        batch_op.drop_column('input_tokens')
+        batch_op.drop_column('techniques')
+        batch_op.drop_column('method')
+        batch_op.drop_column('provider')
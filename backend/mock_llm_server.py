@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Minimal OpenAI / Gemini stand-in server for offline load, latency and CI testing.
+
+Implements the subset of both APIs the backend uses: OpenAI chat completions
+(plain and streamed) and model listing, and Gemini generateContent and
+streamGenerateContent. Every response is a canned refinement of the prompt
+it was sent. Latency is drawn from a configurable distribution, and a share
+of requests can fail with provider-style errors or hang past the client
+timeout. Settings apply to both providers unless overridden per provider,
+and can be changed while running via POST /mock/config. Not for production use.
+
+Latency specs (milliseconds): fixed:50, uniform:20:200, normal:120:40,
+lognormal:100:0.6 (median, sigma), exponential:80 (mean).
+
+Usage: python mock_llm_server.py [--port 8089] [--latency lognormal:300:0.5] [--token-ms 15]
+                                 [--error-rate 0.02] [--timeout-rate 0.01] [--openai-latency fixed:2000]
+       MOCK_LLM_URL=http://localhost:8089 python src/main.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+GEMINI_PATH = re.compile(r'^/v1(?:beta)?/models/(?P<model>[^/:]+):(?P<action>generateContent|streamGenerateContent)$')
+
+ERROR_STATUS = {429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE'}
+
+DEFAULT_SETTINGS = {
+    'latency': 'fixed:50',        # time to the first byte of a response
+    'token_ms': 10.0,             # delay between streamed chunks
+    'error_rate': 0.0,            # share of requests answered with an error status
+    'error_statuses': [429, 500, 503],
+    'timeout_rate': 0.0,          # share of requests that stall for hang_seconds first
+    'hang_seconds': 30.0,
+    'completion_words': 120,      # length of each answer, before max_tokens
+    'connect_ms': 0.0             # delay on every new connection (TCP + TLS stand-in)
+}
+
+
+class LatencyDistribution:
+    """Millisecond samples from a ``kind:param[:param]`` spec"""
+
+    KINDS = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+
+    def __init__(self, spec):
+        kind, *params = str(spec).split(':')
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"bad latency spec {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params]
+
+    def sample(self):
+        p = self.params
+        if self.kind == 'fixed':
+            value = p[0]
+        elif self.kind == 'uniform':
+            value = random.uniform(p[0], p[1])
+        elif self.kind == 'normal':
+            value = random.gauss(p[0], p[1])
+        elif self.kind == 'lognormal':
+            value = p[0] * random.lognormvariate(0, p[1])
+        else:
+            value = random.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+class MockConfig:
+    """Shared settings plus per-provider overrides, safe to update while serving"""
+
+    def __init__(self, **settings):
+        self.lock = threading.Lock()
+        self.settings = {'default': dict(DEFAULT_SETTINGS), 'openai': {}, 'gemini': {}}
+        self.update({'default': settings})
+
+    def update(self, changes):
+        """Apply ``{'default'|'openai'|'gemini': {setting: value}}``; unknown names raise ValueError"""
+        with self.lock:
+            for scope, values in changes.items():
+                if scope not in self.settings:
+                    raise ValueError(f"unknown scope {scope!r}")
+                for name, value in values.items():
+                    if name not in DEFAULT_SETTINGS:
+                        raise ValueError(f"unknown setting {name!r}")
+                    if name == 'latency':
+                        LatencyDistribution(value)
+                    self.settings[scope][name] = value
+
+    def get(self, name):
+        with self.lock:
+            return self.settings['default'][name]
+
+    def for_provider(self, provider):
+        with self.lock:
+            settings = {**self.settings['default'], **self.settings[provider]}
+        settings['latency'] = LatencyDistribution(settings['latency'])
+        return settings
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.settings))
+
+
+def refine_text(prompt, words):
+    """A deterministic answer of about ``words`` words built from the prompt"""
+    source = prompt.split() or ['prompt']
+    body = [source[i % len(source)] for i in range(max(0, words - 2))]
+    return ' '.join(['Refined', 'prompt:'] + body)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+        connect_ms = self.server.config.get('connect_ms')
+        if connect_ms:
+            time.sleep(connect_ms / 1000)
+
+    def log_message(self, *args):
+        pass
+
+    # Plumbing
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        data = data.encode() if isinstance(data, str) else data
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _fault(self, provider, settings):
+        """Apply latency and injected faults; returns True when an error response was sent"""
+        if random.random() < settings['timeout_rate']:
+            self.server.count(f'{provider}_timeouts')
+            time.sleep(settings['hang_seconds'])
+            self._send_error(provider, 504, 'Mock upstream timed out')
+            return True
+        time.sleep(settings['latency'].sample() / 1000)
+        if random.random() < settings['error_rate']:
+            status = random.choice(settings['error_statuses'])
+            self.server.count(f'{provider}_errors')
+            self._send_error(provider, status, f'Mock injected {status}')
+            return True
+        return False
+
+    def _send_error(self, provider, status, message):
+        if provider == 'openai':
+            payload = {'error': {'message': message, 'type': 'server_error' if status >= 500 else 'rate_limit_error',
+                                 'code': None}}
+        else:
+            payload = {'error': {'code': status, 'message': message, 'status': ERROR_STATUS.get(status, 'UNKNOWN')}}
+        self._send_json(status, payload)
+
+    # Routes
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/v1/models':
+            self.server.count('openai_models')
+            self._send_json(200, {'object': 'list', 'data': [
+                {'id': 'gpt-3.5-turbo', 'object': 'model', 'created': 0, 'owned_by': 'mock'}
+            ]})
+        elif path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/mock/stats':
+            self._send_json(200, self.server.stats_snapshot())
+        elif path == '/mock/config':
+            self._send_json(200, self.server.config.snapshot())
+        else:
+            self._send_json(404, {'error': {'message': f'Unknown path {path}'}})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'Body is not JSON'}})
+            return
+
+        if url.path == '/v1/chat/completions':
+            self.chat_completions(payload)
+            return
+        match = GEMINI_PATH.match(url.path)
+        if match:
+            self.generate_content(payload, match.group('model'), match.group('action') == 'streamGenerateContent',
+                                  'alt=sse' in url.query)
+            return
+        if url.path == '/mock/config':
+            try:
+                self.server.config.update(payload)
+            except ValueError as e:
+                self._send_json(400, {'error': {'message': str(e)}})
+                return
+            self._send_json(200, self.server.config.snapshot())
+            return
+        self._send_json(404, {'error': {'message': f'Unknown path {url.path}'}})
+
+    def chat_completions(self, payload):
+        settings = self.server.config.for_provider('openai')
+        stream = bool(payload.get('stream'))
+        self.server.count('openai_streams' if stream else 'openai_completions')
+        if self._fault('openai', settings):
+            return
+
+        prompt = ' '.join(str(m.get('content', '')) for m in payload.get('messages', []) if m.get('role') == 'user')
+        words = min(settings['completion_words'], payload.get('max_tokens') or settings['completion_words'])
+        text = refine_text(prompt, words)
+        model = payload.get('model', 'gpt-3.5-turbo')
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not stream:
+            self._send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': text}}],
+                'usage': {'prompt_tokens': estimate_tokens(prompt), 'completion_tokens': estimate_tokens(text),
+                          'total_tokens': estimate_tokens(prompt) + estimate_tokens(text)}
+            })
+            return
+
+        def chunk(delta, finish_reason=None):
+            return 'data: ' + json.dumps({
+                'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }) + '\n\n'
+
+        self._start_chunked('text/event-stream')
+        self._write_chunk(chunk({'role': 'assistant', 'content': ''}))
+        for i, word in enumerate(text.split(' ')):
+            time.sleep(settings['token_ms'] / 1000)
+            self._write_chunk(chunk({'content': word if i == 0 else ' ' + word}))
+        self._write_chunk(chunk({}, 'stop'))
+        self._write_chunk('data: [DONE]\n\n')
+        self._end_chunked()
+
+    def generate_content(self, payload, model, stream, sse):
+        settings = self.server.config.for_provider('gemini')
+        self.server.count('gemini_streams' if stream else 'gemini_generations')
+        if self._fault('gemini', settings):
+            return
+
+        prompt = ' '.join(
+            part.get('text', '') for content in payload.get('contents', []) for part in content.get('parts', [])
+        )
+        max_tokens = payload.get('generationConfig', {}).get('maxOutputTokens') or settings['completion_words']
+        text = refine_text(prompt, min(settings['completion_words'], max_tokens))
+
+        def candidate(part_text, finish_reason=None):
+            body = {'candidates': [{'content': {'parts': [{'text': part_text}], 'role': 'model'}, 'index': 0,
+                                    'safetyRatings': []}]}
+            if finish_reason:
+                body['candidates'][0]['finishReason'] = finish_reason
+                body['usageMetadata'] = {'promptTokenCount': estimate_tokens(prompt),
+                                         'candidatesTokenCount': estimate_tokens(text),
+                                         'totalTokenCount': estimate_tokens(prompt) + estimate_tokens(text)}
+            return body
+
+        if not stream:
+            self._send_json(200, candidate(text, 'STOP'))
+            return
+
+        # Gemini streams a few words per chunk, as SSE with alt=sse and as a JSON array otherwise
+        words = text.split(' ')
+        pieces = [' '.join(words[i:i + 8]) + ' ' for i in range(0, len(words), 8)]
+        self._start_chunked('text/event-stream' if sse else 'application/json')
+        for i, piece in enumerate(pieces):
+            time.sleep(settings['token_ms'] / 1000)
+            body = json.dumps(candidate(piece, 'STOP' if i == len(pieces) - 1 else None))
+            if sse:
+                self._write_chunk(f"data: {body}\r\n\r\n")
+            else:
+                self._write_chunk(('[' if i == 0 else ',\r\n') + body)
+        if not sse:
+            self._write_chunk(']')
+        self._end_chunked()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """The mock provider; ``start()`` serves from a daemon thread (for benchmarks and tests)"""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=8089, config=None):
+        super().__init__((host, port), MockLLMHandler)
+        self.config = config or MockConfig()
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def stats_snapshot(self):
+        with self.stats_lock:
+            return dict(self.stats)
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {}
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True, name='mock-llm').start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock OpenAI / Gemini provider')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default=DEFAULT_SETTINGS['latency'], help='time-to-first-byte distribution')
+    parser.add_argument('--token-ms', type=float, default=DEFAULT_SETTINGS['token_ms'])
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-statuses', default='429,500,503')
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--hang-seconds', type=float, default=DEFAULT_SETTINGS['hang_seconds'])
+    parser.add_argument('--completion-words', type=int, default=DEFAULT_SETTINGS['completion_words'])
+    parser.add_argument('--connect-ms', type=float, default=0.0)
+    parser.add_argument('--openai-latency', help='override --latency for OpenAI')
+    parser.add_argument('--gemini-latency', help='override --latency for Gemini')
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency, token_ms=args.token_ms, error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(',')], timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds, completion_words=args.completion_words, connect_ms=args.connect_ms
+    )
+    config.update({
+        provider: {'latency': spec}
+        for provider, spec in (('openai', args.openai_latency), ('gemini', args.gemini_latency)) if spec
+    })
+    server = MockLLMServer(args.host, args.port, config)
+    print(f"Mock LLM provider on {server.url} (OpenAI base URL {server.url}/v1)")
+    print(f"Settings: {json.dumps(config.snapshot())}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Minimal Redis-protocol stand-in server for local testing of the shared cache tier.
+
+Implements the subset of RESP2 commands the backend uses (GET/SET/MGET/DEL,
+key expiry, sets, SCAN) on an in-memory dict. Not for production use.
+
+Usage: python mock_redis_server.py [--port 6390]
+       CACHE_BACKEND=tiered REDIS_URL=redis://localhost:6390/0 python src/main.py
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RespError(Exception):
+    pass
+
+
+class MockRedisStore:
+    """Thread-safe keyspace with lazy expiry"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and time.time() >= deadline:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, command, args):
+        handler = getattr(self, f"cmd_{command.lower()}", None)
+        if handler is None:
+            raise RespError(f"ERR unknown command '{command}'")
+        with self.lock:
+            return handler(*args)
+
+    def cmd_ping(self, *args):
+        return args[0] if args else 'PONG'
+
+    def cmd_client(self, *args):
+        return 'OK'
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self.data.get(key) if self._alive(key) else None
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [o.decode().upper() if isinstance(o, bytes) else o for o in options]
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if 'EX' in options:
+            self.expires[key] = time.time() + int(options[options.index('EX') + 1])
+        elif 'PX' in options:
+            self.expires[key] = time.time() + int(options[options.index('PX') + 1]) / 1000
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    cmd_unlink = cmd_del
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_expire(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() + int(seconds)
+        return 1
+
+    def cmd_ttl(self, key):
+        if not self._alive(key):
+            return -2
+        deadline = self.expires.get(key)
+        return -1 if deadline is None else int(deadline - time.time())
+
+    def cmd_sadd(self, key, *members):
+        if not self._alive(key):
+            self.data[key] = set()
+        members_set = self.data[key]
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+
+    def cmd_srem(self, key, *members):
+        if not self._alive(key):
+            return 0
+        members_set = self.data[key]
+        before = len(members_set)
+        members_set.difference_update(members)
+        return before - len(members_set)
+
+    def cmd_smembers(self, key):
+        return list(self.data[key]) if self._alive(key) else []
+
+    def cmd_scan(self, cursor, *options):
+        options = [o.decode().upper() if isinstance(o, bytes) else o for o in options]
+        pattern = '*'
+        if 'MATCH' in options:
+            pattern = options[options.index('MATCH') + 1]
+            pattern = pattern.decode() if isinstance(pattern, bytes) else pattern
+        keys = [k for k in list(self.data) if self._alive(k) and fnmatch.fnmatchcase(k.decode(), pattern)]
+        return [b'0', keys]
+
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._alive(key))
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return 'OK'
+
+    cmd_flushall = cmd_flushdb
+
+
+def encode(value):
+    """Serialize a Python value as a RESP2 reply"""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, str):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bool) or isinstance(value, int):
+        return f":{int(value)}\r\n".encode()
+    if isinstance(value, bytes):
+        return b'$' + str(len(value)).encode() + b'\r\n' + value + b'\r\n'
+    if isinstance(value, (list, set, tuple)):
+        return b'*' + str(len(value)).encode() + b'\r\n' + b''.join(encode(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value)!r}")
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        if not header.startswith(b'*'):
+            return header.strip().split()  # inline command, e.g. from telnet
+
+        parts = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            try:
+                reply = self.server.store.execute(command[0].decode(), command[1:])
+            except RespError as e:
+                reply = e
+            except Exception as e:
+                reply = RespError(f"ERR {e}")
+            self.wfile.write(encode(reply))
+
+
+class MockRedisServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=6390):
+        super().__init__((host, port), RespHandler)
+        self.store = MockRedisStore()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start_background(self):
+        """Serve from a daemon thread and return self (handy in benchmarks)"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Redis-protocol stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+
+    server = MockRedisServer(args.host, args.port)
+    print(f"🧪 Mock Redis listening on {server.url}")
+    server.serve_forever()
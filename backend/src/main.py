@@ -3,14 +3,16 @@ import sys
 from datetime import datetime, timedelta
 import jwt
 import bcrypt
-import google.generativeai as genai
-from openai import OpenAI
-from flask import Flask, send_from_directory, request, jsonify
+from flask import Flask, Response, g, send_from_directory, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import hashlib
+import json
+import hmac
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -31,6 +33,16 @@ from src.routes.auth import auth_bp
 from src.routes.prompt_draft import prompt_draft_bp
 from src.utils.prompt_techniques import PromptTechniques
 from src.utils.performance_optimizer import performance_optimizer, FastPromptProcessor
+from src.utils import metrics
+from src.utils.circuit_breaker import ProviderBreakers
+from src.utils.provider_clients import API_KEY_ENV, provider_clients
+from src.utils.provider_hedging import ProviderHedger
+from src.utils.request_log import begin_request_log, end_request_log, log_event, request_log
+from src.utils.request_spans import begin_request, end_request, server_timing_header, span
+from src.utils.slow_request_profiler import SlowRequestProfiler
+from src.utils.system_sampler import RESOLUTIONS
+from src.utils.technique_profiler import technique_profiler
+from src.utils.token_accounting import TOKENIZER, count_tokens, output_token_budget, technique_tokens, token_ledger
 
 # JWT Configuration
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-prompto-2024-super-secure')
@@ -60,24 +72,6 @@ def create_app(config_name=None):
     # Initialize database and migrations
     init_app(app)
 
-    # Initialize AI services
-    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-    AI_PROVIDER = os.getenv('AI_PROVIDER', 'auto')
-    
-    if GEMINI_API_KEY and GEMINI_API_KEY != 'your-gemini-api-key-here':
-        try:
-            genai.configure(api_key=GEMINI_API_KEY)
-        except Exception as e:
-            print(f"Warning: Gemini API configuration failed: {e}")
-    
-    openai_client = None
-    if OPENAI_API_KEY and OPENAI_API_KEY != 'your-openai-api-key-here':
-        try:
-            openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        except Exception as e:
-            print(f"Warning: OpenAI client initialization failed: {e}")
-
     # Create database tables
     with app.app_context():
         db.create_all()
@@ -87,6 +81,106 @@ def create_app(config_name=None):
 # Create the app instance
 app = create_app()
 
+# Opt-in hedging of auto-mode provider calls (OpenAI primary, Gemini backup)
+provider_hedger = ProviderHedger(
+    enabled=os.getenv('PROVIDER_HEDGING', 'false').lower() in ('1', 'true', 'yes'),
+    percentile=float(os.getenv('PROVIDER_HEDGE_PERCENTILE', '90')),
+    min_delay_ms=float(os.getenv('PROVIDER_HEDGE_MIN_DELAY_MS', '50')),
+    max_delay_ms=float(os.getenv('PROVIDER_HEDGE_MAX_DELAY_MS', '3000'))
+)
+
+# Per-provider circuit breakers; timeouts follow the latencies provider_call records for hedging
+provider_breakers = ProviderBreakers(
+    latency=provider_hedger.latency,
+    failure_threshold=int(os.getenv('PROVIDER_BREAKER_FAILURES', '5')),
+    open_seconds=float(os.getenv('PROVIDER_BREAKER_OPEN_SECONDS', '30')),
+    percentile=float(os.getenv('PROVIDER_TIMEOUT_PERCENTILE', '99')),
+    multiplier=float(os.getenv('PROVIDER_TIMEOUT_MULTIPLIER', '1.5')),
+    min_timeout=float(os.getenv('PROVIDER_TIMEOUT_MIN_SECONDS', '1.0')),
+    max_timeout=float(os.getenv('PROVIDER_TIMEOUT_MAX_SECONDS', '6.0'))
+)
+
+# Output token caps; each call reserves a budget sized from its input, up to these
+OPENAI_MAX_TOKENS = int(os.getenv('OPENAI_MAX_TOKENS', '800'))
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv('GEMINI_MAX_OUTPUT_TOKENS', '600'))
+OUTPUT_TOKEN_RATIO = float(os.getenv('OUTPUT_TOKEN_RATIO', '1.5'))
+
+OPENAI_SYSTEM_PROMPT = "Refine this enhanced prompt for maximum effectiveness while preserving all structural elements. Be concise and precise."
+GEMINI_INSTRUCTION = "Optimize this enhanced prompt for maximum effectiveness:"
+
+# Batch enhancement: provider calls from every batch share this bounded pool
+BATCH_MAX_PROMPTS = int(os.getenv('BATCH_MAX_PROMPTS', '100'))
+batch_provider_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_PROVIDER_CONCURRENCY', '8')),
+    thread_name_prefix='batch-provider'
+)
+
+# Opt-in stack sampling of the heavy routes; requests over the slow threshold keep their profile
+PROFILED_ENDPOINTS = {'enhance_prompt', 'get_prompts', 'get_analytics'}
+slow_request_profiler = None
+if os.getenv('SLOW_REQUEST_PROFILING', 'false').lower() in ('1', 'true', 'yes'):
+    slow_request_profiler = SlowRequestProfiler(
+        threshold_ms=float(os.getenv('SLOW_PROFILE_THRESHOLD_MS', performance_optimizer.slow_response_threshold)),
+        critical_ms=performance_optimizer.critical_response_threshold,
+        interval=float(os.getenv('SLOW_PROFILE_INTERVAL_MS', '5')) / 1000,
+        sample_rate=float(os.getenv('SLOW_PROFILE_SAMPLE_RATE', '1.0'))
+    )
+
+# Request latency tracking: every request lands in the rolling histograms,
+# labelled with whatever cache/method/provider details its handler set on g
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_id = begin_request_log(request.headers.get('X-Request-ID'))
+    begin_request()
+    if slow_request_profiler and request.endpoint in PROFILED_ENDPOINTS:
+        g.profiling = slow_request_profiler.arm()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        labels = g.get('latency_labels', {})
+        performance_optimizer.record_response_time(elapsed * 1000, endpoint=endpoint, **labels)
+        metrics.REQUEST_LATENCY.labels(endpoint, response.status_code).observe(elapsed)
+        if 'cache' in labels:
+            metrics.ENHANCE_LATENCY.labels(labels['cache']).observe(elapsed)
+
+    # Per-stage timings from instrumented handlers, plus the total
+    spans = end_request()
+    if spans and started is not None:
+        spans.append(('total', time.perf_counter() - started))
+        response.headers['Server-Timing'] = server_timing_header(spans)
+    
+    # Structured access record; serialization and the write happen on the log writer thread
+    if started is not None:
+        response.headers['X-Request-ID'] = g.request_id
+        record = {
+            'http_method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2),
+            # Asking a streamed response for its length would buffer the whole stream
+            'response_bytes': None if response.is_streamed else response.calculate_content_length(),
+            **g.get('latency_labels', {}),
+            **g.get('log_fields', {})
+        }
+        if spans:
+            record['stages_ms'] = {name: round(seconds * 1000, 3) for name, seconds in spans}
+        log_event('request', **record)
+    return response
+
+@app.teardown_request
+def finish_request_profile(exc):
+    # Runs even when the handler raised, so a thread is never left armed
+    if g.get('profiling'):
+        elapsed_ms = (time.perf_counter() - g.request_started) * 1000
+        slow_request_profiler.disarm(request.endpoint, elapsed_ms)
+    end_request_log()
+
 # Helper function to create access token
 def create_access_token(data, expires_delta=None):
     to_encode = data.copy()
@@ -224,106 +318,231 @@ def get_current_user_info():
     except Exception as e:
         return jsonify({'error': f'Authentication failed: {str(e)}'}), 401
 
+@contextmanager
+def provider_call(provider, stream=False):
+    """Instrumentation shared by every provider API call; yields the call's timeout.
+    
+    Raises ``CircuitOpenError`` before any work when the provider's circuit is open.
+    Streamed calls stay out of the latency histograms behind adaptive timeouts and
+    hedge delays: a whole stream takes far longer than the same completion unstreamed.
+    """
+    timed = nullcontext() if stream else provider_hedger.timed(provider)
+    with provider_breakers.guard(provider), span('provider'), metrics.track_provider_call(provider), \
+            provider_clients.lease(provider), timed:
+        yield provider_breakers.timeout(provider)
+
+def max_output_tokens(provider, enhanced_prompt):
+    """Output tokens to reserve for refining ``enhanced_prompt`` (a rewrite of about the same size)"""
+    cap = OPENAI_MAX_TOKENS if provider == 'openai' else GEMINI_MAX_OUTPUT_TOKENS
+    return output_token_budget(count_tokens(enhanced_prompt), cap, ratio=OUTPUT_TOKEN_RATIO)
+
+def provider_usage(provider, enhanced_prompt, output_text, input_tokens=None, output_tokens=None):
+    """Tokens one successful provider call consumed: the response's own counts when it
+    reports them, local estimates otherwise"""
+    if input_tokens is not None and output_tokens is not None:
+        return {'input_tokens': input_tokens, 'output_tokens': output_tokens, 'source': 'provider'}
+    instruction = OPENAI_SYSTEM_PROMPT if provider == 'openai' else GEMINI_INSTRUCTION
+    return {
+        'input_tokens': count_tokens(instruction) + 1 + count_tokens(enhanced_prompt),
+        'output_tokens': count_tokens(output_text),
+        'source': 'estimate'
+    }
+
+def enhancement_token_usage(original_prompt, enhanced_prompt, usage=None):
+    """Token counts for one enhancement; provider tokens stay 0 unless a provider call succeeded"""
+    return {
+        'original_tokens': count_tokens(original_prompt),
+        'enhanced_tokens': count_tokens(enhanced_prompt),
+        'input_tokens': usage['input_tokens'] if usage else 0,
+        'output_tokens': usage['output_tokens'] if usage else 0,
+        'usage_source': usage['source'] if usage else None
+    }
+
+def refine_with_openai(enhanced_prompt):
+    """One OpenAI refinement call for a technique-enhanced prompt; raises on failure.
+    
+    Returns ``(refined prompt, provider usage)``.
+    """
+    openai_client = provider_clients.openai()
+    if openai_client is None:
+        raise RuntimeError('OpenAI client is not configured')
+    
+    with provider_call('openai') as timeout:
+        response = openai_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+                {"role": "user", "content": enhanced_prompt}
+            ],
+            max_tokens=max_output_tokens('openai', enhanced_prompt),  # Sized from the input, not the cap
+            temperature=0.5,  # Lower for more consistent results
+            timeout=timeout  # Adapts to recent OpenAI latency
+        )
+    
+    final_enhanced = response.choices[0].message.content.strip()
+    usage = getattr(response, 'usage', None)
+    usage = provider_usage('openai', enhanced_prompt, final_enhanced,
+                           getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None))
+    return (final_enhanced if final_enhanced else enhanced_prompt), usage
+
+def refine_with_gemini(enhanced_prompt):
+    """One Gemini refinement call for a technique-enhanced prompt; raises on failure.
+    
+    Returns ``(refined prompt, provider usage)``.
+    """
+    model = provider_clients.gemini()
+    if model is None:
+        raise RuntimeError('Gemini client is not configured')
+    
+    enhancement_instruction = f"{GEMINI_INSTRUCTION}\n\n{enhanced_prompt}"
+    
+    with provider_call('gemini') as timeout:
+        response = model.generate_content(
+            enhancement_instruction,
+            generation_config={'max_output_tokens': max_output_tokens('gemini', enhanced_prompt)},
+            request_options={'timeout': timeout}
+        )
+        final_enhanced = clean_gemini_response(response.text)
+    
+    metadata = getattr(response, 'usage_metadata', None)
+    usage = provider_usage('gemini', enhanced_prompt, final_enhanced,
+                           getattr(metadata, 'prompt_token_count', None), getattr(metadata, 'candidates_token_count', None))
+    return (final_enhanced if final_enhanced else enhanced_prompt), usage
+
+def clean_gemini_response(text):
+    """Drop the code fences and 'Enhanced:'-style headers Gemini likes to prepend"""
+    final_enhanced = text.strip()
+    if final_enhanced.startswith(('```', 'Enhanced:', 'Optimized:', 'Final:')):
+        lines = final_enhanced.split('\n')
+        for i, line in enumerate(lines):
+            if line and not line.startswith(('```', 'Enhanced:', 'Optimized:', 'Final:')):
+                final_enhanced = '\n'.join(lines[i:])
+                break
+    return final_enhanced
+
+def stream_openai(enhanced_prompt):
+    """Yield OpenAI refinement text as it is generated; raises on failure"""
+    openai_client = provider_clients.openai()
+    if openai_client is None:
+        raise RuntimeError('OpenAI client is not configured')
+    
+    with provider_call('openai', stream=True) as timeout:
+        # With stream=True the timeout bounds each read, not the whole completion
+        stream = openai_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+                {"role": "user", "content": enhanced_prompt}
+            ],
+            max_tokens=max_output_tokens('openai', enhanced_prompt),
+            temperature=0.5,
+            timeout=timeout,
+            stream=True
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+def stream_gemini(enhanced_prompt):
+    """Yield Gemini refinement text as it is generated; raises on failure"""
+    model = provider_clients.gemini()
+    if model is None:
+        raise RuntimeError('Gemini client is not configured')
+    
+    enhancement_instruction = f"{GEMINI_INSTRUCTION}\n\n{enhanced_prompt}"
+    
+    with provider_call('gemini', stream=True) as timeout:
+        response = model.generate_content(
+            enhancement_instruction,
+            stream=True,
+            generation_config={'max_output_tokens': max_output_tokens('gemini', enhanced_prompt)},
+            request_options={'timeout': timeout}
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+STREAM_PROVIDERS = {'openai': stream_openai, 'gemini': stream_gemini}
+
 def enhance_with_openai(original_prompt, method='llm', enabled_techniques=None):
-    """Advanced prompt engineering with OpenAI GPT - PERFORMANCE OPTIMIZED"""
+    """Advanced prompt engineering with OpenAI GPT - PERFORMANCE OPTIMIZED
+    
+    Returns ``(enhanced prompt, provider usage)``: usage is None when no
+    provider call was made, and ``(None, None)`` signals that the call
+    failed so the caller falls through to the next provider or the fallback.
+    """
     try:
         if enabled_techniques is None:
             enabled_techniques = PromptTechniques.get_default_techniques()
         
         # Apply prompt engineering techniques first
-        enhanced_prompt = PromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+        with span('techniques'):
+            enhanced_prompt = technique_profiler.apply_techniques(original_prompt, enabled_techniques, method)
         
         # Skip API call for compression method to improve speed
         if method == 'compression':
-            return enhanced_prompt
+            return enhanced_prompt, None
         
-        openai_client = OpenAI(
-            api_key=os.getenv('OPENAI_API_KEY'),
-            timeout=8.0  # Reduced timeout for faster responses
-        )
-        
-        if method == "llm":
-            # Streamlined system prompt for faster processing
-            system_prompt = "Refine this enhanced prompt for maximum effectiveness while preserving all structural elements. Be concise and precise."
-            
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": enhanced_prompt}
-                ],
-                max_tokens=800,  # Reduced for faster responses
-                temperature=0.5,  # Lower for more consistent results
-                timeout=6.0  # Aggressive timeout
-            )
-            
-            final_enhanced = response.choices[0].message.content.strip()
-            
-        else:  # compression
-            # For compression, use the technique-enhanced version directly
-            final_enhanced = enhanced_prompt
-        
-        return final_enhanced if final_enhanced else enhanced_prompt
+        return refine_with_openai(enhanced_prompt)
         
     except Exception as e:
-        print(f"OpenAI API error: {e}")
-        # Return the technique-enhanced version if API fails
-        if enabled_techniques is None:
-            enabled_techniques = PromptTechniques.get_default_techniques()
-        return PromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+        log_event('provider_error', level='error', provider='openai', error=str(e))
+        return None, None
 
 def enhance_with_gemini(original_prompt, method='llm', enabled_techniques=None):
-    """Advanced prompt engineering with Google Gemini - PERFORMANCE OPTIMIZED"""
+    """Advanced prompt engineering with Google Gemini - PERFORMANCE OPTIMIZED
+    
+    Returns ``(enhanced prompt, provider usage)``: usage is None when no
+    provider call was made, and ``(None, None)`` signals that the call
+    failed so the caller falls through to the next provider or the fallback.
+    """
     try:
         if enabled_techniques is None:
             enabled_techniques = PromptTechniques.get_default_techniques()
         
         # Apply prompt engineering techniques first
-        enhanced_prompt = PromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+        with span('techniques'):
+            enhanced_prompt = technique_profiler.apply_techniques(original_prompt, enabled_techniques, method)
         
         # Skip API call for compression method to improve speed
         if method == 'compression':
-            return enhanced_prompt
-        
-        generation_config = genai.types.GenerationConfig(
-            max_output_tokens=600,  # Reduced for faster responses
-            temperature=0.5,  # More consistent results
-            top_p=0.8,
-            top_k=20  # Reduced for faster generation
-        )
-        
-        model = genai.GenerativeModel(
-            'gemini-pro',
-            generation_config=generation_config
-        )
-        
-        if method == "llm":
-            # Streamlined instruction for faster processing
-            enhancement_instruction = f"Optimize this enhanced prompt for maximum effectiveness:\n\n{enhanced_prompt}"
-            
-        else:  # compression
-            # For compression, use the technique-enhanced version directly
-            return enhanced_prompt
-        
-        response = model.generate_content(enhancement_instruction)
-        final_enhanced = response.text.strip()
-        
-        # Clean up response formatting
-        if final_enhanced.startswith(('```', 'Enhanced:', 'Optimized:', 'Final:')):
-            lines = final_enhanced.split('\n')
-            for i, line in enumerate(lines):
-                if line and not line.startswith(('```', 'Enhanced:', 'Optimized:', 'Final:')):
-                    final_enhanced = '\n'.join(lines[i:])
-                    break
+            return enhanced_prompt, None
         
-        return final_enhanced if final_enhanced else enhanced_prompt
+        return refine_with_gemini(enhanced_prompt)
         
     except Exception as e:
-        print(f"Gemini API error: {e}")
-        # Return the technique-enhanced version if API fails
-        if enabled_techniques is None:
-            enabled_techniques = PromptTechniques.get_default_techniques()
-        return PromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+        log_event('provider_error', level='error', provider='gemini', error=str(e))
+        return None, None
+
+def record_hedge_loser(provider, result):
+    """Bill the tokens of a hedged call whose answer was discarded"""
+    _, usage = result
+    token_ledger.record_hedge_loser(provider, usage)
+    log_event('provider_hedge_loser', provider=provider, input_tokens=usage['input_tokens'],
+              output_tokens=usage['output_tokens'])
+
+def enhance_hedged(original_prompt, method, enabled_techniques):
+    """Auto mode with hedging: OpenAI first, Gemini too once OpenAI is slower than its p90.
+    
+    Returns ``(enhanced_prompt, provider_used, provider usage)``.
+    """
+    with span('techniques'):
+        enhanced_prompt = technique_profiler.apply_techniques(original_prompt, enabled_techniques, method)
+    try:
+        # Provider calls run on the hedge pool; this span is the time spent waiting on them
+        with span('provider'):
+            (refined, usage), provider_used, hedged = provider_hedger.call(
+                ('openai', lambda: refine_with_openai(enhanced_prompt)),
+                ('gemini', lambda: refine_with_gemini(enhanced_prompt)),
+                on_loser=record_hedge_loser
+            )
+        if hedged:
+            log_event('provider_hedged', winner=provider_used)
+        return refined, provider_used, usage
+    except Exception as e:
+        log_event('provider_error', level='error', provider='hedged', error=str(e))
+        return enhanced_prompt, 'fallback', None
 
 def get_fallback_enhancement(original_prompt, method='llm', enabled_techniques=None):
     """Advanced fallback enhancement using state-of-the-art techniques when AI services are unavailable"""
@@ -331,84 +550,78 @@ def get_fallback_enhancement(original_prompt, method='llm', enabled_techniques=N
         enabled_techniques = PromptTechniques.get_default_techniques()
     
     # Use the comprehensive prompt techniques system for fallback
-    return PromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+    with span('techniques'):
+        return technique_profiler.apply_techniques(original_prompt, enabled_techniques, method)
 
-# Prompt enhancement endpoint
-@app.route('/api/prompts/enhance', methods=['POST'])
-def enhance_prompt():
+def run_enhancement(original_prompt, optimized_prompt, method, ai_provider, optimized_techniques, cache_key):
+    """Run the provider chain, score the result and cache it.
+    
+    Returns the cacheable response payload. Executed once per cache key
+    even when identical requests arrive concurrently.
+    """
+    enhancement_start = time.time()
+    enhanced_prompt = None
+    provider_used = None
+    usage = None
+    
     try:
-        start_time = time.time()
-        data = request.get_json()
-        original_prompt = data.get('prompt', '').strip()
-        method = data.get('method', 'llm')
-        ai_provider = data.get('provider', os.getenv('AI_PROVIDER', 'auto'))
-        enabled_techniques = data.get('techniques', PromptTechniques.get_default_techniques())
-        preset = data.get('preset')
-        
-        # Apply preset if specified
-        if preset and preset in PromptTechniques.PRESETS:
-            enabled_techniques = PromptTechniques.PRESETS[preset]
-        
-        if not original_prompt:
-            return jsonify({'error': 'Prompt is required'}), 400
-        
-        if len(original_prompt) > 5000:
-            return jsonify({'error': 'Prompt too long (max 5000 characters)'}), 400
-        
-        # Optimize prompt and techniques for performance
-        optimized_prompt, optimized_techniques = performance_optimizer.optimize_prompt_processing(original_prompt, enabled_techniques)
-        
-        # Generate high-performance cache key
-        cache_key = performance_optimizer.get_cache_key(optimized_prompt, optimized_techniques, method)
-        
-        # Check high-performance cache
-        cached_result = performance_optimizer.get_cached_result(cache_key)
-        if cached_result:
-            response_time = int((time.time() - start_time) * 1000)
-            performance_optimizer.record_response_time(response_time)
-            print(f"⚡ INSTANT response from cache in {response_time}ms")
-            return jsonify({
-                **cached_result,
-                'cached': True,
-                'response_time_ms': response_time
-            })
-        
-        # Get user if authenticated
-        user = get_current_user()
-        
-        enhanced_prompt = None
-        provider_used = None
-        
-        # High-performance AI enhancement with timeout and retry logic
-        enhancement_start = time.time()
-        enhanced_prompt = None
-        provider_used = None
-        
-        try:
-            # Use optimized techniques for faster processing
-            if ai_provider == 'openai' or ai_provider == 'auto':
-                if os.getenv('OPENAI_API_KEY'):
-                    enhanced_prompt = enhance_with_openai(optimized_prompt, method, optimized_techniques)
-                    if enhanced_prompt:
-                        provider_used = 'openai'
-            
-            if not enhanced_prompt and (ai_provider == 'gemini' or ai_provider == 'auto'):
-                if os.getenv('GEMINI_API_KEY'):
-                    enhanced_prompt = enhance_with_gemini(optimized_prompt, method, optimized_techniques)
-                    if enhanced_prompt:
-                        provider_used = 'gemini'
-            
-            # Fast fallback if no AI service worked
-            if not enhanced_prompt:
-                enhanced_prompt = get_fallback_enhancement(optimized_prompt, method, optimized_techniques)
-                provider_used = 'fallback'
-            
-        except Exception as e:
-            print(f"🚨 Enhancement error: {e}")
+        # Hedged auto mode needs both providers; otherwise try them in order,
+        # skipping any whose circuit is open
+        if (ai_provider == 'auto' and method == 'llm' and provider_hedger.enabled
+                and provider_clients.configured('openai') and provider_clients.configured('gemini')
+                and provider_breakers.available('openai') and provider_breakers.available('gemini')):
+            enhanced_prompt, provider_used, usage = enhance_hedged(optimized_prompt, method, optimized_techniques)
+        
+        # Use optimized techniques for faster processing
+        if not enhanced_prompt and (ai_provider == 'openai' or ai_provider == 'auto'):
+            if provider_clients.configured('openai') and provider_breakers.available('openai'):
+                enhanced_prompt, usage = enhance_with_openai(optimized_prompt, method, optimized_techniques)
+                if enhanced_prompt:
+                    provider_used = 'openai'
+        
+        if not enhanced_prompt and (ai_provider == 'gemini' or ai_provider == 'auto'):
+            if provider_clients.configured('gemini') and provider_breakers.available('gemini'):
+                enhanced_prompt, usage = enhance_with_gemini(optimized_prompt, method, optimized_techniques)
+                if enhanced_prompt:
+                    provider_used = 'gemini'
+        
+        # Fast fallback if no AI service worked
+        if not enhanced_prompt:
             enhanced_prompt = get_fallback_enhancement(optimized_prompt, method, optimized_techniques)
-            provider_used = 'fallback_error'
+            provider_used = 'fallback'
         
-        # Calculate effectiveness score based on enhancement quality
+    except Exception as e:
+        log_event('enhancement_error', level='error', error=str(e))
+        enhanced_prompt = get_fallback_enhancement(optimized_prompt, method, optimized_techniques)
+        provider_used = 'fallback_error'
+        usage = None
+    
+    return finish_enhancement(original_prompt, optimized_prompt, method, optimized_techniques, cache_key,
+                              enhanced_prompt, provider_used, enhancement_start, usage)
+
+def finish_enhancement(original_prompt, optimized_prompt, method, optimized_techniques, cache_key,
+                       enhanced_prompt, provider_used, enhancement_start, usage=None):
+    """Score an enhanced prompt, cache it and return the cacheable response payload"""
+    response_data = build_enhancement_result(original_prompt, method, optimized_techniques, enhanced_prompt,
+                                              provider_used, usage)
+    
+    # Cache the result for future requests
+    enhancement_time = int((time.time() - enhancement_start) * 1000)
+    if enhanced_prompt and enhancement_time < 10000:  # Only cache successful, fast responses
+        with span('cache_store'):
+            performance_optimizer.cache_result(cache_key, response_data)
+            performance_optimizer.index_prompt(cache_key, optimized_prompt, optimized_techniques, method)
+    
+    return response_data
+
+def build_enhancement_result(original_prompt, method, optimized_techniques, enhanced_prompt, provider_used, usage=None):
+    """The scored, cacheable response payload for an enhanced prompt.
+    
+    ``usage`` is the successful provider call's token usage; without one no
+    provider tokens are recorded.
+    """
+    # Calculate effectiveness score based on enhancement quality
+    with span('scoring'):
         enhancement_ratio = len(enhanced_prompt) / len(original_prompt) if original_prompt else 1
         base_score = 85.0
         
@@ -420,75 +633,273 @@ def enhance_prompt():
             effectiveness_score = min(95.0, base_score + (2 - enhancement_ratio) * 15)
         
         effectiveness_score = max(70.0, effectiveness_score)  # Minimum score
+    
+    # Prepare response data for caching
+    response_data = {
+        'enhanced_prompt': enhanced_prompt,
+        'success': True,
+        'provider_used': provider_used,
+        'method': method,
+        'techniques_used': optimized_techniques,
+        'techniques_applied': len(optimized_techniques),
+        'effectiveness_score': round(effectiveness_score, 1),
+        'enhancement_ratio': round(enhancement_ratio, 2),
+        'original_length': len(original_prompt),
+        'enhanced_length': len(enhanced_prompt),
+        'token_usage': enhancement_token_usage(original_prompt, enhanced_prompt, usage),
+        'cached': False
+    }
+    token_ledger.record_enhancement(provider_used, response_data['token_usage'])
+    
+    return response_data
+
+def save_enhancement(user, original_prompt, result, billed=True):
+    """Store the prompt and update the user's analytics; returns the prompt id or None"""
+    return save_enhancements(user, [(original_prompt, result, billed)])[0]
+
+def save_enhancements(user, enhancements):
+    """Store ``(original, result, billed)`` prompts and their analytics delta in one commit.
+    
+    Each row keeps its result's provider, method, techniques and token usage;
+    ``billed`` is False for a result whose provider call was already stored
+    (a coalesced request or a repeated batch item), which stores no provider
+    tokens. Returns the prompt ids in order (None for anonymous requests,
+    empty results or a failed commit).
+    """
+    prompt_ids = [None] * len(enhancements)
+    stored = [(i, item) for i, item in enumerate(enhancements) if item[1]['enhanced_prompt']]
+    if not user or not stored:
+        return prompt_ids
+    
+    db_write_start = time.perf_counter()
+    try:
+        records = []
+        for i, (original_prompt, result, billed) in stored:
+            # Generate smart title from original prompt
+            title_words = original_prompt.split()[:8]
+            title = ' '.join(title_words)
+            if len(title_words) == 8:
+                title += "..."
+            
+            usage = result['token_usage']
+            prompt_record = Prompt(
+                user_id=user.id,
+                title=title,
+                body=original_prompt,
+                original_text=original_prompt,
+                enhanced_text=result['enhanced_prompt'],
+                category='general',
+                effectiveness_score=result['effectiveness_score'],
+                provider=result['provider_used'],
+                method=result['method'],
+                techniques=','.join(result['techniques_used']),
+                input_tokens=usage['input_tokens'] if billed else 0,
+                output_tokens=usage['output_tokens'] if billed else 0,
+                enhanced_tokens=usage['enhanced_tokens']
+            )
+            db.session.add(prompt_record)
+            records.append((i, prompt_record))
         
-        response_time = int((time.time() - start_time) * 1000)
-        enhancement_time = int((time.time() - enhancement_start) * 1000)
+        # Update analytics
+        analytics = Analytics.query.filter_by(user_id=user.id).first()
+        if not analytics:
+            # Column defaults only apply at INSERT, so start the counters explicitly
+            analytics = Analytics(user_id=user.id, prompts_enhanced=0, time_saved=0, total_usage=0)
+            db.session.add(analytics)
+        
+        analytics.prompts_enhanced += len(records)
+        analytics.time_saved += 45 * len(records)
+        analytics.total_usage += len(records)
+        
+        with span('db_commit'):
+            db.session.commit()
+        for i, prompt_record in records:
+            prompt_ids[i] = prompt_record.id
+        metrics.DB_WRITE_LATENCY.labels('success').observe(time.perf_counter() - db_write_start)
+        
+    except Exception as db_error:
+        log_event('db_write_failed', level='warning', error=str(db_error), rows=len(stored))
+        db.session.rollback()
+        metrics.DB_WRITE_LATENCY.labels('failure').observe(time.perf_counter() - db_write_start)
+    
+    return prompt_ids
+
+def enhanced_prompts():
+    """Stored prompts that came from an enhancement (rows from before token tracking have no method)"""
+    return Prompt.query.filter(Prompt.method.isnot(None))
+
+def stored_token_totals(user_id):
+    """Estimated tokens of a user's stored enhancements, from the database"""
+    enhancements, input_tokens, output_tokens, prompt_tokens = enhanced_prompts().filter(
+        Prompt.user_id == user_id
+    ).with_entities(
+        db.func.count(Prompt.id),
+        db.func.coalesce(db.func.sum(Prompt.input_tokens), 0),
+        db.func.coalesce(db.func.sum(Prompt.output_tokens), 0),
+        db.func.coalesce(db.func.sum(Prompt.enhanced_tokens), 0)
+    ).one()
+    return {
+        'enhancements': enhancements,
+        'input_tokens': int(input_tokens),
+        'output_tokens': int(output_tokens),
+        'prompt_tokens': int(prompt_tokens)
+    }
+
+def stored_token_report(top_users=20):
+    """Token totals per provider, technique and user across every stored enhancement.
+    
+    Built from the database so every worker reports the same totals and they
+    survive restarts; anonymous enhancements are not stored and not counted.
+    """
+    providers = {
+        provider: {'enhancements': count, 'input_tokens': int(input_tokens), 'output_tokens': int(output_tokens)}
+        for provider, count, input_tokens, output_tokens in enhanced_prompts().with_entities(
+            Prompt.provider,
+            db.func.count(Prompt.id),
+            db.func.coalesce(db.func.sum(Prompt.input_tokens), 0),
+            db.func.coalesce(db.func.sum(Prompt.output_tokens), 0)
+        ).group_by(Prompt.provider)
+    }
+    
+    # Technique sets repeat across prompts, so group by the stored set and split here
+    techniques = {}
+    for stored_techniques, method, count in enhanced_prompts().with_entities(
+        Prompt.techniques, Prompt.method, db.func.count(Prompt.id)
+    ).group_by(Prompt.techniques, Prompt.method):
+        for technique in filter(None, (stored_techniques or '').split(',')):
+            totals = techniques.setdefault(technique, {'technique': technique, 'enhancements': 0, 'tokens_added': 0})
+            totals['enhancements'] += count
+            totals['tokens_added'] += count * technique_tokens(technique, method)
+    
+    billed = db.func.coalesce(db.func.sum(Prompt.input_tokens + Prompt.output_tokens), 0)
+    users = [
+        {'user_id': user_id, 'enhancements': count, 'input_tokens': int(input_tokens),
+         'output_tokens': int(output_tokens), 'prompt_tokens': int(prompt_tokens)}
+        for user_id, count, input_tokens, output_tokens, prompt_tokens in enhanced_prompts().with_entities(
+            Prompt.user_id,
+            db.func.count(Prompt.id),
+            db.func.coalesce(db.func.sum(Prompt.input_tokens), 0),
+            db.func.coalesce(db.func.sum(Prompt.output_tokens), 0),
+            db.func.coalesce(db.func.sum(Prompt.enhanced_tokens), 0)
+        ).group_by(Prompt.user_id).order_by(billed.desc()).limit(top_users)
+    ]
+    tracked_users = enhanced_prompts().with_entities(db.func.count(db.distinct(Prompt.user_id))).scalar()
+    
+    return {
+        'tokenizer': TOKENIZER,
+        'providers': providers,
+        'techniques': sorted(techniques.values(), key=lambda row: -row['tokens_added']),
+        'top_users': users,
+        'tracked_users': tracked_users
+    }
+
+def parse_enhance_request():
+    """Read an enhance request body.
+    
+    Returns ``(original_prompt, method, ai_provider, enabled_techniques, error)``
+    where ``error`` is a message for a 400 response, or None.
+    """
+    with span('parse'):
+        data = request.get_json()
+    original_prompt = data.get('prompt', '').strip()
+    method = data.get('method', 'llm')
+    ai_provider = data.get('provider', os.getenv('AI_PROVIDER', 'auto'))
+    enabled_techniques = data.get('techniques', PromptTechniques.get_default_techniques())
+    preset = data.get('preset')
+    
+    # Apply preset if specified
+    if preset and preset in PromptTechniques.PRESETS:
+        enabled_techniques = PromptTechniques.PRESETS[preset]
+    
+    error = None
+    if not original_prompt:
+        error = 'Prompt is required'
+    elif len(original_prompt) > 5000:
+        error = 'Prompt too long (max 5000 characters)'
+    return original_prompt, method, ai_provider, enabled_techniques, error
+
+# Prompt enhancement endpoint
+@app.route('/api/prompts/enhance', methods=['POST'])
+def enhance_prompt():
+    try:
+        start_time = time.time()
+        original_prompt, method, ai_provider, enabled_techniques, error = parse_enhance_request()
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Record performance metrics
-        performance_optimizer.record_response_time(response_time)
+        # Optimize prompt and techniques for performance
+        with span('optimize'):
+            optimized_prompt, optimized_techniques = performance_optimizer.optimize_prompt_processing(original_prompt, enabled_techniques)
+            
+            # Generate high-performance cache key
+            cache_key = performance_optimizer.get_cache_key(optimized_prompt, optimized_techniques, method)
+        g.log_fields = {'prompt_chars': len(original_prompt), 'techniques': len(optimized_techniques),
+                        'cache_key': performance_optimizer.get_trace_key(cache_key)}
         
-        print(f"🚀 Enhancement completed in {response_time}ms (processing: {enhancement_time}ms) via {provider_used}")
+        # Check high-performance cache
+        with span('cache_lookup'):
+            cached_response, is_stale = performance_optimizer.lookup_cached_result(cache_key)
+        if cached_response:
+            if is_stale:
+                # Serve the stale copy now and refresh it in the background
+                performance_optimizer.schedule_refresh(
+                    cache_key,
+                    lambda: run_enhancement(original_prompt, optimized_prompt, method, ai_provider, optimized_techniques, cache_key)
+                )
+            response_time = int((time.time() - start_time) * 1000)
+            g.latency_labels = {'cache': 'stale' if is_stale else 'hit', 'method': method}
+            # Stored body is already encoded; only the per-request fields are serialized
+            return Response(
+                cached_response.render(cached='stale' if is_stale else True, response_time_ms=response_time),
+                mimetype='application/json'
+            )
         
-        # Prepare response data for caching
-        response_data = {
-            'enhanced_prompt': enhanced_prompt,
-            'success': True,
-            'provider_used': provider_used,
+        # Second chance: a near-duplicate prompt with the same techniques
+        with span('near_duplicate'):
+            similar_response, match_type = performance_optimizer.lookup_near_duplicate(optimized_prompt, optimized_techniques, method)
+        if similar_response:
+            response_time = int((time.time() - start_time) * 1000)
+            g.latency_labels = {'cache': 'similar', 'method': method}
+            g.log_fields['cache_match'] = match_type
+            return Response(
+                similar_response.render(cached=True, cache_match=match_type, response_time_ms=response_time),
+                mimetype='application/json'
+            )
+        
+        # Get user if authenticated
+        with span('auth'):
+            user = get_current_user()
+        
+        # Identical concurrent misses share one provider call; for a coalesced
+        # request this span is the time spent waiting on the leader
+        enhancement_start = time.time()
+        with span('enhancement'):
+            response_data, coalesced = performance_optimizer.run_coalesced(
+                cache_key,
+                lambda: run_enhancement(original_prompt, optimized_prompt, method, ai_provider, optimized_techniques, cache_key)
+            )
+        response_data = dict(response_data)
+        enhanced_prompt = response_data['enhanced_prompt']
+        
+        response_time = int((time.time() - start_time) * 1000)
+        enhancement_time = int((time.time() - enhancement_start) * 1000)
+        
+        # Labels for the request latency histograms
+        g.latency_labels = {
+            'cache': 'coalesced' if coalesced else 'miss',
             'method': method,
-            'techniques_used': optimized_techniques,
-            'techniques_applied': len(optimized_techniques),
-            'effectiveness_score': round(effectiveness_score, 1),
-            'enhancement_ratio': round(enhancement_ratio, 2),
-            'original_length': len(original_prompt),
-            'enhanced_length': len(enhanced_prompt),
-            'cached': False
+            'provider': response_data['provider_used']
         }
         
-        # Cache the result for future requests
-        if enhanced_prompt and response_time < 10000:  # Only cache successful, fast responses
-            performance_optimizer.cache_result(cache_key, response_data)
+        g.log_fields.update(enhancement_ms=enhancement_time, enhanced_chars=len(enhanced_prompt))
         
-        # Async database operations (non-blocking)
-        prompt_id = None
-        if user and enhanced_prompt:
-            try:
-                # Generate smart title from original prompt
-                title_words = original_prompt.split()[:8]
-                title = ' '.join(title_words)
-                if len(title_words) == 8:
-                    title += "..."
-                
-                prompt_record = Prompt(
-                    user_id=user.id,
-                    title=title,
-                    body=original_prompt,
-                    original_text=original_prompt,
-                    enhanced_text=enhanced_prompt,
-                    category='general',
-                    effectiveness_score=round(effectiveness_score, 1)
-                )
-                db.session.add(prompt_record)
-                
-                # Update analytics
-                analytics = Analytics.query.filter_by(user_id=user.id).first()
-                if not analytics:
-                    analytics = Analytics(user_id=user.id)
-                    db.session.add(analytics)
-                
-                analytics.prompts_enhanced += 1
-                analytics.time_saved += 45
-                analytics.total_usage += 1
-                
-                db.session.commit()
-                prompt_id = prompt_record.id
-                
-            except Exception as db_error:
-                print(f"⚠️ Database operation failed (non-critical): {db_error}")
-                db.session.rollback()
+        # A coalesced request shares the leader's provider call, which the leader stores
+        prompt_id = save_enhancement(user, original_prompt, response_data, billed=not coalesced)
         
         # Add final response metadata
         response_data.update({
             'prompt_id': prompt_id,
+            'coalesced': coalesced,
             'response_time_ms': response_time,
             'enhancement_time_ms': enhancement_time
         })
@@ -496,9 +907,259 @@ def enhance_prompt():
         return jsonify(response_data)
         
     except Exception as e:
-        print(f"Enhancement error: {e}")
-        import traceback
-        traceback.print_exc()
+        log_event('enhance_failed', level='error', exc_info=True, error=str(e))
+        return jsonify({'error': 'Enhancement service temporarily unavailable'}), 500
+
+def sse_event(event, data):
+    """One Server-Sent Events frame; ``data`` is a dict or an already encoded JSON body"""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    elif not isinstance(data, str):
+        data = json.dumps(data, separators=(',', ':'))
+    return f"event: {event}\ndata: {data}\n\n"
+
+def available_providers(ai_provider):
+    """Providers to try, in order, for a streamed or batched enhancement: configured and circuit not open"""
+    order = ['openai', 'gemini'] if ai_provider == 'auto' else [ai_provider]
+    return [
+        provider for provider in order
+        if provider in API_KEY_ENV and provider_clients.configured(provider) and provider_breakers.available(provider)
+    ]
+
+# Streaming prompt enhancement (Server-Sent Events)
+@app.route('/api/prompts/enhance/stream', methods=['POST'])
+def enhance_prompt_stream():
+    """Same request body as /api/prompts/enhance, answered as an event stream.
+    
+    ``technique`` carries the locally assembled prompt right away, ``token``
+    events carry provider text as it is generated, and ``summary`` closes the
+    stream with the final prompt, scores and ``prompt_id``. A cache hit is a
+    single ``summary``. The finished result is cached like a normal enhance.
+    """
+    start_time = time.time()
+    original_prompt, method, ai_provider, enabled_techniques, error = parse_enhance_request()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    with span('optimize'):
+        optimized_prompt, optimized_techniques = performance_optimizer.optimize_prompt_processing(original_prompt, enabled_techniques)
+        cache_key = performance_optimizer.get_cache_key(optimized_prompt, optimized_techniques, method)
+    g.log_fields = {'prompt_chars': len(original_prompt), 'techniques': len(optimized_techniques),
+                    'cache_key': performance_optimizer.get_trace_key(cache_key), 'streamed': True}
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    
+    with span('cache_lookup'):
+        cached_response, is_stale = performance_optimizer.lookup_cached_result(cache_key)
+    if cached_response:
+        if is_stale:
+            performance_optimizer.schedule_refresh(
+                cache_key,
+                lambda: run_enhancement(original_prompt, optimized_prompt, method, ai_provider, optimized_techniques, cache_key)
+            )
+        response_time = int((time.time() - start_time) * 1000)
+        g.latency_labels = {'cache': 'stale' if is_stale else 'hit', 'method': method}
+        body = cached_response.render(cached='stale' if is_stale else True, response_time_ms=response_time)
+        return Response(sse_event('summary', body), mimetype='text/event-stream', headers=headers)
+    
+    with span('near_duplicate'):
+        similar_response, match_type = performance_optimizer.lookup_near_duplicate(optimized_prompt, optimized_techniques, method)
+    if similar_response:
+        response_time = int((time.time() - start_time) * 1000)
+        g.latency_labels = {'cache': 'similar', 'method': method}
+        g.log_fields['cache_match'] = match_type
+        body = similar_response.render(cached=True, cache_match=match_type, response_time_ms=response_time)
+        return Response(sse_event('summary', body), mimetype='text/event-stream', headers=headers)
+    
+    with span('auth'):
+        user = get_current_user()
+    # The request latency recorded for a stream is its time to first byte
+    g.latency_labels = {'cache': 'stream', 'method': method}
+    
+    @stream_with_context
+    def events():
+        enhancement_start = time.time()
+        technique_prompt = technique_profiler.apply_techniques(optimized_prompt, optimized_techniques, method)
+        yield sse_event('technique', {
+            'enhanced_prompt': technique_prompt,
+            'techniques_used': optimized_techniques,
+            'method': method
+        })
+        
+        enhanced_prompt, provider_used, usage = technique_prompt, 'fallback', None
+        first_token_ms = None
+        for provider in (available_providers(ai_provider) if method == 'llm' else []):
+            chunks = []
+            try:
+                for text in STREAM_PROVIDERS[provider](technique_prompt):
+                    if first_token_ms is None:
+                        first_token_ms = int((time.time() - start_time) * 1000)
+                    chunks.append(text)
+                    yield sse_event('token', {'provider': provider, 'text': text})
+            except Exception as e:
+                log_event('provider_error', level='error', provider=provider, error=str(e), streamed_chunks=len(chunks))
+                if chunks:
+                    # Tokens were already sent: the summary replaces them with the technique prompt
+                    break
+                continue
+            refined = ''.join(chunks)
+            refined = clean_gemini_response(refined) if provider == 'gemini' else refined.strip()
+            if refined:
+                # Streamed chunks carry no usage counts
+                enhanced_prompt, provider_used = refined, provider
+                usage = provider_usage(provider, technique_prompt, refined)
+            break
+        
+        response_data = dict(finish_enhancement(original_prompt, optimized_prompt, method, optimized_techniques,
+                                                cache_key, enhanced_prompt, provider_used, enhancement_start, usage))
+        prompt_id = save_enhancement(user, original_prompt, response_data)
+        response_data.update({
+            'prompt_id': prompt_id,
+            'streamed': True,
+            'first_token_ms': first_token_ms,
+            'response_time_ms': int((time.time() - start_time) * 1000),
+            'enhancement_time_ms': int((time.time() - enhancement_start) * 1000)
+        })
+        log_event('stream_complete', provider=provider_used, first_token_ms=first_token_ms,
+                  duration_ms=response_data['response_time_ms'], enhanced_chars=len(enhanced_prompt))
+        yield sse_event('summary', response_data)
+    
+    return Response(events(), mimetype='text/event-stream', headers=headers)
+
+def refine_batch_item(technique_prompt, providers):
+    """Refine one batched prompt with the first provider that answers.
+    
+    Returns ``(prompt, provider_used, provider usage)``; the technique prompt is the fallback.
+    """
+    for provider in providers:
+        try:
+            refine = refine_with_openai if provider == 'openai' else refine_with_gemini
+            refined, usage = refine(technique_prompt)
+            return refined, provider, usage
+        except Exception as e:
+            log_event('provider_error', level='error', provider=provider, error=str(e), batch=True)
+    return technique_prompt, 'fallback', None
+
+# Batch prompt enhancement
+@app.route('/api/prompts/enhance/batch', methods=['POST'])
+def enhance_prompt_batch():
+    """Enhance up to BATCH_MAX_PROMPTS prompts in one request.
+    
+    ``prompts`` is a list of strings or ``{prompt, techniques, preset}``
+    objects; top-level ``method``, ``provider``, ``techniques`` and
+    ``preset`` are the defaults. Cache hits are read in one round trip,
+    each distinct technique set is compiled once, provider calls fan out
+    over a shared bounded pool, and all new rows plus the analytics delta
+    are committed together. Results keep the request order; an invalid
+    item gets its own error entry.
+    """
+    try:
+        start_time = time.time()
+        with span('parse'):
+            data = request.get_json(silent=True) or {}
+        items = data.get('prompts')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'prompts must be a non-empty list'}), 400
+        if len(items) > BATCH_MAX_PROMPTS:
+            return jsonify({'error': f'Too many prompts (max {BATCH_MAX_PROMPTS})'}), 400
+    
+        method = data.get('method', 'llm')
+        ai_provider = data.get('provider', os.getenv('AI_PROVIDER', 'auto'))
+        default_techniques = data.get('techniques', PromptTechniques.get_default_techniques())
+        if data.get('preset') in PromptTechniques.PRESETS:
+            default_techniques = PromptTechniques.PRESETS[data['preset']]
+    
+        results = [None] * len(items)
+        entries = []  # (index, original_prompt, optimized_prompt, optimized_techniques, cache_key)
+        with span('optimize'):
+            for i, item in enumerate(items):
+                item = item if isinstance(item, dict) else {'prompt': item}
+                original_prompt = item.get('prompt', '')
+                original_prompt = original_prompt.strip() if isinstance(original_prompt, str) else ''
+                techniques = item.get('techniques', default_techniques)
+                if item.get('preset') in PromptTechniques.PRESETS:
+                    techniques = PromptTechniques.PRESETS[item['preset']]
+            
+                if not original_prompt:
+                    results[i] = {'success': False, 'error': 'Prompt is required'}
+                    continue
+                if len(original_prompt) > 5000:
+                    results[i] = {'success': False, 'error': 'Prompt too long (max 5000 characters)'}
+                    continue
+            
+                optimized_prompt, optimized_techniques = performance_optimizer.optimize_prompt_processing(original_prompt, techniques)
+                cache_key = performance_optimizer.get_cache_key(optimized_prompt, optimized_techniques, method)
+                entries.append((i, original_prompt, optimized_prompt, optimized_techniques, cache_key))
+    
+        with span('cache_lookup'):
+            cached = performance_optimizer.get_cached_results(list({entry[4] for entry in entries}))
+        for i, _, _, _, cache_key in entries:
+            if cache_key in cached:
+                results[i] = {**cached[cache_key], 'cached': True}
+    
+        # Each distinct miss is enhanced once, however many times it appears in the batch
+        misses = {}
+        for entry in entries:
+            if entry[4] not in cached:
+                misses.setdefault(entry[4], entry)
+    
+        fresh = {}
+        if misses:
+            misses = list(misses.values())
+            with span('techniques'):
+                technique_prompts = FastPromptProcessor.batch_process_techniques(
+                    [(optimized_prompt, optimized_techniques) for _, _, optimized_prompt, optimized_techniques, _ in misses],
+                    method
+                )
+        
+            providers = available_providers(ai_provider) if method == 'llm' else []
+            if providers:
+                with span('provider'):
+                    futures = [batch_provider_pool.submit(refine_batch_item, prompt, providers) for prompt in technique_prompts]
+                    enhanced = [future.result() for future in futures]
+            else:
+                enhanced = [(prompt, 'fallback', None) for prompt in technique_prompts]
+        
+            for (_, original_prompt, _, optimized_techniques, cache_key), (enhanced_prompt, provider_used, usage) in zip(misses, enhanced):
+                fresh[cache_key] = build_enhancement_result(original_prompt, method, optimized_techniques, enhanced_prompt,
+                                                            provider_used, usage)
+        
+            with span('cache_store'):
+                performance_optimizer.cache_results(fresh)
+                for _, _, optimized_prompt, optimized_techniques, cache_key in misses:
+                    performance_optimizer.index_prompt(cache_key, optimized_prompt, optimized_techniques, method)
+    
+        with span('auth'):
+            user = get_current_user()
+        stored = [(i, original_prompt, cache_key) for i, original_prompt, _, _, cache_key in entries if cache_key in fresh]
+        # Repeated items share one provider call: only the first one stores its tokens
+        billed_keys = set()
+        enhancements = []
+        for _, original_prompt, cache_key in stored:
+            enhancements.append((original_prompt, fresh[cache_key], cache_key not in billed_keys))
+            billed_keys.add(cache_key)
+        prompt_ids = save_enhancements(user, enhancements)
+        for (i, _, cache_key), prompt_id in zip(stored, prompt_ids):
+            results[i] = {**fresh[cache_key], 'prompt_id': prompt_id}
+    
+        response_time = int((time.time() - start_time) * 1000)
+        g.latency_labels = {'cache': 'batch', 'method': method}
+        g.log_fields = {
+            'batch_size': len(items),
+            'cache_hits': len(entries) - len(stored),
+            'enhanced': len(fresh),
+            'invalid': len(items) - len(entries)
+        }
+        return jsonify({
+            'success': True,
+            'results': results,
+            'count': len(items),
+            'cache_hits': len(entries) - len(stored),
+            'enhanced': len(fresh),
+            'response_time_ms': response_time
+        })
+        
+    except Exception as e:
+        log_event('enhance_failed', level='error', exc_info=True, error=str(e), batch=True)
         return jsonify({'error': 'Enhancement service temporarily unavailable'}), 500
 
 # Health check endpoint
@@ -533,9 +1194,7 @@ def get_prompts():
         ])
         
     except Exception as e:
-        print(f"Error fetching prompts: {e}")
-        import traceback
-        traceback.print_exc()
+        log_event('prompts_fetch_failed', level='error', exc_info=True, error=str(e))
         return jsonify({'error': str(e)}), 500
 
 # Get analytics
@@ -553,7 +1212,8 @@ def get_analytics():
                 'total_prompts': 0,
                 'today_enhancements': 0,
                 'average_score': 0.0,
-                'favorites_count': 0
+                'favorites_count': 0,
+                'tokens': stored_token_totals(user.id)
             })
         
         # Get today's enhancements
@@ -576,13 +1236,13 @@ def get_analytics():
             'total_prompts': analytics.prompts_enhanced,
             'today_enhancements': today_prompts,
             'average_score': round(float(avg_score), 1),
-            'favorites_count': favorites_count
+            'favorites_count': favorites_count,
+            # Estimated tokens of this user's stored enhancements
+            'tokens': stored_token_totals(user.id)
         })
         
     except Exception as e:
-        print(f"Error fetching analytics: {e}")
-        import traceback
-        traceback.print_exc()
+        log_event('analytics_fetch_failed', level='error', exc_info=True, error=str(e))
         return jsonify({'error': str(e)}), 500
 
 # Get available prompt engineering techniques
@@ -591,7 +1251,7 @@ def get_techniques():
     try:
         return jsonify(PromptTechniques.get_technique_info())
     except Exception as e:
-        print(f"Error fetching techniques: {e}")
+        log_event('techniques_fetch_failed', level='error', exc_info=True, error=str(e))
         return jsonify({'error': str(e)}), 500
 
 # Advanced performance monitoring endpoint
@@ -608,17 +1268,123 @@ def performance_status():
             'flask_debug': app.debug,
             'total_techniques': len(PromptTechniques.TECHNIQUES)
         }
+        stats['logging'] = request_log.stats()
+        stats['provider_pool'] = provider_clients.pool_stats()
+        stats['hedging'] = provider_hedger.get_stats()
+        stats['circuit_breakers'] = provider_breakers.get_stats()
+        stats['tokens'] = stored_token_report()
         
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Downsampled system metrics history
+@app.route('/api/performance/history', methods=['GET'])
+def performance_history():
+    """RSS, CPU, threads, connections, GC and cache size from the background sampler.
+    
+    ``resolution`` is 1s (last 10 minutes), 1m (24 hours) or 1h (7 days);
+    ``limit`` keeps only the newest points.
+    """
+    resolution = request.args.get('resolution', '1m')
+    if resolution not in RESOLUTIONS:
+        return jsonify({'error': f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
+    limit = request.args.get('limit', type=int)
+    return jsonify(performance_optimizer.system_sampler.history(resolution, limit))
+
+# Recent slow-request profiles
+@app.route('/api/performance/slow-profiles', methods=['GET'])
+def slow_profiles():
+    """Summaries of the kept slow-request profiles, newest first"""
+    if not slow_request_profiler:
+        return jsonify({'enabled': False, 'profiles': []})
+    return jsonify({
+        'enabled': True,
+        'threshold_ms': slow_request_profiler.threshold_ms,
+        'sample_rate': slow_request_profiler.sample_rate,
+        'stats': slow_request_profiler.stats,
+        'profiles': slow_request_profiler.list_profiles()
+    })
+
+@app.route('/api/performance/slow-profiles/collapsed', methods=['GET'])
+def slow_profiles_collapsed():
+    """Collapsed stacks (all kept profiles, or ``?id=``) for flamegraph.pl / speedscope"""
+    if not slow_request_profiler:
+        return jsonify({'error': 'Slow request profiling is disabled (set SLOW_REQUEST_PROFILING=true)'}), 404
+    profile_id = request.args.get('id', type=int)
+    collapsed = slow_request_profiler.collapsed(profile_id)
+    if collapsed is None:
+        return jsonify({'error': f'Unknown profile id {profile_id}'}), 404
+    filename = f"slow-profile-{profile_id}.folded" if profile_id else 'slow-profiles.folded'
+    return Response(collapsed, mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+# Per-technique cost profile
+@app.route('/api/performance/techniques', methods=['GET'])
+def technique_costs():
+    """CPU time, added characters/tokens and usage share per technique and preset"""
+    try:
+        return jsonify(technique_profiler.report())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Prometheus exposition endpoint
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Metrics in Prometheus text format, merged across gunicorn workers in multiprocess mode"""
+    if not metrics.metrics_available():
+        return jsonify({'error': 'prometheus_client is not installed'}), 503
+    body, content_type = metrics.render_metrics()
+    return Response(body, content_type=content_type)
+
 # Legacy cache status endpoint (redirects to performance)
 @app.route('/api/cache/status', methods=['GET'])
 def cache_status():
     """Legacy endpoint - redirects to performance monitoring"""
     return performance_status()
 
+# Admin: selective enhancement cache invalidation
+@app.route('/api/admin/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Invalidate cached enhancements by technique, preset, provider or method.
+    
+    Requires the ``X-Admin-Token`` header to match ``ADMIN_API_TOKEN``.
+    Each filter accepts a string or a list; entries matching any filter are dropped.
+    """
+    admin_token = os.getenv('ADMIN_API_TOKEN')
+    supplied_token = request.headers.get('X-Admin-Token', '')
+    if not admin_token or not hmac.compare_digest(admin_token, supplied_token):
+        return jsonify({'error': 'Admin token required'}), 403
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        def as_list(field):
+            value = data.get(field) or []
+            return [value] if isinstance(value, str) else list(value)
+        
+        filters = {
+            'techniques': as_list('technique'),
+            'presets': as_list('preset'),
+            'providers': as_list('provider'),
+            'methods': as_list('method')
+        }
+        if not any(filters.values()):
+            return jsonify({'error': 'Specify at least one of technique, preset, provider or method'}), 400
+        
+        unknown_presets = [p for p in filters['presets'] if p not in PromptTechniques.PRESETS]
+        if unknown_presets:
+            return jsonify({'error': f"Unknown preset(s): {', '.join(unknown_presets)}"}), 400
+        
+        removed = performance_optimizer.invalidate_cache(**filters)
+        
+        return jsonify({
+            'invalidated': len(removed),
+            'filters': filters
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Serve SPA root (home page)
 @app.route('/')
 def root_spa():
@@ -673,6 +1439,9 @@ if __name__ == '__main__':
     print(f"⚡ Performance optimizer initialized")
     print(f"🎯 {len(PromptTechniques.TECHNIQUES)} techniques available")
     
+    # Gunicorn workers warm their pool in post_fork (gunicorn.conf.py); importing the app never does
+    provider_clients.prewarm_from_env()
+    
     # Run with optimized settings
     app.run(
         host='0.0.0.0', 
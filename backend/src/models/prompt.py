@@ -14,6 +14,13 @@ class Prompt(db.Model):
     is_favorite = db.Column(db.Boolean, default=False)
     effectiveness_score = db.Column(db.Float, default=0.0)
     usage_count = db.Column(db.Integer, default=0)
+    # How the enhancement was produced and the estimated tokens it billed
+    provider = db.Column(db.String(50), nullable=True)
+    method = db.Column(db.String(20), nullable=True)
+    techniques = db.Column(db.Text, nullable=True)  # Comma-separated technique names
+    input_tokens = db.Column(db.Integer, default=0)
+    output_tokens = db.Column(db.Integer, default=0)
+    enhanced_tokens = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
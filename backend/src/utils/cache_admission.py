@@ -0,0 +1,91 @@
+"""
+Cache Admission Policy
+TinyLFU frequency filter deciding which new results may displace cached ones
+"""
+
+from typing import Dict
+
+
+class FrequencySketch:
+    """Count-min sketch of recent key frequencies with periodic aging.
+
+    ``depth`` rows of saturating 4-bit counters (stored one per byte) are
+    indexed by double hashing of the key's ``hash()``. After ``sample_size``
+    increments every counter is halved, so the sketch tracks recent
+    popularity rather than all-time totals.
+    """
+
+    MAX_COUNT = 15
+
+    # Byte translation table that halves every counter in one C-level pass
+    _HALVE = bytes(value >> 1 for value in range(256))
+
+    def __init__(self, capacity: int, depth: int = 4, sample_factor: int = 10):
+        width = 64
+        while width < capacity:
+            width <<= 1
+        self.width = width
+        self.mask = width - 1
+        self.depth = depth
+        self.rows = [bytearray(width) for _ in range(depth)]
+        self.sample_size = max(1, capacity) * sample_factor
+        self.additions = 0
+        self.resets = 0
+
+    def _indexes(self, key: str):
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        return [(h1 + i * h2) & self.mask for i in range(self.depth)]
+
+    def increment(self, key: str) -> None:
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def reset(self) -> None:
+        """Age the sketch by halving every counter"""
+        self.rows = [row.translate(self._HALVE) for row in self.rows]
+        self.additions //= 2
+        self.resets += 1
+
+
+class TinyLFUAdmission:
+    """Admit a new key over an eviction victim only if it is seen more often.
+
+    Every cache lookup, hit or miss, is recorded. One-off keys therefore
+    carry a frequency of one and cannot push out entries that are looked up
+    repeatedly, while a key that keeps being requested is admitted once its
+    count overtakes the victim's.
+    """
+
+    def __init__(self, capacity: int):
+        self.sketch = FrequencySketch(capacity)
+        self.admitted = 0
+        self.rejected = 0
+
+    def record(self, key: str) -> None:
+        self.sketch.increment(key)
+
+    def admit(self, candidate: str, victim: str) -> bool:
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            self.admitted += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'policy': 'tinylfu',
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'sketch_width': self.sketch.width,
+            'sketch_resets': self.sketch.resets
+        }
@@ -0,0 +1,810 @@
+"""
+Enhancement Cache Backends
+Pluggable storage tiers behind PerformanceOptimizer's result cache
+"""
+
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.cache_admission import TinyLFUAdmission
+from src.utils.enhancement_cache import LRUTTLCache
+from src.utils.metrics import CACHE_EVICTIONS
+from src.utils.payload_codec import CachedResponse, PayloadCodec
+from src.utils.request_log import log_event
+
+try:
+    import redis
+except ImportError:  # Redis tier is optional
+    redis = None
+
+Tags = Tuple[str, ...]
+
+
+def remaining_ttl(value: bytes, ttl: float, now: float) -> float:
+    """Seconds of ``ttl`` that ``value`` has left, counted from its ``CachedResponse`` header.
+
+    Values without the header get the full ``ttl``.
+    """
+    stored_at = CachedResponse.stored_at_of(value)
+    return ttl if stored_at is None else ttl - max(0.0, now - stored_at)
+
+
+class CacheBackend(ABC):
+    """Interface implemented by every enhancement cache tier.
+
+    Values are opaque bytes (see ``CachedResponse``); tiers store and return
+    them unchanged. A tier's TTL counts from the ``stored_at`` in the value's
+    header rather than from the write, so copying an entry between tiers
+    (L2 promotion, snapshots) never extends its life.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, tags: Tags = ()) -> None:
+        """Store ``value``; ``tags`` label the entry for ``invalidate_tags``"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """Delete every entry carrying any of ``tags``; returns the deleted keys"""
+        return []
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Fetch several keys at once; missing keys are left out of the result"""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, items: Dict[str, bytes], tags: Optional[Dict[str, Tags]] = None) -> None:
+        tags = tags or {}
+        for key, value in items.items():
+            self.set(key, value, tags.get(key, ()))
+
+    def purge_expired(self) -> int:
+        """Drop locally held expired entries; remote tiers expire on their own"""
+        return 0
+
+    def clear(self) -> None:
+        """Drop every locally held entry; remote tiers are left alone"""
+
+    def size(self) -> int:
+        """Number of entries held locally (remote tiers report 0)"""
+        return 0
+
+    def hot_items(self, limit: int) -> List[Tuple[str, bytes, Tags]]:
+        """Most recently used local ``(key, value, tags)`` entries, hottest first"""
+        return []
+
+    def snapshot(self, limit: int) -> int:
+        """Persist the hottest local entries to a lower tier; returns the count"""
+        return 0
+
+    def close(self) -> None:
+        pass
+
+    def eviction_stats(self) -> Dict[str, int]:
+        """Local entries dropped to make room ('evicted') and for age ('expired')"""
+        return {'evicted': 0, 'expired': 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.name}
+
+
+class CacheStripe:
+    """One lock-protected partition of the in-process tier"""
+
+    __slots__ = ('cache', 'lock', 'raw_bytes', 'payload_bytes')
+
+    def __init__(self, cache: LRUTTLCache):
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.raw_bytes = 0
+        self.payload_bytes = 0
+
+
+class InProcessBackend(CacheBackend):
+    """Per-process LRU+TTL tier holding compressed payloads under a byte budget.
+
+    Keys are spread by hash over ``stripes`` independent LRU caches, each
+    with its own lock, its share of ``max_size`` and ``max_bytes`` and its
+    own admission filter, so concurrent requests rarely wait on each other
+    and maintenance only ever holds one stripe. Recency is tracked per
+    stripe. Values are deflated with the template dictionary on ``set``
+    and only inflated again on a hit; each entry is charged its payload,
+    its key and a fixed bookkeeping overhead against the byte budget.
+    ``admission='tinylfu'`` keeps one-off results from evicting hot ones.
+    ``local_ttl`` caps how long an entry stays here after being written,
+    however much of ``ttl`` it has left (used for the L1 of a shared tier).
+    """
+
+    name = 'memory'
+
+    # CacheEntry slots plus OrderedDict link, ~170 bytes on CPython 3.11, rounded up
+    ENTRY_OVERHEAD_BYTES = 200
+
+    # Smallest useful stripe; tiny caches use fewer stripes
+    MIN_STRIPE_SIZE = 64
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, max_bytes: Optional[int] = None,
+                 admission: Optional[str] = None, stripes: int = 16, local_ttl: Optional[float] = None):
+        stripes = max(1, min(stripes, max_size // self.MIN_STRIPE_SIZE))
+        stripe_size = -(-max_size // stripes)
+        stripe_bytes = -(-max_bytes // stripes) if max_bytes is not None else None
+
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.codec = PayloadCodec()
+        self.stripes = [
+            CacheStripe(LRUTTLCache(
+                max_size=stripe_size, ttl=ttl, max_bytes=stripe_bytes,
+                admission=TinyLFUAdmission(stripe_size) if admission == 'tinylfu' else None
+            ))
+            for _ in range(stripes)
+        ]
+
+    def _stripe(self, key: str) -> CacheStripe:
+        return self.stripes[hash(key) % len(self.stripes)]
+
+    def _entry_size(self, key: str, payload: bytes) -> int:
+        return sys.getsizeof(payload) + sys.getsizeof(key) + self.ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: str) -> Optional[bytes]:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.cache.get(key)
+            payload = entry.result if entry is not None else None
+        return self.codec.decompress(payload) if payload is not None else None
+
+    def set(self, key: str, value: bytes, tags: Tags = ()) -> None:
+        now = time.time()
+        ttl = remaining_ttl(value, self.ttl, now)
+        if self.local_ttl is not None:
+            ttl = min(ttl, self.local_ttl)
+        payload = self.codec.compress(value)
+        size = self._entry_size(key, payload)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            evicted = stripe.cache.evicted
+            stripe.cache.put(key, payload, now=now, tags=tags, size=size, ttl=ttl)
+            stripe.raw_bytes += len(value)
+            stripe.payload_bytes += len(payload)
+            evicted = stripe.cache.evicted - evicted
+        if evicted:
+            CACHE_EVICTIONS.inc(evicted)
+
+    def delete(self, key: str) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.cache.pop(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        tags = list(tags)
+        keys = []
+        for stripe in self.stripes:
+            with stripe.lock:
+                stripe_keys = stripe.cache.keys_with_tags(tags)
+                for key in stripe_keys:
+                    stripe.cache.pop(key)
+            keys.extend(stripe_keys)
+        return keys
+
+    def purge_expired(self) -> int:
+        removed = 0
+        for stripe in self.stripes:
+            with stripe.lock:
+                removed += stripe.cache.purge_expired()
+        return removed
+
+    def clear(self) -> None:
+        for stripe in self.stripes:
+            with stripe.lock:
+                stripe.cache.clear()
+
+    def size(self) -> int:
+        return sum(len(stripe.cache) for stripe in self.stripes)
+
+    def hot_items(self, limit: int) -> List[Tuple[str, bytes, Tags]]:
+        items = []
+        for stripe in self.stripes:
+            with stripe.lock:
+                items.extend(stripe.cache.most_recent(limit))
+        items.sort(key=lambda item: item[1].last_accessed, reverse=True)
+        return [(key, self.codec.decompress(entry.result), entry.tags) for key, entry in items[:limit]]
+
+    def eviction_stats(self) -> Dict[str, int]:
+        caches = [stripe.cache for stripe in self.stripes]
+        return {
+            'evicted': sum(cache.evicted for cache in caches),
+            'expired': sum(cache.expired for cache in caches)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Summed from the stripes without locking; counters may be a few operations behind"""
+        caches = [stripe.cache for stripe in self.stripes]
+        entries = sum(len(cache) for cache in caches)
+        resident = sum(cache.total_bytes for cache in caches)
+        raw_bytes = sum(stripe.raw_bytes for stripe in self.stripes)
+        payload_bytes = sum(stripe.payload_bytes for stripe in self.stripes)
+
+        admission = {'policy': 'lru'}
+        if caches[0].admission is not None:
+            admission = {'policy': 'tinylfu', 'admitted': 0, 'rejected': 0, 'sketch_resets': 0}
+            for cache in caches:
+                admission['admitted'] += cache.admission.admitted
+                admission['rejected'] += cache.admission.rejected
+                admission['sketch_resets'] += cache.admission.sketch.resets
+
+        return {
+            'backend': self.name,
+            'size': entries,
+            'max_size': self.max_size,
+            'stripes': len(self.stripes),
+            'resident_bytes': resident,
+            'max_bytes': self.max_bytes,
+            'bytes_per_entry': round(resident / entries) if entries else 0,
+            'compression_ratio': round(raw_bytes / payload_bytes, 2) if payload_bytes else 0.0,
+            **self.eviction_stats(),
+            'rejected': sum(cache.rejected for cache in caches),
+            'admission': admission
+        }
+
+
+class RedisBackend(CacheBackend):
+    """Shared tier speaking the Redis protocol, so every worker sees one cache.
+
+    Multi-key reads and writes go through a non-transactional pipeline (one
+    round trip). Connection failures never propagate to the request: the
+    tier is skipped for ``retry_interval`` seconds and treated as a miss.
+    Invalidations are published on ``channel`` so every worker can drop
+    its local copies (see ``subscribe_invalidations``).
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = 'prompto:enhance:',
+                 tag_prefix: str = 'prompto:enhance-tag:', channel: str = 'prompto:enhance-invalidate',
+                 socket_timeout: float = 0.25, retry_interval: float = 5.0):
+        if redis is None:
+            raise RuntimeError("redis package is not installed")
+
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+        self.url = url
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self.tag_prefix = tag_prefix
+        self.channel = channel
+        self.socket_timeout = socket_timeout
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        self.counters = defaultdict(int)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _available(self) -> bool:
+        return time.time() >= self._down_until
+
+    def _mark_down(self, error: Exception) -> None:
+        if self._available():
+            log_event('cache_backend_down', level='warning', backend=self.name,
+                      retry_seconds=self.retry_interval, error=str(error))
+        self._down_until = time.time() + self.retry_interval
+        self.counters['errors'] += 1
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        if not keys or not self._available():
+            return {}
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(self._key(key))
+            raw_values = pipe.execute()
+        except Exception as e:
+            self._mark_down(e)
+            return {}
+
+        found = {key: raw for key, raw in zip(keys, raw_values) if raw is not None}
+        self.counters['hits'] += len(found)
+        self.counters['misses'] += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: bytes, tags: Tags = ()) -> None:
+        self.set_many({key: value}, {key: tags})
+
+    def set_many(self, items: Dict[str, bytes], tags: Optional[Dict[str, Tags]] = None) -> None:
+        if not items or not self._available():
+            return
+
+        tags = tags or {}
+        now = time.time()
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                ttl = remaining_ttl(value, self.ttl, now)
+                if ttl <= 0:
+                    continue
+                pipe.set(self._key(key), value, px=max(1, int(ttl * 1000)))
+                # Tag sets index entries for invalidation; they expire with the entries
+                for tag in tags.get(key, ()):
+                    pipe.sadd(self.tag_prefix + tag, key)
+                    pipe.expire(self.tag_prefix + tag, self.ttl)
+            pipe.execute()
+            self.counters['stored'] += len(items)
+        except Exception as e:
+            self._mark_down(e)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = [self._key(key) for key in keys]
+        if not keys or not self._available():
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception as e:
+            self._mark_down(e)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        tags = list(tags)
+        tag_keys = [self.tag_prefix + tag for tag in tags]
+        if not tag_keys:
+            return []
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = set()
+            for tag_members in pipe.execute():
+                members.update(m.decode('utf-8') for m in tag_members)
+
+            keys = sorted(members)
+            pipe = self.client.pipeline(transaction=False)
+            if keys:
+                pipe.delete(*[self._key(key) for key in keys])
+            pipe.delete(*tag_keys)
+            pipe.publish(self.channel, json.dumps({'tags': tags, 'keys': keys}))
+            pipe.execute()
+            self.counters['published'] += 1
+            return keys
+        except Exception as e:
+            self._mark_down(e)
+            return []
+
+    def subscribe_invalidations(self, on_invalidate: Callable[[List[str], List[str]], None],
+                                on_subscribe: Callable[[], None]) -> threading.Thread:
+        """Call ``on_invalidate(tags, keys)`` for every invalidation any worker publishes.
+
+        Listens on a daemon thread with its own connection, since a blocking
+        read must not be cut off by the short command timeout. Messages sent
+        while it is disconnected are lost, so ``on_subscribe`` runs each time
+        the subscription is (re)established and should drop local copies.
+        """
+        def listen():
+            while True:
+                try:
+                    client = redis.Redis.from_url(self.url, socket_connect_timeout=self.socket_timeout,
+                                                  health_check_interval=30)
+                    pubsub = client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.channel)
+                    on_subscribe()
+                    for message in pubsub.listen():
+                        data = json.loads(message['data'])
+                        self.counters['received'] += 1
+                        on_invalidate(data['tags'], data['keys'])
+                except Exception as e:
+                    log_event('cache_invalidation_listener_down', level='warning', backend=self.name,
+                              retry_seconds=self.retry_interval, error=str(e))
+                time.sleep(self.retry_interval)
+
+        thread = threading.Thread(target=listen, name='cache-invalidations', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'available': self._available(),
+            'hits': self.counters['hits'],
+            'misses': self.counters['misses'],
+            'stored': self.counters['stored'],
+            'errors': self.counters['errors'],
+            'invalidations_published': self.counters['published'],
+            'invalidations_received': self.counters['received']
+        }
+
+
+class TieredBackend(CacheBackend):
+    """Small local L1 in front of a shared L2; L2 hits are copied into L1.
+
+    Entries promoted from L2 carry no tags in L1; ``invalidate_tags`` drops
+    them by deleting every key L2 reports as invalidated. Promoted and
+    snapshotted entries keep the time they have left (see ``remaining_ttl``).
+    """
+
+    name = 'tiered'
+
+    def __init__(self, l1: CacheBackend, l2: CacheBackend):
+        self.l1 = l1
+        self.l2 = l2
+        self.counters = defaultdict(int)
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.l1.get(key)
+        if value is not None:
+            self.counters['l1_hits'] += 1
+            return value
+
+        value = self.l2.get(key)
+        if value is not None:
+            self.counters['l2_hits'] += 1
+            self.l1.set(key, value)
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        found = self.l1.get_many(keys)
+        self.counters['l1_hits'] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_l2 = self.l2.get_many(missing)
+            self.counters['l2_hits'] += len(from_l2)
+            self.l1.set_many(from_l2)
+            found.update(from_l2)
+        return found
+
+    def set(self, key: str, value: bytes, tags: Tags = ()) -> None:
+        self.l1.set(key, value, tags)
+        self.l2.set(key, value, tags)
+
+    def set_many(self, items: Dict[str, bytes], tags: Optional[Dict[str, Tags]] = None) -> None:
+        self.l1.set_many(items, tags)
+        self.l2.set_many(items, tags)
+
+    def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        self.l2.delete(key)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self.l1.delete_many(keys)
+        self.l2.delete_many(keys)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        tags = list(tags)
+        removed = set(self.l2.invalidate_tags(tags))
+        removed.update(self.invalidate_local(tags, removed))
+        return sorted(removed)
+
+    def invalidate_local(self, tags: Iterable[str], keys: Iterable[str]) -> List[str]:
+        """Drop L1 copies of ``keys`` and of entries tagged with ``tags`` (e.g. invalidated by another worker)"""
+        self.l1.delete_many(keys)
+        return self.l1.invalidate_tags(tags)
+
+    def purge_expired(self) -> int:
+        return self.l1.purge_expired()
+
+    def clear(self) -> None:
+        self.l1.clear()
+
+    def size(self) -> int:
+        return self.l1.size()
+
+    def hot_items(self, limit: int) -> List[Tuple[str, bytes, Tags]]:
+        return self.l1.hot_items(limit)
+
+    def snapshot(self, limit: int) -> int:
+        """Flush the hot L1 set into L2 (e.g. on shutdown) so it survives a restart.
+
+        Returns the number of distinct entries flushed: a tiered L1 first
+        flushes the same hottest keys into its own L2, which are not counted twice.
+        """
+        self.l1.snapshot(limit)
+        hot = self.l1.hot_items(limit)
+        if hot:
+            self.l2.set_many(
+                {key: value for key, value, _ in hot},
+                {key: tags for key, _, tags in hot}
+            )
+        return len(hot)
+
+    def close(self) -> None:
+        self.l1.close()
+        self.l2.close()
+
+    def eviction_stats(self) -> Dict[str, int]:
+        return self.l1.eviction_stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'l1_hits': self.counters['l1_hits'],
+            'l2_hits': self.counters['l2_hits'],
+            'l1': self.l1.stats(),
+            'l2': self.l2.stats()
+        }
+
+
+class DiskBackend(CacheBackend):
+    """Persistent SQLite tier that survives process restarts.
+
+    The database is opened lazily on first use, so importing the app stays
+    cheap. Rows carry the entry's original store time and their last-access
+    time; once the table
+    grows past ``max_entries`` plus slack, the least recently accessed rows
+    are compacted away.
+    """
+
+    name = 'disk'
+
+    def __init__(self, path: str, ttl: float = 3600, max_entries: int = 100000,
+                 compact_slack: float = 0.1):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compact_slack = compact_slack
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes_since_compact = 0
+        self.counters = defaultdict(int)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS enhancement_cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'stored_at REAL NOT NULL, accessed_at REAL NOT NULL, '
+                "tags TEXT NOT NULL DEFAULT '')"
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_enhancement_cache_accessed '
+                'ON enhancement_cache (accessed_at)'
+            )
+            conn.commit()
+            self._conn = conn
+            self.counters['opened_at'] = int(time.time())
+        return self._conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                placeholders = ','.join('?' * len(keys))
+                rows = conn.execute(
+                    f'SELECT key, value, stored_at FROM enhancement_cache WHERE key IN ({placeholders})',
+                    keys
+                ).fetchall()
+
+                expired = [key for key, _, stored_at in rows if now - stored_at >= self.ttl]
+                for key, value, stored_at in rows:
+                    if now - stored_at < self.ttl:
+                        found[key] = value
+
+                if expired:
+                    conn.executemany('DELETE FROM enhancement_cache WHERE key = ?', [(k,) for k in expired])
+                if found:
+                    conn.executemany(
+                        'UPDATE enhancement_cache SET accessed_at = ? WHERE key = ?',
+                        [(now, key) for key in found]
+                    )
+                if expired or found:
+                    conn.commit()
+        except sqlite3.Error as e:
+            self.counters['errors'] += 1
+            log_event('cache_backend_error', level='error', backend=self.name, operation='read', error=str(e))
+            return {}
+
+        self.counters['hits'] += len(found)
+        self.counters['misses'] += len(keys) - len(found)
+        return found
+
+    @staticmethod
+    def _encode_tags(tags: Tags) -> str:
+        # '|a|b|' lets a substring search for '|tag|' match whole tags only
+        return '|' + '|'.join(tags) + '|' if tags else ''
+
+    def set(self, key: str, value: bytes, tags: Tags = ()) -> None:
+        self.set_many({key: value}, {key: tags})
+
+    def set_many(self, items: Dict[str, bytes], tags: Optional[Dict[str, Tags]] = None) -> None:
+        if not items:
+            return
+
+        tags = tags or {}
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            ttl = remaining_ttl(value, self.ttl, now)
+            if ttl > 0:
+                rows.append((key, value, now - (self.ttl - ttl), now, self._encode_tags(tags.get(key, ()))))
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                # Untagged writes (e.g. L1 entries promoted from another tier) keep existing tags
+                conn.executemany(
+                    'INSERT INTO enhancement_cache (key, value, stored_at, accessed_at, tags) '
+                    'VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET '
+                    'value = excluded.value, stored_at = excluded.stored_at, '
+                    'accessed_at = excluded.accessed_at, '
+                    "tags = CASE WHEN excluded.tags = '' THEN enhancement_cache.tags ELSE excluded.tags END",
+                    rows
+                )
+                conn.commit()
+                self.counters['stored'] += len(rows)
+                self._writes_since_compact += len(rows)
+                if self._writes_since_compact >= self.max_entries * self.compact_slack:
+                    self._compact(conn)
+        except sqlite3.Error as e:
+            self.counters['errors'] += 1
+            log_event('cache_backend_error', level='error', backend=self.name, operation='write', error=str(e))
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        """Trim the table back to ``max_entries``, dropping expired then least recently used rows"""
+        self._writes_since_compact = 0
+        removed = conn.execute(
+            'DELETE FROM enhancement_cache WHERE stored_at <= ?', (time.time() - self.ttl,)
+        ).rowcount
+
+        count = conn.execute('SELECT COUNT(*) FROM enhancement_cache').fetchone()[0]
+        if count > self.max_entries:
+            removed += conn.execute(
+                'DELETE FROM enhancement_cache WHERE key IN ('
+                'SELECT key FROM enhancement_cache ORDER BY accessed_at LIMIT ?)',
+                (count - self.max_entries,)
+            ).rowcount
+        conn.commit()
+        self.counters['compacted'] += removed
+        return removed
+
+    def compact(self) -> int:
+        with self._lock:
+            return self._compact(self._connection())
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.executemany('DELETE FROM enhancement_cache WHERE key = ?', [(key,) for key in keys])
+                conn.commit()
+        except sqlite3.Error as e:
+            self.counters['errors'] += 1
+            log_event('cache_backend_error', level='error', backend=self.name, operation='delete', error=str(e))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        tags = list(tags)
+        if not tags:
+            return []
+        clause = ' OR '.join(['instr(tags, ?) > 0'] * len(tags))
+        params = [f"|{tag}|" for tag in tags]
+        try:
+            with self._lock:
+                conn = self._connection()
+                keys = [row[0] for row in conn.execute(
+                    f'SELECT key FROM enhancement_cache WHERE {clause}', params
+                )]
+                conn.execute(f'DELETE FROM enhancement_cache WHERE {clause}', params)
+                conn.commit()
+                return keys
+        except sqlite3.Error as e:
+            self.counters['errors'] += 1
+            log_event('cache_backend_error', level='error', backend=self.name, operation='invalidate', error=str(e))
+            return []
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'path': self.path,
+            'loaded': self._conn is not None,
+            'hits': self.counters['hits'],
+            'misses': self.counters['misses'],
+            'stored': self.counters['stored'],
+            'compacted': self.counters['compacted'],
+            'errors': self.counters['errors']
+        }
+
+
+def create_cache_backend(max_size: int = 10000, ttl: float = 3600) -> CacheBackend:
+    """Build the cache tier selected by ``CACHE_BACKEND`` (memory, redis or tiered).
+
+    The in-process tier is bounded by ``CACHE_MAX_BYTES`` of compressed
+    payload (0 disables the budget), split over ``CACHE_STRIPES`` locks, and
+    admits new entries through the ``CACHE_ADMISSION`` policy (lru, the
+    default, or tinylfu). In tiered mode each worker's L1 holds entries for at most
+    ``CACHE_L1_TTL`` seconds and drops the ones any worker invalidates. When ``CACHE_DISK_PATH`` is set, the selected tier is placed in
+    front of a persistent SQLite tier so the cache survives restarts.
+    """
+    backend_name = os.getenv('CACHE_BACKEND', 'memory').lower()
+    max_bytes = int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024))) or None
+    admission = os.getenv('CACHE_ADMISSION', 'lru').lower()
+    stripes = int(os.getenv('CACHE_STRIPES', '16'))
+    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    disk_path = os.getenv('CACHE_DISK_PATH')
+
+    backend = None
+    if backend_name in ('redis', 'tiered'):
+        try:
+            shared = RedisBackend(redis_url, ttl=ttl)
+        except Exception as e:
+            log_event('cache_backend_down', level='warning', backend='redis', fallback='memory', error=str(e))
+        else:
+            if backend_name == 'redis':
+                backend = shared
+            else:
+                l1_size = int(os.getenv('CACHE_L1_SIZE', '1000'))
+                l1_ttl = float(os.getenv('CACHE_L1_TTL', '60'))
+                l1 = InProcessBackend(max_size=l1_size, ttl=ttl, max_bytes=max_bytes,
+                                      admission=admission, stripes=stripes, local_ttl=l1_ttl)
+                backend = TieredBackend(l1, shared)
+                shared.subscribe_invalidations(backend.invalidate_local, on_subscribe=l1.clear)
+
+    if backend is None:
+        backend = InProcessBackend(max_size=max_size, ttl=ttl, max_bytes=max_bytes,
+                                   admission=admission, stripes=stripes)
+
+    if disk_path:
+        max_entries = int(os.getenv('CACHE_DISK_MAX_ENTRIES', '100000'))
+        backend = TieredBackend(backend, DiskBackend(disk_path, ttl=ttl, max_entries=max_entries))
+
+    return backend
@@ -0,0 +1,200 @@
+"""
+Provider Circuit Breakers
+Per-provider closed/open/half-open breakers with timeouts adapted from rolling latency
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+from src.utils.latency_histogram import LatencyTracker
+from src.utils.metrics import PROVIDER_CIRCUIT_STATE, PROVIDER_CIRCUIT_TRANSITIONS
+from src.utils.striped_counters import StripedCounters
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Gauge values for PROVIDER_CIRCUIT_STATE
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit is open (retry in {retry_in:.1f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Failure tracking for one provider.
+
+    Closed: calls go through; ``failure_threshold`` consecutive failures
+    open the circuit. Open: every call is refused for ``open_seconds``.
+    Half-open: one trial call at a time is let through; a success closes
+    the circuit, a failure re-opens it for twice as long (up to
+    ``max_open_seconds``).
+    """
+
+    def __init__(self, provider: str, failure_threshold: int = 5, open_seconds: float = 30.0,
+                 max_open_seconds: float = 300.0):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = open_seconds
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trips = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        PROVIDER_CIRCUIT_STATE.labels(provider).set(STATE_CODES[CLOSED])
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        PROVIDER_CIRCUIT_STATE.labels(self.provider).set(STATE_CODES[state])
+        PROVIDER_CIRCUIT_TRANSITIONS.labels(self.provider, state).inc()
+
+    def retry_in(self, now: Optional[float] = None) -> float:
+        """Seconds until an open circuit lets a trial call through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_seconds - (now or time.monotonic()))
+
+    def available(self) -> bool:
+        """Whether a call would be attempted right now (without claiming the half-open trial)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.retry_in() == 0.0
+        return not self.trial_in_flight
+
+    def acquire(self) -> None:
+        """Admit one call or raise ``CircuitOpenError``"""
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            if self.state == OPEN:
+                retry_in = self.retry_in()
+                if retry_in > 0:
+                    raise CircuitOpenError(self.provider, retry_in)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.trial_in_flight:
+                    raise CircuitOpenError(self.provider, 0.0)
+                self.trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state == CLOSED and not self.consecutive_failures:
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.trial_in_flight = False
+                self.open_seconds = self.base_open_seconds
+                self._transition(CLOSED)
+
+    def release(self) -> None:
+        """Give back a half-open trial whose call was abandoned without a verdict"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.last_error = f"{type(error).__name__}: {error}"
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # The trial failed: back off harder before the next one
+                self.trial_in_flight = False
+                self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+            elif self.state == OPEN or self.consecutive_failures < self.failure_threshold:
+                return
+            self.trips += 1
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'open_seconds': self.open_seconds,
+            'retry_in_seconds': round(self.retry_in(), 2),
+            'trips': self.trips,
+            'last_error': self.last_error
+        }
+
+
+class ProviderBreakers:
+    """A circuit breaker and an adaptive timeout for each provider.
+
+    The timeout is ``multiplier`` x the provider's recent ``percentile``
+    latency from ``latency`` (successful calls only), clamped to
+    ``min_timeout``..``max_timeout``; ``max_timeout`` is used until
+    ``min_samples`` calls have been seen.
+    """
+
+    def __init__(self, latency: LatencyTracker, providers: Iterable[str] = ('openai', 'gemini'),
+                 failure_threshold: int = 5, open_seconds: float = 30.0, percentile: float = 99,
+                 multiplier: float = 1.5, min_timeout: float = 1.0, max_timeout: float = 6.0,
+                 min_samples: int = 20, window_seconds: int = 300):
+        self.latency = latency
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.window_seconds = window_seconds
+        self.breakers = {
+            provider: CircuitBreaker(provider, failure_threshold, open_seconds)
+            for provider in providers
+        }
+        self.counters = StripedCounters(['short_circuited', 'failures', 'timeouts'])
+
+    def available(self, provider: str) -> bool:
+        return self.breakers[provider].available()
+
+    def timeout(self, provider: str) -> float:
+        """Seconds to allow the next ``provider`` call"""
+        observed = self.latency.histogram(self.window_seconds, provider=provider)
+        if observed.count < self.min_samples:
+            return self.max_timeout
+        timeout = observed.percentile(self.percentile) / 1000 * self.multiplier
+        return round(min(self.max_timeout, max(self.min_timeout, timeout)), 3)
+
+    @contextmanager
+    def guard(self, provider: str):
+        """Refuse the call when the circuit is open; otherwise record how it went"""
+        breaker = self.breakers[provider]
+        try:
+            breaker.acquire()
+        except CircuitOpenError:
+            self.counters.incr('short_circuited')
+            raise
+        try:
+            yield
+        except Exception as e:
+            self.counters.incr('failures')
+            if 'timeout' in type(e).__name__.lower():
+                self.counters.incr('timeouts')
+            breaker.record_failure(e)
+            raise
+        except BaseException:
+            # e.g. a streamed call closed because the client went away
+            breaker.release()
+            raise
+        breaker.record_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters.snapshot(),
+            'providers': {
+                provider: {**breaker.snapshot(), 'timeout_seconds': self.timeout(provider)}
+                for provider, breaker in self.breakers.items()
+            }
+        }
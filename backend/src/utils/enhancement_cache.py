@@ -0,0 +1,206 @@
+"""
+Enhancement Result Cache
+Constant-time LRU cache with lazy TTL expiry and an optional byte budget for enhancement responses
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.cache_admission import TinyLFUAdmission
+
+
+class CacheEntry:
+    """Compact cache entry holding an enhancement result and its bookkeeping"""
+
+    __slots__ = ('result', 'timestamp', 'expires_at', 'last_accessed', 'access_count', 'tags', 'size')
+
+    def __init__(self, result: Any, timestamp: float, expires_at: float, tags: Tuple[str, ...] = (),
+                 size: int = 0):
+        self.result = result
+        self.timestamp = timestamp
+        self.expires_at = expires_at
+        self.last_accessed = timestamp
+        self.access_count = 1
+        self.tags = tags
+        self.size = size
+
+
+class LRUTTLCache:
+    """Bounded LRU cache with O(1) get, put and evict.
+
+    Entries live in an ``OrderedDict`` kept in recency order, so the least
+    recently used entry is always at the front. Expiry is lazy: an entry is
+    only checked against its expiry when it is looked up or when it reaches
+    the cold end of the queue. Entries live ``ttl`` seconds unless ``put``
+    is given a shorter remaining lifetime. The cache is not thread-safe; callers hold their
+    own lock around it.
+
+    When ``max_bytes`` is set, each entry carries the ``size`` its caller
+    accounted for it and eviction also keeps the summed sizes under the
+    budget. Entries larger than the whole budget are not stored.
+
+    With an ``admission`` policy, a new key that would force an eviction is
+    only inserted if the policy prefers it over the least recently used
+    entry; otherwise the cache is left untouched.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, max_bytes: Optional[int] = None,
+                 admission: Optional[TinyLFUAdmission] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.admission = admission
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self.total_bytes = 0
+        self.evicted = 0
+        self.expired = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[CacheEntry]:
+        """Return the live entry for ``key`` and mark it most recently used"""
+        if self.admission is not None:
+            self.admission.record(key)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        now = time.time() if now is None else now
+        if now >= entry.expires_at:
+            del self._entries[key]
+            self.total_bytes -= entry.size
+            self.expired += 1
+            return None
+
+        self._entries.move_to_end(key)
+        entry.last_accessed = now
+        entry.access_count += 1
+        return entry
+
+    def put(self, key: str, result: Any, now: Optional[float] = None,
+            tags: Tuple[str, ...] = (), size: int = 0, ttl: Optional[float] = None) -> Optional[CacheEntry]:
+        """Insert or replace ``key``, evicting least recently used entries until it fits.
+
+        ``ttl`` caps the entry's lifetime below the cache's own ``ttl``
+        (e.g. the time a copied entry has left); an entry with no time
+        left is not stored.
+        """
+        now = time.time() if now is None else now
+        expires_at = now + (self.ttl if ttl is None else min(ttl, self.ttl))
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            self.rejected += 1
+            return None
+
+        if expires_at <= now:
+            self.pop(key)
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.total_bytes += size - entry.size
+            entry.result = result
+            entry.timestamp = now
+            entry.expires_at = expires_at
+            entry.last_accessed = now
+            entry.tags = tags
+            entry.size = size
+            self._entries.move_to_end(key)
+            self._evict(now, exclude=key)
+            return entry
+
+        if self.admission is not None and not self._admit(key, size, now):
+            return None
+
+        while len(self._entries) >= self.max_size:
+            self._evict_one(now)
+
+        entry = CacheEntry(result, now, expires_at, tags, size)
+        self._entries[key] = entry
+        self.total_bytes += size
+        self._evict(now, exclude=key)
+        return entry
+
+    def _admit(self, key: str, size: int, now: float) -> bool:
+        """Ask the admission policy whether ``key`` may displace the coldest entry"""
+        full = len(self._entries) >= self.max_size
+        if self.max_bytes is not None:
+            full = full or self.total_bytes + size > self.max_bytes
+        if not full or not self._entries:
+            return True
+
+        victim_key, victim = next(iter(self._entries.items()))
+        if now >= victim.expires_at:
+            return True
+        return self.admission.admit(key, victim_key)
+
+    def _evict(self, now: float, exclude: str) -> None:
+        """Evict from the cold end until the byte budget holds, never touching ``exclude``"""
+        if self.max_bytes is None:
+            return
+        while self.total_bytes > self.max_bytes and next(iter(self._entries)) != exclude:
+            self._evict_one(now)
+
+    def _evict_one(self, now: float) -> None:
+        _, victim = self._entries.popitem(last=False)
+        self.total_bytes -= victim.size
+        if now >= victim.expires_at:
+            self.expired += 1
+        else:
+            self.evicted += 1
+
+    def pop(self, key: str) -> Optional[CacheEntry]:
+        """Remove ``key`` and return its entry, if present"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+        return entry
+
+    def purge_expired(self, limit: int = 1000, now: Optional[float] = None) -> int:
+        """Drop expired entries from the cold end of the queue.
+
+        Stops at the first live entry or after ``limit`` removals, so the cost
+        is bounded regardless of cache size.
+        """
+        now = time.time() if now is None else now
+        removed = 0
+
+        while self._entries and removed < limit:
+            key, entry = next(iter(self._entries.items()))
+            if now < entry.expires_at:
+                break
+            del self._entries[key]
+            self.total_bytes -= entry.size
+            removed += 1
+
+        self.expired += removed
+        return removed
+
+    def keys_with_tags(self, tags: Iterable[str]) -> List[str]:
+        """Keys carrying any of ``tags``. Scans every entry; meant for admin operations."""
+        wanted = set(tags)
+        return [key for key, entry in self._entries.items() if wanted.intersection(entry.tags)]
+
+    def most_recent(self, limit: int) -> List[Tuple[str, CacheEntry]]:
+        """Up to ``limit`` ``(key, entry)`` pairs, most recently used first"""
+        items = []
+        for key in reversed(self._entries):
+            if len(items) >= limit:
+                break
+            items.append((key, self._entries[key]))
+        return items
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
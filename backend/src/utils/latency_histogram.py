@@ -0,0 +1,193 @@
+"""
+Latency Histograms
+Fixed-memory log-bucketed response time tracking with rolling windows
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+# 128 linear sub-buckets per power of two: bucket bounds are within 0.8% of any value
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+# Values are tracked in microseconds and clamped to one hour
+MAX_VALUE_US = 3600 * 1000 * 1000
+
+LABEL_NAMES = ('endpoint', 'cache', 'method', 'provider')
+
+
+def bucket_index(value_us: int) -> int:
+    """HDR-style bucket: exact below 256us, then 128 sub-buckets per doubling"""
+    shift = value_us.bit_length() - (SUB_BUCKET_BITS + 1)
+    if shift <= 0:
+        return value_us
+    return (shift << SUB_BUCKET_BITS) + (value_us >> shift)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """Inclusive ``(low, high)`` microsecond range covered by a bucket"""
+    if index < 2 * SUB_BUCKET_COUNT:
+        return index, index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    top = index - (shift << SUB_BUCKET_BITS)
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LogHistogram:
+    """Sparse log-bucketed histogram of latencies in milliseconds"""
+
+    __slots__ = ('counts', 'count', 'total_us', 'max_us')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, value_ms: float) -> None:
+        value_us = min(MAX_VALUE_US, max(0, int(value_ms * 1000)))
+        index = bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: 'LogHistogram') -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, pct: float) -> float:
+        """Value at ``pct`` in milliseconds (bucket midpoint, never above the max seen)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) / 2, self.max_us) / 1000
+        return self.max_us / 1000
+
+    def count_above(self, threshold_ms: float) -> int:
+        threshold_us = threshold_ms * 1000
+        return sum(count for index, count in self.counts.items() if bucket_bounds(index)[0] > threshold_us)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50), 3),
+            'p90_ms': round(self.percentile(90), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'p999_ms': round(self.percentile(99.9), 3),
+            'max_ms': round(self.max_us / 1000, 3)
+        }
+
+
+class LatencyTracker:
+    """Rolling latency histograms keyed by endpoint, cache status, method and provider.
+
+    Time is cut into ``slice_seconds`` slices, each holding one histogram per
+    label combination; slices older than ``retention_seconds`` are dropped,
+    so memory is bounded by the slice count, the label combinations and the
+    bucket count. Each label keeps at most ``max_label_values`` distinct
+    values; further values are recorded as ``'other'``.
+    """
+
+    def __init__(self, slice_seconds: int = 10, retention_seconds: int = 3600,
+                 max_label_values: int = 32):
+        self.slice_seconds = slice_seconds
+        self.max_label_values = max_label_values
+        self._slices: 'deque[Tuple[int, Dict[Tuple[str, ...], LogHistogram]]]' = deque(
+            maxlen=retention_seconds // slice_seconds
+        )
+        self._label_values = {name: set() for name in LABEL_NAMES}
+        self._lock = threading.Lock()
+        self.total_count = 0
+
+    def _label(self, name: str, value: Optional[str]) -> str:
+        value = str(value) if value else 'none'
+        seen = self._label_values[name]
+        if value not in seen:
+            if len(seen) >= self.max_label_values:
+                return 'other'
+            seen.add(value)
+        return value
+
+    def record(self, value_ms: float, now: Optional[float] = None, **labels: Optional[str]) -> None:
+        now = time.time() if now is None else now
+        slice_start = int(now) - int(now) % self.slice_seconds
+
+        with self._lock:
+            key = tuple(self._label(name, labels.get(name)) for name in LABEL_NAMES)
+            # A thread that read the clock just before a slice boundary lands in the newest slice
+            if not self._slices or self._slices[-1][0] < slice_start:
+                self._slices.append((slice_start, {}))
+            histograms = self._slices[-1][1]
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = LogHistogram()
+            histogram.record(value_ms)
+            self.total_count += 1
+
+    def window(self, seconds: int, now: Optional[float] = None) -> Dict[Tuple[str, ...], LogHistogram]:
+        """Merged histograms per label combination over the last ``seconds``"""
+        now = time.time() if now is None else now
+        cutoff = now - seconds
+
+        merged: Dict[Tuple[str, ...], LogHistogram] = {}
+        with self._lock:
+            recent = [histograms for start, histograms in self._slices if start + self.slice_seconds > cutoff]
+            if recent:
+                self._merge_into(merged, recent.pop())
+
+        # Closed slices are never written again, so they are merged without the lock
+        for histograms in recent:
+            self._merge_into(merged, histograms)
+        return merged
+
+    @staticmethod
+    def _merge_into(merged: Dict[Tuple[str, ...], LogHistogram],
+                    histograms: Dict[Tuple[str, ...], LogHistogram]) -> None:
+        for key, histogram in histograms.items():
+            target = merged.get(key)
+            if target is None:
+                target = merged[key] = LogHistogram()
+            target.merge(histogram)
+
+    def histogram(self, seconds: int, now: Optional[float] = None, **labels: str) -> LogHistogram:
+        """One histogram over the last ``seconds`` for recordings matching every given label"""
+        positions = [(LABEL_NAMES.index(name), value) for name, value in labels.items()]
+        return self.combine(
+            histogram for key, histogram in self.window(seconds, now).items()
+            if all(key[position] == value for position, value in positions)
+        )
+
+    @staticmethod
+    def combine(histograms: Iterable[LogHistogram]) -> LogHistogram:
+        combined = LogHistogram()
+        for histogram in histograms:
+            combined.merge(histogram)
+        return combined
+
+    def summary(self, windows: Dict[str, int] = None, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Percentiles per window, overall and broken down by each label"""
+        windows = windows or {'1m': 60, '5m': 300, '1h': 3600}
+        report = {}
+        for name, seconds in windows.items():
+            merged = self.window(seconds, now)
+            section = {'overall': self.combine(merged.values()).summary()}
+            for position, label in enumerate(LABEL_NAMES):
+                groups: Dict[str, LogHistogram] = {}
+                for key, histogram in merged.items():
+                    groups.setdefault(key[position], LogHistogram()).merge(histogram)
+                section[f'by_{label}'] = {value: histogram.summary() for value, histogram in groups.items()}
+            report[name] = section
+        return report
@@ -0,0 +1,160 @@
+"""
+Prometheus Metrics
+Counters, gauges and histograms for the /metrics exposition endpoint
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+except ImportError:  # Metrics are optional; instrumentation becomes a no-op
+    Counter = Gauge = Histogram = None
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency buckets in seconds, from cache hits (sub-millisecond) to slow provider calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _NoopMetric:
+    """Stand-in accepting the metric API when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs) -> '_NoopMetric':
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _metric(factory, name: str, documentation: str, labelnames: Tuple[str, ...] = (), **kwargs):
+    if factory is None:
+        return _NoopMetric()
+    return factory(name, documentation, labelnames, **kwargs)
+
+
+def _ensure_multiprocess_dir() -> None:
+    """Create PROMETHEUS_MULTIPROC_DIR if it is missing; the metrics below open their files in it"""
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if Counter is None or not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        raise RuntimeError(f"PROMETHEUS_MULTIPROC_DIR={directory} is not a writable directory: {e}") from e
+
+
+_ensure_multiprocess_dir()
+
+# In multiprocess mode (PROMETHEUS_MULTIPROC_DIR set before start-up) every
+# worker writes these to its own mmap'd files; a scrape merges the files and
+# never touches request-path locks.
+CACHE_LOOKUPS = _metric(
+    Counter, 'prompto_cache_lookups_total',
+    'Enhancement cache lookups by result (hit, stale, similar, miss)', ('result',)
+)
+CACHE_STORES = _metric(Counter, 'prompto_cache_stores_total', 'Enhancement results written to the cache')
+CACHE_EVICTIONS = _metric(
+    Counter, 'prompto_cache_evictions_total', 'Entries evicted from the in-process cache tier'
+)
+CACHE_REFRESHES = _metric(
+    Counter, 'prompto_cache_refreshes_total', 'Background refreshes of stale entries by outcome', ('outcome',)
+)
+CACHE_ENTRIES = _metric(
+    Gauge, 'prompto_cache_entries', 'Entries held in the in-process cache tier', multiprocess_mode='livesum'
+)
+PROVIDER_REQUESTS = _metric(
+    Counter, 'prompto_provider_requests_total', 'AI provider calls by outcome', ('provider', 'outcome')
+)
+PROVIDER_LATENCY = _metric(
+    Histogram, 'prompto_provider_request_duration_seconds', 'AI provider call latency',
+    ('provider',), buckets=LATENCY_BUCKETS
+)
+PROVIDER_HEDGES = _metric(
+    Counter, 'prompto_provider_hedged_calls_total',
+    'Auto-mode provider calls by hedging outcome (primary_wins, hedge_wins, both_failed)', ('outcome',)
+)
+PROVIDER_TOKENS = _metric(
+    Counter, 'prompto_provider_tokens_total',
+    'Tokens sent to (input) and received from (output) providers, by whether the call was served or lost a hedge race',
+    ('provider', 'direction', 'call')
+)
+PROVIDER_CIRCUIT_STATE = _metric(
+    Gauge, 'prompto_provider_circuit_state', 'Provider circuit breaker state (0 closed, 1 half-open, 2 open)',
+    ('provider',), multiprocess_mode='max'
+)
+PROVIDER_CIRCUIT_TRANSITIONS = _metric(
+    Counter, 'prompto_provider_circuit_transitions_total', 'Provider circuit breaker state changes',
+    ('provider', 'state')
+)
+PROVIDER_POOL_IN_FLIGHT = _metric(
+    Gauge, 'prompto_provider_pool_in_flight', 'Provider calls currently holding a pooled client',
+    ('provider',), multiprocess_mode='livesum'
+)
+PROVIDER_POOL_CONNECTIONS = _metric(
+    Gauge, 'prompto_provider_pool_connections', 'Connections in the provider HTTP pool by state',
+    ('provider', 'state'), multiprocess_mode='livesum'
+)
+DB_WRITE_LATENCY = _metric(
+    Histogram, 'prompto_db_write_duration_seconds', 'Prompt and analytics commit latency',
+    ('outcome',), buckets=LATENCY_BUCKETS
+)
+REQUEST_LATENCY = _metric(
+    Histogram, 'prompto_http_request_duration_seconds', 'HTTP request latency by endpoint',
+    ('endpoint', 'status'), buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = _metric(
+    Histogram, 'prompto_enhance_stage_duration_seconds', 'Time spent in each enhance pipeline stage',
+    ('stage',), buckets=LATENCY_BUCKETS
+)
+LOG_RECORDS_DROPPED = _metric(
+    Counter, 'prompto_log_records_dropped_total', 'Structured log records dropped because the log queue was full'
+)
+ENHANCE_LATENCY = _metric(
+    Histogram, 'prompto_enhance_duration_seconds', 'Enhance request latency by cache result',
+    ('cache',), buckets=LATENCY_BUCKETS
+)
+
+
+@contextmanager
+def track_provider_call(provider: str):
+    """Time a provider call; an exception counts as a failure and is re-raised"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        PROVIDER_REQUESTS.labels(provider, 'failure').inc()
+        raise
+    else:
+        PROVIDER_REQUESTS.labels(provider, 'success').inc()
+    finally:
+        PROVIDER_LATENCY.labels(provider).observe(time.perf_counter() - start)
+
+
+def metrics_available() -> bool:
+    return Counter is not None
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type, merged across workers in multiprocess mode"""
+    if not metrics_available():
+        return b'', CONTENT_TYPE_LATEST
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
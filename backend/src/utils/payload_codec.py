@@ -0,0 +1,119 @@
+"""
+Cache Payload Codec
+Pre-encoded, compressed storage for cached enhancement responses
+"""
+
+import json
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from src.utils.prompt_techniques import PromptTechniques
+
+# Deflate keeps at most a 32KB window of preset dictionary
+MAX_DICTIONARY_BYTES = 32 * 1024
+
+
+@lru_cache(maxsize=1)
+def build_template_dictionary() -> bytes:
+    """Preset deflate dictionary made of the technique block templates.
+
+    Enhanced prompts are largely these blocks verbatim, so seeding the
+    compressor with them lets even a single short payload back-reference
+    whole sections instead of spelling them out.
+    """
+    blocks = []
+    for builders in PromptTechniques.TEMPLATE_BUILDERS.values():
+        for builder in builders:
+            if builder.startswith('_add_') and builder != '_add_role_prompting':
+                blocks.append(getattr(PromptTechniques, builder)())
+    blocks.append(PromptTechniques._add_role_prompting('technical'))
+    blocks.append(PromptTechniques._assemble_enhanced_prompt('', [], [], []))
+    # Common JSON field names of cached response payloads, most frequent last
+    blocks.append('"enhanced_prompt":"success":true,"provider_used":"method":"llm",'
+                  '"techniques_used":"techniques_applied":"effectiveness_score":'
+                  '"enhancement_ratio":"original_length":"enhanced_length":"cached":false')
+
+    dictionary = '\n\n'.join(blocks).encode('utf-8')
+    return dictionary[-MAX_DICTIONARY_BYTES:]
+
+
+class PayloadCodec:
+    """Raw deflate with a template-trained preset dictionary"""
+
+    def __init__(self, level: int = 6):
+        self.level = level
+        self.dictionary = build_template_dictionary()
+
+    def compress(self, raw: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, self.dictionary)
+        return compressor.compress(raw) + compressor.flush()
+
+    def decompress(self, payload: bytes) -> bytes:
+        decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        return decompressor.decompress(payload) + decompressor.flush()
+
+
+class CachedResponse:
+    """A cached enhancement result held as its encoded JSON response body.
+
+    Cache tiers store it as ``b'<stored_at>\\n<body>'``. A hit is answered
+    with ``render``, which splices the per-request fields onto the stored
+    body instead of decoding and re-encoding the whole payload.
+    """
+
+    __slots__ = ('stored_at', 'body')
+
+    # Per-request fields; never stored, always supplied by ``render``
+    VOLATILE_FIELDS = frozenset({
+        'cached', 'cache_match', 'coalesced', 'prompt_id', 'response_time_ms', 'enhancement_time_ms'
+    })
+
+    def __init__(self, stored_at: float, body: bytes):
+        self.stored_at = stored_at
+        self.body = body
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any], stored_at: float) -> 'CachedResponse':
+        stable = {key: value for key, value in result.items() if key not in cls.VOLATILE_FIELDS}
+        return cls(stored_at, json.dumps(stable, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, data: Any) -> Optional['CachedResponse']:
+        """Parse a stored entry; entries in any other format read as missing"""
+        if not isinstance(data, bytes):
+            return None
+        header, _, body = data.partition(b'\n')
+        if not body.startswith(b'{'):
+            return None
+        try:
+            return cls(float(header), body)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def stored_at_of(data: bytes) -> Optional[float]:
+        """The ``stored_at`` header of a stored entry, without touching its body"""
+        header, newline, _ = data[:32].partition(b'\n')
+        if not newline:
+            return None
+        try:
+            return float(header)
+        except ValueError:
+            return None
+
+    def to_bytes(self) -> bytes:
+        return repr(self.stored_at).encode('ascii') + b'\n' + self.body
+
+    @property
+    def result(self) -> Dict[str, Any]:
+        return json.loads(self.body)
+
+    def render(self, **fields: Any) -> bytes:
+        """The stored body with ``fields`` appended as extra top-level keys"""
+        if not fields:
+            return self.body
+        extra = json.dumps(fields, separators=(',', ':')).encode('utf-8')
+        if self.body == b'{}':
+            return extra
+        return self.body[:-1] + b',' + extra[1:]
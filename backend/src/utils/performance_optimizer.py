@@ -4,35 +4,70 @@ Lightning-fast prompt enhancement with intelligent caching and async processing
 """
 
 import asyncio
+import atexit
+import os
 import time
 import hashlib
-import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from functools import lru_cache
 import threading
 from collections import defaultdict, deque
-import psutil
-import gc
+
+from src.utils.cache_backends import create_cache_backend
+from src.utils.latency_histogram import LatencyTracker
+from src.utils.metrics import CACHE_ENTRIES, CACHE_LOOKUPS, CACHE_REFRESHES, CACHE_STORES
+from src.utils.payload_codec import CachedResponse
+from src.utils.prompt_techniques import PromptTechniques
+from src.utils.prompt_fingerprint import NearDuplicateIndex
+from src.utils.request_log import log_event
+from src.utils.single_flight import SingleFlight
+from src.utils.striped_counters import StripedCounters
+from src.utils.system_sampler import SystemSampler
 
 class PerformanceOptimizer:
     """Production-grade performance optimization for prompt enhancement"""
     
     def __init__(self):
-        self.cache = {}
-        self.cache_stats = defaultdict(int)
-        self.cache_lock = threading.RLock()
+        # Hot-path counters never share a global lock; stats reads take no lock at all
+        self.cache_stats = StripedCounters([
+            'hits', 'misses', 'hit_time', 'stale_hits', 'stored', 'invalidated',
+            'refreshes', 'refresh_errors', 'coalesce_timeouts'
+        ])
+        self.refresh_lock = threading.Lock()
         self.request_queue = deque()
         self.batch_processor = None
         self.thread_pool = ThreadPoolExecutor(max_workers=8)
-        self.performance_metrics = defaultdict(list)
-        self.system_monitor = SystemMonitor()
+        self.latency = LatencyTracker()
+        self.single_flight = SingleFlight()
+        self._refreshing = set()
         
         # Advanced caching configuration
-        self.cache_ttl = 3600  # 1 hour
+        # Entries older than the soft TTL are served as stale while a background
+        # refresh runs; entries older than the hard TTL are gone.
+        self.cache_ttl = int(os.getenv('CACHE_SOFT_TTL', '3600'))  # 1 hour
+        self.cache_hard_ttl = max(self.cache_ttl, int(os.getenv('CACHE_HARD_TTL', '21600')))  # 6 hours
         self.max_cache_size = 10000
         self.cache_cleanup_interval = 300  # 5 minutes
+        self.cache = create_cache_backend(max_size=self.max_cache_size, ttl=self.cache_hard_ttl)
+        self.snapshot_size = int(os.getenv('CACHE_SNAPSHOT_SIZE', '5000'))
+        self.system_sampler = SystemSampler(
+            cache_size=self.cache.size,
+            interval=float(os.getenv('SYSTEM_SAMPLE_INTERVAL', '1'))
+        )
+        
+        # Optional second-chance lookup for near-duplicate prompts
+        self.near_duplicates = None
+        if os.getenv('CACHE_NEAR_DUPLICATES', 'false').lower() in ('1', 'true', 'yes'):
+            self.near_duplicates = NearDuplicateIndex(
+                max_entries=self.max_cache_size,
+                threshold=float(os.getenv('CACHE_SIMILARITY_THRESHOLD', '0.9')),
+                shingle_size=int(os.getenv('CACHE_SIMILARITY_SHINGLE_SIZE', '2'))
+            )
+        
+        # Identical concurrent misses wait this long for the in-flight call
+        self.coalesce_timeout = 15.0
         
         # Performance thresholds
         self.slow_response_threshold = 2000  # 2 seconds
@@ -40,177 +75,299 @@ class PerformanceOptimizer:
         
         # Start background tasks
         self._start_cache_cleanup()
-        self._start_performance_monitoring()
+        self.system_sampler.start()
+        atexit.register(self.snapshot_cache)
     
     def get_cache_key(self, prompt: str, techniques: List[str], method: str = 'llm') -> str:
-        """Generate optimized cache key with techniques fingerprinting"""
-        # Create a stable hash from techniques
-        techniques_hash = hashlib.md5(','.join(sorted(techniques)).encode()).hexdigest()[:8]
-        prompt_hash = hashlib.md5(prompt.encode()).hexdigest()[:12]
+        """Generate cache key from the prompt and the versioned technique templates.
+        
+        Editing a technique's template changes its content hash and therefore
+        every key that includes it, so stale enhancements are never served.
+        """
+        templates_hash = PromptTechniques.get_templates_fingerprint(tuple(sorted(set(techniques))))
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
         
-        return f"{method}:{prompt_hash}:{techniques_hash}"
+        return f"{method}:{prompt_hash}:{templates_hash}"
     
-    def get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Retrieve cached result with performance tracking"""
+    @staticmethod
+    def get_trace_key(cache_key: str) -> str:
+        """Short one-way digest of a cache key for request logs, so logs can be replayed as cache traces"""
+        return hashlib.blake2b(cache_key.encode(), digest_size=8).hexdigest()
+    
+    def get_cache_tags(self, result: Dict[str, Any]) -> Tuple[str, ...]:
+        """Labels used to invalidate an entry by method, provider, technique or preset"""
+        techniques = result.get('techniques_used', [])
+        tags = [f"method:{result.get('method')}", f"provider:{result.get('provider_used')}"]
+        tags.extend(f"technique:{technique}" for technique in techniques)
+        
+        technique_set = set(techniques)
+        tags.extend(
+            f"preset:{name}" for name, preset in PromptTechniques.PRESETS.items()
+            if set(preset) == technique_set
+        )
+        return tuple(tags)
+    
+    def lookup_cached_result(self, cache_key: str) -> Tuple[Optional[CachedResponse], bool]:
+        """Retrieve cached response as ``(response, is_stale)``.
+        
+        The response keeps its encoded JSON body, so callers can serve it
+        with ``render`` without re-serializing. A stale response is past the
+        soft TTL but still within the hard TTL; callers serve it and trigger
+        ``schedule_refresh``. Entries past the hard TTL read as misses.
+        """
         start_time = time.time()
         
-        with self.cache_lock:
-            if cache_key in self.cache:
-                cached_data = self.cache[cache_key]
-                
-                # Check if cache entry is still valid
-                if time.time() - cached_data['timestamp'] < self.cache_ttl:
-                    self.cache_stats['hits'] += 1
-                    self.cache_stats['hit_time'] += (time.time() - start_time) * 1000
-                    
-                    # Move to front for LRU behavior
-                    cached_data['last_accessed'] = time.time()
-                    
-                    return cached_data['result']
-                else:
-                    # Expired, remove entry
-                    del self.cache[cache_key]
-                    self.cache_stats['expired'] += 1
-        
-        self.cache_stats['misses'] += 1
-        return None
+        entry = self._live_entry(self.cache.get(cache_key), start_time)
+        
+        if entry is None:
+            self.cache_stats.incr('misses')
+            CACHE_LOOKUPS.labels('miss').inc()
+            return None, False
+        
+        self.cache_stats.incr('hits')
+        self.cache_stats.incr('hit_time', (time.time() - start_time) * 1000)
+        is_stale = start_time - entry.stored_at >= self.cache_ttl
+        if is_stale:
+            self.cache_stats.incr('stale_hits')
+        CACHE_LOOKUPS.labels('stale' if is_stale else 'hit').inc()
+        return entry, is_stale
+    
+    def _live_entry(self, raw: Optional[bytes], now: float) -> Optional[CachedResponse]:
+        """Parse a stored entry, dropping it if it has outlived the hard TTL in any tier"""
+        entry = CachedResponse.from_bytes(raw)
+        if entry is not None and now - entry.stored_at >= self.cache_hard_ttl:
+            return None
+        return entry
+    
+    def get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve cached result (fresh or stale) with performance tracking"""
+        entry = self.lookup_cached_result(cache_key)[0]
+        return entry.result if entry is not None else None
+    
+    def get_cached_results(self, cache_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Retrieve several cached results in one backend round trip"""
+        found = {}
+        now = time.time()
+        for key, raw in self.cache.get_many(cache_keys).items():
+            entry = self._live_entry(raw, now)
+            if entry is not None:
+                found[key] = entry.result
+        
+        self.cache_stats.incr('hits', len(found))
+        self.cache_stats.incr('misses', len(cache_keys) - len(found))
+        return found
     
     def cache_result(self, cache_key: str, result: Dict[str, Any]) -> None:
-        """Cache result with intelligent memory management"""
-        with self.cache_lock:
-            # Cleanup if cache is getting too large
-            if len(self.cache) >= self.max_cache_size:
-                self._cleanup_old_entries()
-            
-            self.cache[cache_key] = {
-                'result': result,
-                'timestamp': time.time(),
-                'last_accessed': time.time(),
-                'access_count': 1
-            }
-            
-            self.cache_stats['stored'] += 1
+        """Cache result as its encoded response body; the LRU entry is evicted in constant time when full"""
+        entry = CachedResponse.from_result(result, time.time())
+        self.cache.set(cache_key, entry.to_bytes(), self.get_cache_tags(result))
+        self.cache_stats.incr('stored')
+        CACHE_STORES.inc()
+        CACHE_ENTRIES.set(self.cache.size())
     
-    def _cleanup_old_entries(self) -> None:
-        """Remove least recently used cache entries"""
-        if len(self.cache) < self.max_cache_size * 0.8:
-            return
-        
-        # Sort by last accessed time and remove oldest 20%
-        entries_to_remove = int(len(self.cache) * 0.2)
-        sorted_entries = sorted(
-            self.cache.items(),
-            key=lambda x: x[1]['last_accessed']
+    def cache_results(self, results: Dict[str, Dict[str, Any]]) -> None:
+        """Cache several results in one backend round trip"""
+        now = time.time()
+        self.cache.set_many(
+            {key: CachedResponse.from_result(result, now).to_bytes() for key, result in results.items()},
+            {key: self.get_cache_tags(result) for key, result in results.items()}
+        )
+        self.cache_stats.incr('stored', len(results))
+        CACHE_STORES.inc(len(results))
+        CACHE_ENTRIES.set(self.cache.size())
+    
+    def invalidate_cache(self, techniques: List[str] = (), presets: List[str] = (),
+                         providers: List[str] = (), methods: List[str] = ()) -> List[str]:
+        """Drop cached entries matching any of the given techniques, presets, providers or methods.
+        
+        Returns the invalidated keys. With a shared tier the invalidation is
+        also published to every other worker, which drops its L1 copies.
+        """
+        tags = (
+            [f"technique:{t}" for t in techniques] + [f"preset:{p}" for p in presets] +
+            [f"provider:{p}" for p in providers] + [f"method:{m}" for m in methods]
         )
+        removed = self.cache.invalidate_tags(tags)
+        self.cache_stats.incr('invalidated', len(removed))
+        return removed
+    
+    def _similarity_namespace(self, techniques: List[str], method: str) -> str:
+        return f"{method}:{PromptTechniques.get_templates_fingerprint(tuple(sorted(set(techniques))))}"
+    
+    def index_prompt(self, cache_key: str, prompt: str, techniques: List[str], method: str) -> None:
+        """Make a freshly cached prompt findable by near-duplicate lookups"""
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(cache_key, prompt, self._similarity_namespace(techniques, method))
+    
+    def lookup_near_duplicate(self, prompt: str, techniques: List[str], method: str) -> Tuple[Optional[CachedResponse], Optional[str]]:
+        """Second-chance lookup after an exact miss: ``(response, match_type)``.
         
-        for cache_key, _ in sorted_entries[:entries_to_remove]:
-            del self.cache[cache_key]
+        Tries the canonical form first, then MinHash neighbours. Only fresh
+        entries are reused; stale ones are left to the normal miss path.
+        """
+        if self.near_duplicates is None:
+            return None, None
         
-        self.cache_stats['cleaned'] += entries_to_remove
+        match = self.near_duplicates.find(prompt, self._similarity_namespace(techniques, method))
+        if match is None:
+            return None, None
+        
+        cache_key, match_type = match
+        entry = CachedResponse.from_bytes(self.cache.get(cache_key))
+        if entry is None:
+            self.near_duplicates.discard(cache_key)
+            return None, None
+        if time.time() - entry.stored_at >= self.cache_ttl:
+            return None, None
+        # Counted in addition to the exact-key miss that preceded it
+        CACHE_LOOKUPS.labels('similar').inc()
+        return entry, match_type
+    
+    def schedule_refresh(self, cache_key: str, compute) -> bool:
+        """Recompute a stale entry on the thread pool, at most once per key at a time.
+        
+        ``compute`` must store its own result (as ``run_enhancement`` does).
+        Returns False if a refresh for this key is already running.
+        """
+        with self.refresh_lock:
+            if cache_key in self._refreshing:
+                return False
+            self._refreshing.add(cache_key)
+        self.cache_stats.incr('refreshes')
+        
+        def refresh():
+            try:
+                compute()
+                CACHE_REFRESHES.labels('success').inc()
+            except Exception as e:
+                self.cache_stats.incr('refresh_errors')
+                CACHE_REFRESHES.labels('error').inc()
+                log_event('cache_refresh_failed', level='error', cache_key=cache_key, error=str(e))
+            finally:
+                with self.refresh_lock:
+                    self._refreshing.discard(cache_key)
+        
+        self.thread_pool.submit(refresh)
+        return True
+    
+    def run_coalesced(self, cache_key: str, compute) -> Tuple[Dict[str, Any], bool]:
+        """Run ``compute`` once per cache key across concurrent identical requests.
+        
+        Returns ``(result, coalesced)``. A waiter whose leader takes longer
+        than ``coalesce_timeout`` computes the result itself instead.
+        """
+        try:
+            return self.single_flight.do(cache_key, compute, timeout=self.coalesce_timeout)
+        except FuturesTimeoutError:
+            self.cache_stats.incr('coalesce_timeouts')
+            return compute(), False
+    
+    def snapshot_cache(self) -> int:
+        """Persist the hot in-process entries to the disk tier (runs at shutdown)"""
+        try:
+            written = self.cache.snapshot(self.snapshot_size)
+            self.cache.close()
+            return written
+        except Exception as e:
+            log_event('cache_snapshot_failed', level='error', error=str(e))
+            return 0
     
     def _start_cache_cleanup(self) -> None:
-        """Start background cache cleanup task"""
+        """Start background cache cleanup task.
+        
+        Purging walks the stripes one at a time with a bounded batch each, so
+        readers wait at most for one stripe's batch. There is no forced
+        ``gc.collect()``: a full collection pauses every thread, and evicted
+        entries are already freed by reference counting.
+        """
         def cleanup_worker():
             while True:
                 time.sleep(self.cache_cleanup_interval)
-                with self.cache_lock:
-                    self._cleanup_old_entries()
-                    gc.collect()  # Force garbage collection
+                self.cache.purge_expired()
         
         cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
         cleanup_thread.start()
     
-    def _start_performance_monitoring(self) -> None:
-        """Start performance monitoring background task"""
-        def monitor_worker():
-            while True:
-                time.sleep(60)  # Check every minute
-                self._collect_performance_metrics()
-        
-        monitor_thread = threading.Thread(target=monitor_worker, daemon=True)
-        monitor_thread.start()
-    
-    def _collect_performance_metrics(self) -> None:
-        """Collect system and application performance metrics"""
-        metrics = {
-            'timestamp': time.time(),
-            'cache_size': len(self.cache),
-            'cache_hit_rate': self._calculate_hit_rate(),
-            'memory_usage': self.system_monitor.get_memory_usage(),
-            'cpu_usage': self.system_monitor.get_cpu_usage(),
-            'response_times': list(self.performance_metrics['response_times'][-100:])  # Last 100
-        }
-        
-        self.performance_metrics['system'].append(metrics)
-        
-        # Keep only last hour of metrics
-        cutoff_time = time.time() - 3600
-        self.performance_metrics['system'] = [
-            m for m in self.performance_metrics['system']
-            if m['timestamp'] > cutoff_time
-        ]
-    
     def _calculate_hit_rate(self) -> float:
         """Calculate cache hit rate percentage"""
         hits = self.cache_stats['hits']
         total = hits + self.cache_stats['misses']
         return (hits / total * 100) if total > 0 else 0.0
     
-    def record_response_time(self, response_time_ms: int) -> None:
-        """Record response time for performance analysis"""
-        self.performance_metrics['response_times'].append({
-            'timestamp': time.time(),
-            'response_time': response_time_ms
-        })
+    def record_response_time(self, response_time_ms: float, endpoint: Optional[str] = None,
+                             cache: Optional[str] = None, method: Optional[str] = None,
+                             provider: Optional[str] = None) -> None:
+        """Record response time in the rolling latency histograms"""
+        self.latency.record(response_time_ms, endpoint=endpoint, cache=cache, method=method, provider=provider)
         
         # Alert on slow responses
         if response_time_ms > self.critical_response_threshold:
-            print(f"🚨 CRITICAL: Response time {response_time_ms}ms exceeds threshold")
+            log_event('slow_response', level='error', duration_ms=round(response_time_ms, 1),
+                      threshold_ms=self.critical_response_threshold, endpoint=endpoint)
         elif response_time_ms > self.slow_response_threshold:
-            print(f"⚠️ WARNING: Slow response time {response_time_ms}ms")
+            log_event('slow_response', level='warning', duration_ms=round(response_time_ms, 1),
+                      threshold_ms=self.slow_response_threshold, endpoint=endpoint)
     
     def get_performance_stats(self) -> Dict[str, Any]:
-        """Get comprehensive performance statistics"""
-        with self.cache_lock:
-            recent_times = [
-                m['response_time'] for m in self.performance_metrics['response_times'][-50:]
-            ]
-            
-            avg_response_time = sum(recent_times) / len(recent_times) if recent_times else 0
-            
-            return {
-                'cache': {
-                    'size': len(self.cache),
-                    'hit_rate': round(self._calculate_hit_rate(), 2),
-                    'hits': self.cache_stats['hits'],
-                    'misses': self.cache_stats['misses'],
-                    'stored': self.cache_stats['stored'],
-                    'cleaned': self.cache_stats['cleaned'],
-                    'expired': self.cache_stats['expired']
-                },
-                'performance': {
-                    'avg_response_time_ms': round(avg_response_time, 2),
-                    'total_requests': len(self.performance_metrics['response_times']),
-                    'slow_requests': len([
-                        t for t in recent_times 
-                        if t > self.slow_response_threshold
-                    ]),
-                    'critical_requests': len([
-                        t for t in recent_times 
-                        if t > self.critical_response_threshold
-                    ])
-                },
-                'system': {
-                    'memory_usage_mb': self.system_monitor.get_memory_usage(),
-                    'cpu_usage_percent': self.system_monitor.get_cpu_usage(),
-                    'active_threads': threading.active_count()
-                }
+        """Get comprehensive performance statistics.
+        
+        Reads counter snapshots and the latest background system sample
+        without taking any lock or calling psutil, so polling this never
+        stalls request threads.
+        """
+        counters = self.cache_stats.snapshot()
+        evictions = self.cache.eviction_stats()
+        latency = self.latency.summary()
+        recent = self.latency.combine(self.latency.window(300).values())
+        system = self.system_sampler.latest
+        
+        return {
+            'cache': {
+                'size': self.cache.size(),
+                'hit_rate': round(self._calculate_hit_rate(), 2),
+                'hits': counters['hits'],
+                'misses': counters['misses'],
+                'stored': counters['stored'],
+                'stale_hits': counters['stale_hits'],
+                'refreshes': counters['refreshes'],
+                'refresh_errors': counters['refresh_errors'],
+                'invalidated': counters['invalidated'],
+                # Baseline fields: entries dropped for space and for age
+                'cleaned': evictions['evicted'],
+                'expired': evictions['expired'],
+                'soft_ttl_seconds': self.cache_ttl,
+                'hard_ttl_seconds': self.cache_hard_ttl,
+                'backend': self.cache.stats()
+            },
+            'near_duplicates': self.near_duplicates.get_stats() if self.near_duplicates else {'enabled': False},
+            'coalescing': {
+                'leaders': self.single_flight.stats['leaders'],
+                'coalesced': self.single_flight.stats['coalesced'],
+                'errors': self.single_flight.stats['errors'],
+                'timeouts': counters['coalesce_timeouts'],
+                'in_flight': self.single_flight.in_flight()
+            },
+            'performance': {
+                'avg_response_time_ms': latency['5m']['overall']['mean_ms'],
+                'total_requests': self.latency.total_count,
+                'slow_requests': recent.count_above(self.slow_response_threshold),
+                'critical_requests': recent.count_above(self.critical_response_threshold),
+                'latency': latency
+            },
+            'system': {
+                'memory_usage_mb': round(system['rss_mb'], 2),
+                'cpu_usage_percent': round(system['cpu_percent'], 2),
+                'active_threads': threading.active_count(),
+                'open_connections': system['connections'],
+                'gc_collections': [system['gc_gen0'], system['gc_gen1'], system['gc_gen2']],
+                'sampled_at': system['timestamp']
             }
+        }
     
     @lru_cache(maxsize=128)
     def get_technique_fingerprint(self, techniques_tuple: Tuple[str, ...]) -> str:
         """Generate cached fingerprint for technique combinations"""
-        return hashlib.md5(','.join(sorted(techniques_tuple)).encode()).hexdigest()[:8]
+        return hashlib.sha256(','.join(sorted(techniques_tuple)).encode()).hexdigest()
     
     async def process_enhancement_async(self, enhancement_func, *args, **kwargs) -> Dict[str, Any]:
         """Process enhancement asynchronously for better performance"""
@@ -228,55 +385,17 @@ class PerformanceOptimizer:
         return optimized_prompt, optimized_techniques
 
 
-class SystemMonitor:
-    """System resource monitoring for performance optimization"""
-    
-    def __init__(self):
-        self.process = psutil.Process()
-    
-    def get_memory_usage(self) -> float:
-        """Get current memory usage in MB"""
-        try:
-            return round(self.process.memory_info().rss / 1024 / 1024, 2)
-        except:
-            return 0.0
-    
-    def get_cpu_usage(self) -> float:
-        """Get current CPU usage percentage"""
-        try:
-            return round(self.process.cpu_percent(), 2)
-        except:
-            return 0.0
-    
-    def get_system_health(self) -> Dict[str, Any]:
-        """Get comprehensive system health metrics"""
-        try:
-            memory_info = self.process.memory_info()
-            cpu_times = self.process.cpu_times()
-            
-            return {
-                'memory': {
-                    'rss_mb': round(memory_info.rss / 1024 / 1024, 2),
-                    'vms_mb': round(memory_info.vms / 1024 / 1024, 2),
-                    'percent': round(self.process.memory_percent(), 2)
-                },
-                'cpu': {
-                    'percent': round(self.process.cpu_percent(), 2),
-                    'user_time': round(cpu_times.user, 2),
-                    'system_time': round(cpu_times.system, 2)
-                },
-                'threads': self.process.num_threads(),
-                'connections': len(self.process.connections()),
-                'uptime_seconds': round(time.time() - self.process.create_time(), 2)
-            }
-        except Exception as e:
-            return {'error': str(e)}
-
-
 # Global optimizer instance
 performance_optimizer = PerformanceOptimizer()
 
 
+# Stand-ins for the prompt and the blocks rendered per call (prompt-dependent role,
+# time-dependent clockwork context) in a technique plan's template
+PLAN_SENTINEL = '\x00prompt\x00'
+ROLE_SENTINEL = '\x00role\x00'
+CLOCK_SENTINEL = '\x00clock\x00'
+
+
 class FastPromptProcessor:
     """Ultra-fast prompt processing with advanced optimizations"""
     
@@ -303,26 +422,60 @@ class FastPromptProcessor:
         return compiled_patterns
     
     @staticmethod
-    def batch_process_techniques(prompts_and_techniques: List[Tuple[str, List[str]]]) -> List[str]:
-        """Process multiple prompts in batch for efficiency"""
-        results = []
+    @lru_cache(maxsize=256)
+    def compile_technique_plan(techniques: Tuple[str, ...], method: str = 'llm') -> Callable[[str], str]:
+        """One reusable function applying ``techniques`` to any prompt.
+        
+        The assembled template is rendered once around a sentinel prompt and
+        each prompt is spliced into it. Blocks that must not be cached in the
+        plan are rendered as markers and filled in on every call: role
+        prompting depends on the prompt, the clockwork context on the current
+        time. The regex-based compression method applies the techniques per
+        prompt.
+        """
+        enabled = list(techniques)
+        if method == 'compression':
+            return lambda prompt: PromptTechniques.apply_techniques(prompt, enabled, method)
         
-        # Group by similar technique sets for batch optimization
+        role_inputs = []
+        
+        class PlanTechniques(PromptTechniques):
+            @classmethod
+            def _add_role_prompting(cls, prompt: str) -> str:
+                role_inputs.append(prompt.split(PLAN_SENTINEL))
+                return ROLE_SENTINEL
+            
+            @classmethod
+            def _add_clockwork_context(cls) -> str:
+                return CLOCK_SENTINEL
+        
+        template = PlanTechniques.apply_techniques(PLAN_SENTINEL, enabled, method)
+        segments = re.split(f'({PLAN_SENTINEL}|{ROLE_SENTINEL}|{CLOCK_SENTINEL})', template)
+        
+        fills: Dict[str, Callable[[str], str]] = {PLAN_SENTINEL: lambda prompt: prompt}
+        if role_inputs:
+            role_input = role_inputs[0]
+            fills[ROLE_SENTINEL] = lambda prompt: PromptTechniques._add_role_prompting(prompt.join(role_input))
+        if CLOCK_SENTINEL in segments:
+            fills[CLOCK_SENTINEL] = lambda prompt: PromptTechniques._add_clockwork_context()
+        
+        def plan(prompt: str) -> str:
+            return ''.join(fills[segment](prompt) if segment in fills else segment for segment in segments)
+        return plan
+    
+    @staticmethod
+    def batch_process_techniques(prompts_and_techniques: List[Tuple[str, List[str]]], method: str = 'llm') -> List[str]:
+        """Apply techniques to many prompts, compiling one plan per distinct technique set"""
+        results: List[Optional[str]] = [None] * len(prompts_and_techniques)
+        
+        # Group by technique set (application order does not depend on list order)
         technique_groups = defaultdict(list)
         for i, (prompt, techniques) in enumerate(prompts_and_techniques):
-            tech_key = ','.join(sorted(techniques))
-            technique_groups[tech_key].append((i, prompt))
+            technique_groups[tuple(sorted(techniques))].append((i, prompt))
         
-        # Process each group efficiently
-        for tech_key, prompt_items in technique_groups.items():
-            techniques = tech_key.split(',') if tech_key else []
-            compiled_patterns = FastPromptProcessor.precompile_techniques(techniques)
-            
+        for techniques, prompt_items in technique_groups.items():
+            plan = FastPromptProcessor.compile_technique_plan(techniques, method)
             for original_index, prompt in prompt_items:
-                # Fast processing logic here
-                processed = prompt  # Placeholder for actual processing
-                results.append((original_index, processed))
+                results[original_index] = plan(prompt)
         
-        # Return results in original order
-        results.sort(key=lambda x: x[0])
-        return [result[1] for result in results] 
\ No newline at end of file
+        return results
@@ -0,0 +1,243 @@
+"""
+Near-Duplicate Prompt Fingerprinting
+Canonical forms and MinHash locality-sensitive index for second-chance cache lookups
+"""
+
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from src.utils.prompt_techniques import PromptTechniques
+
+# Words that change tone but not the task
+FILLER_WORDS = {
+    'please', 'pls', 'plz', 'kindly', 'just', 'thanks', 'thank', 'thx', 'really',
+    'basically', 'actually', 'simply', 'hey', 'hi', 'hello'
+}
+
+# Words that flip what a prompt asks for; 't' is the tail of "don't" once tokenized
+NEGATIONS = {
+    'no', 'not', 'never', 'none', 'nobody', 'nothing', 'nowhere', 'neither', 'nor', 'without',
+    'except', 'excluding', 'exclude', 'cannot', 'cant', 'dont', 'doesnt', 'didnt', 'isnt', 'arent',
+    'wasnt', 'werent', 'wont', 'shouldnt', 'wouldnt', 'couldnt', 't'
+}
+
+# Sentence punctuation and quotes; '3.5', '10:30' and operators such as '+' or '-' are kept
+_SENTENCE_PUNCTUATION = re.compile(r"[.,;:!?]+(?=\s|$)|[\"\u201c\u201d]")
+
+# Words, numbers and single symbols, so 'a+b' and 'a-b' stay distinct
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def canonicalize(prompt: str) -> str:
+    """Reduce a prompt to the form the compression techniques would produce.
+
+    Applies the compression patterns, lowercases, strips sentence punctuation
+    and drops filler words, so prompts differing only in casing, trailing
+    punctuation or politeness share one canonical form. Digits and operators
+    are kept as tokens of their own.
+    """
+    compressed = PromptTechniques._apply_compression_techniques(prompt, ['compression'])
+    tokens = _TOKEN.findall(_SENTENCE_PUNCTUATION.sub(' ', compressed.lower()))
+    return ' '.join(token for token in tokens if token not in FILLER_WORDS)
+
+
+def shingles(tokens: Sequence[str], size: int = 2) -> frozenset:
+    """Ordered word ``size``-grams, so reordered prompts do not look alike"""
+    if len(tokens) <= size:
+        return frozenset([' '.join(tokens)]) if tokens else frozenset()
+    return frozenset(' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+
+def ordered_similarity(a: Sequence[str], b: Sequence[str]) -> float:
+    """Share of tokens two sequences have in common, in order (0..1)"""
+    if not a and not b:
+        return 1.0
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def changed_tokens(a: Sequence[str], b: Sequence[str]) -> Set[str]:
+    """Tokens inserted, deleted or replaced between two token sequences"""
+    changed = set()
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag != 'equal':
+            changed.update(a[i1:i2])
+            changed.update(b[j1:j2])
+    return changed
+
+
+def changes_meaning(changed: Set[str]) -> bool:
+    """Whether a token difference adds or drops a negation or changes a number"""
+    return any(token in NEGATIONS or any(char.isdigit() for char in token) for token in changed)
+
+
+def jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures over shingle sets using universal hash permutations"""
+
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, tokens: Set[str]) -> Tuple[int, ...]:
+        if not tokens:
+            return tuple([0] * self.num_perm)
+        hashes = [
+            int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+            for token in tokens
+        ]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self.permutations
+        )
+
+
+class NearDuplicateIndex:
+    """Bounded index from canonical prompts and MinHash bands to cache keys.
+
+    Lookups are scoped by namespace (method plus technique templates), so a
+    near-duplicate only matches results produced by the same technique set.
+    Prompts are compared as sets of ordered word ``shingle_size``-grams.
+    Signatures are split into ``bands`` bands of ``rows`` rows; prompts whose
+    shingle sets have Jaccard similarity s collide in some band with
+    probability 1 - (1 - s^rows)^bands. A colliding candidate is served only
+    if both its exact shingle Jaccard and its in-order token overlap (which
+    also bounds the length difference) reach ``threshold``; the others are
+    counted as false positives and rejected. Overlap alone cannot tell
+    "including X" from "not including X" in a long prompt, so a candidate
+    whose differing tokens include a negation or a number is rejected too.
+    """
+
+    def __init__(self, max_entries: int = 10000, threshold: float = 0.9,
+                 bands: int = 8, rows: int = 4, shingle_size: int = 2):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=bands * rows)
+
+        self._entries: 'OrderedDict[str, Tuple[str, str, frozenset, Tuple[int, ...]]]' = OrderedDict()
+        self._canonical: Dict[Tuple[str, str], str] = {}
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.stats = defaultdict(int)
+
+    def _band_keys(self, namespace: str, signature: Tuple[int, ...]) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        return [
+            (namespace, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def add(self, cache_key: str, prompt: str, namespace: str) -> None:
+        canonical = canonicalize(prompt)
+        tokens = shingles(canonical.split(), self.shingle_size)
+        signature = self.hasher.signature(tokens)
+
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+            self._entries[cache_key] = (namespace, canonical, tokens, signature)
+            self._canonical[(namespace, canonical)] = cache_key
+            for band_key in self._band_keys(namespace, signature):
+                self._buckets[band_key].add(cache_key)
+
+    def _remove(self, cache_key: str) -> None:
+        namespace, canonical, _, signature = self._entries.pop(cache_key)
+        if self._canonical.get((namespace, canonical)) == cache_key:
+            del self._canonical[(namespace, canonical)]
+        for band_key in self._band_keys(namespace, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def discard(self, cache_key: str) -> None:
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+
+    def find(self, prompt: str, namespace: str) -> Optional[Tuple[str, str]]:
+        """Return ``(cache_key, match_type)`` for the closest indexed prompt, if any.
+
+        ``match_type`` is ``'canonical'`` for an identical canonical form and
+        ``'similar'`` for a verified MinHash neighbour.
+        """
+        canonical = canonicalize(prompt)
+
+        with self._lock:
+            self.stats['lookups'] += 1
+            cache_key = self._canonical.get((namespace, canonical))
+            if cache_key is not None:
+                self._entries.move_to_end(cache_key)
+                self.stats['canonical_hits'] += 1
+                return cache_key, 'canonical'
+
+        words = canonical.split()
+        tokens = shingles(words, self.shingle_size)
+        signature = self.hasher.signature(tokens)
+
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(namespace, signature):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best = None
+            for candidate in candidates:
+                _, candidate_canonical, candidate_tokens, _ = self._entries[candidate]
+                candidate_words = candidate_canonical.split()
+                similarity = jaccard_similarity(tokens, candidate_tokens)
+                if similarity < self.threshold or \
+                        ordered_similarity(words, candidate_words) < self.threshold:
+                    self.stats['false_positives'] += 1
+                    continue
+                if changes_meaning(changed_tokens(words, candidate_words)):
+                    self.stats['meaning_changes'] += 1
+                    continue
+                if best is None or similarity > best[0]:
+                    best = (similarity, candidate)
+
+            if best is None:
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(best[1])
+            self.stats['similar_hits'] += 1
+            return best[1], 'similar'
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.stats['lookups']
+        hits = self.stats['canonical_hits'] + self.stats['similar_hits']
+        return {
+            'size': len(self._entries),
+            'lookups': lookups,
+            'canonical_hits': self.stats['canonical_hits'],
+            'similar_hits': self.stats['similar_hits'],
+            'false_positives': self.stats['false_positives'],
+            'meaning_changes': self.stats['meaning_changes'],
+            'hit_rate': round(hits / lookups * 100, 2) if lookups else 0.0,
+            'threshold': self.threshold,
+            'shingle_size': self.shingle_size
+        }
@@ -3,10 +3,13 @@ Advanced Prompt Engineering Techniques System
 State-of-the-art implementation of 25+ prompt enhancement strategies
 """
 
+import hashlib
 import json
 import random
 import re
 from datetime import datetime
+from functools import lru_cache
+from types import CodeType
 from typing import Dict, List, Any, Optional
 
 class PromptTechniques:
@@ -174,6 +177,33 @@ class PromptTechniques:
         'research': ['tree_of_thought', 'program_aided', 'iterative_decomposition', 'multimodal_cot']
     }
 
+    # Template builders behind each technique; their code is hashed into the
+    # cache key so editing a template retires the entries it produced.
+    TEMPLATE_BUILDERS = {
+        'zero_shot_cot': ['_add_zero_shot_cot'],
+        'few_shot_cot': ['_add_few_shot_examples'],
+        'self_consistency': ['_add_self_consistency'],
+        'tree_of_thought': ['_add_tree_of_thought'],
+        'reflection': ['_add_reflection_loops'],
+        'program_aided': ['_add_program_aided_reasoning'],
+        'chain_verification': ['_add_chain_verification'],
+        'compression': ['_apply_compression_techniques'],
+        'role_prompting': ['_add_role_prompting'],
+        'clockwork': ['_add_clockwork_context'],
+        'xml_schema': ['_wrap_xml_schema'],
+        'rubric_critique': ['_add_rubric_critique'],
+        'contrastive': ['_add_contrastive_examples'],
+        'negative_prompts': ['_add_negative_constraints'],
+        'triple_prime': ['_add_triple_prime'],
+        'iterative_decomposition': ['_add_iterative_decomposition'],
+        'voice_anchor': ['_add_voice_anchor'],
+        'ethical_constraints': ['_add_ethical_constraints'],
+        'meta_prompts': ['_add_meta_prompt_improvement']
+    }
+    
+    # Shared by every technique set
+    BASE_TEMPLATE_BUILDERS = ['apply_techniques', '_assemble_enhanced_prompt']
+
     @classmethod
     def get_default_techniques(cls) -> List[str]:
         """Get default enabled techniques"""
@@ -504,6 +534,27 @@ Provide a comprehensive, well-structured response that fully addresses the reque
         
         return '\n\n'.join(sections)
     
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_template_version(cls, technique: str) -> str:
+        """Content hash of a technique's template code and metadata"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(cls.TECHNIQUES.get(technique, {}), sort_keys=True).encode())
+        for builder in cls.TEMPLATE_BUILDERS.get(technique, []):
+            digest.update(_code_fingerprint(getattr(cls, builder).__func__.__code__))
+        return digest.hexdigest()
+    
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def get_templates_fingerprint(cls, techniques: tuple) -> str:
+        """Combined hash of the base assembly template and each technique's version"""
+        digest = hashlib.sha256()
+        for builder in cls.BASE_TEMPLATE_BUILDERS:
+            digest.update(_code_fingerprint(getattr(cls, builder).__func__.__code__))
+        for technique in sorted(techniques):
+            digest.update(f"{technique}={cls.get_template_version(technique)};".encode())
+        return digest.hexdigest()
+    
     @classmethod
     def get_technique_info(cls) -> Dict[str, Any]:
         """Get complete technique metadata for frontend"""
@@ -511,4 +562,15 @@ Provide a comprehensive, well-structured response that fully addresses the reque
             'techniques': cls.TECHNIQUES,
             'presets': cls.PRESETS,
             'categories': list(set(t['category'] for t in cls.TECHNIQUES.values()))
-        } 
\ No newline at end of file
+        }
+
+
+def _code_fingerprint(code: CodeType) -> bytes:
+    """Deterministic digest of a function's bytecode and constants (template strings)"""
+    digest = hashlib.sha256(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            digest.update(_code_fingerprint(const))
+        else:
+            digest.update(repr(const).encode())
+    return digest.digest()
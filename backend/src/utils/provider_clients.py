@@ -0,0 +1,218 @@
+"""
+Provider Client Registry
+Long-lived AI provider clients sharing a keep-alive connection pool per process
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.utils.metrics import PROVIDER_POOL_CONNECTIONS, PROVIDER_POOL_IN_FLIGHT
+from src.utils.request_log import log_event
+
+try:
+    from openai import OpenAI
+except ImportError:  # OpenAI support is optional
+    OpenAI = None
+
+try:
+    import google.generativeai as genai
+except ImportError:  # Gemini support is optional
+    genai = None
+
+PLACEHOLDER_KEYS = {'your-openai-api-key-here', 'your-gemini-api-key-here'}
+
+
+API_KEY_ENV = {'openai': 'OPENAI_API_KEY', 'gemini': 'GEMINI_API_KEY'}
+
+
+def _api_key(name: str) -> Optional[str]:
+    key = os.getenv(name)
+    return key if key and key not in PLACEHOLDER_KEYS else None
+
+
+class ProviderClients:
+    """Creates each provider client once per process and hands it out for every call.
+
+    The OpenAI client runs on one ``httpx.Client`` whose pool keeps up to
+    ``max_keepalive`` idle connections open for ``keepalive_expiry``
+    seconds, so consecutive requests skip TCP and TLS setup. The Gemini
+    model object is built once with the shared generation config. Clients
+    are rebuilt after a fork so gunicorn workers never share sockets.
+
+    With ``mock_url`` set, both clients talk to that stand-in server
+    (mock_llm_server.py) instead, and no real API keys are needed.
+    """
+
+    def __init__(self, max_connections: int = 20, max_keepalive: int = 10,
+                 keepalive_expiry: float = 30.0, timeout: float = 8.0, max_retries: int = 0,
+                 mock_url: Optional[str] = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout
+        # Failures fall through to hedging, the circuit breakers and the technique
+        # fallback, so SDK retries would only multiply the time spent on a bad provider
+        self.max_retries = max_retries
+        self.mock_url = mock_url.rstrip('/') if mock_url else None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._clients: Dict[str, Any] = {}
+        self._http_client: Optional[httpx.Client] = None
+        self._in_flight = {'openai': 0, 'gemini': 0}
+        self._pool_introspection = True
+
+    def _reset_after_fork(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._clients = {}
+            self._http_client = None
+
+    def api_key(self, provider: str) -> Optional[str]:
+        """The provider's API key ('mock' against the mock server), or None when not configured"""
+        key = _api_key(API_KEY_ENV[provider])
+        return key or ('mock' if self.mock_url else None)
+
+    def configured(self, provider: str) -> bool:
+        return self.api_key(provider) is not None
+
+    def openai(self):
+        """Shared OpenAI client, or None when the SDK or API key is missing"""
+        client = self._clients.get('openai')
+        if client is not None and self._pid == os.getpid():
+            return client
+        with self._lock:
+            self._reset_after_fork()
+            if 'openai' not in self._clients:
+                api_key = self.api_key('openai')
+                if OpenAI is None or not api_key:
+                    return None
+                self._http_client = httpx.Client(limits=self.limits, timeout=self.timeout)
+                self._clients['openai'] = OpenAI(
+                    api_key=api_key,
+                    base_url=f"{self.mock_url}/v1" if self.mock_url else os.getenv('OPENAI_BASE_URL') or None,
+                    http_client=self._http_client,
+                    timeout=self.timeout,
+                    max_retries=self.max_retries
+                )
+            return self._clients['openai']
+
+    def gemini(self):
+        """Shared Gemini model, or None when the SDK or API key is missing"""
+        model = self._clients.get('gemini')
+        if model is not None and self._pid == os.getpid():
+            return model
+        with self._lock:
+            self._reset_after_fork()
+            if 'gemini' not in self._clients:
+                api_key = self.api_key('gemini')
+                if genai is None or not api_key:
+                    return None
+                if self.mock_url:
+                    # The REST transport honours a scheme in api_endpoint, so plain http works
+                    genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': self.mock_url})
+                else:
+                    genai.configure(api_key=api_key)
+                generation_config = genai.types.GenerationConfig(
+                    max_output_tokens=600,  # Reduced for faster responses
+                    temperature=0.5,  # More consistent results
+                    top_p=0.8,
+                    top_k=20  # Reduced for faster generation
+                )
+                self._clients['gemini'] = genai.GenerativeModel('gemini-pro', generation_config=generation_config)
+            return self._clients['gemini']
+
+    @contextmanager
+    def lease(self, provider: str):
+        """Count a call as in flight on ``provider``'s pool for utilization metrics"""
+        with self._lock:
+            self._in_flight[provider] += 1
+        PROVIDER_POOL_IN_FLIGHT.labels(provider).inc()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[provider] -= 1
+            PROVIDER_POOL_IN_FLIGHT.labels(provider).dec()
+            if provider == 'openai':
+                self._pool_connections()
+
+    def prewarm(self, connections: int = 2) -> int:
+        """Open ``connections`` keep-alive connections to the OpenAI API in the background.
+
+        Each warm-up is a ``GET /models`` (free, authenticated), run
+        concurrently so the pool ends up holding that many idle
+        connections. Returns the number of warm-ups started.
+        """
+        client = self.openai()
+        if client is None or connections <= 0:
+            return 0
+
+        def warm():
+            try:
+                client.models.list()
+            except Exception as e:
+                log_event('provider_prewarm_failed', level='warning', provider='openai', error=str(e))
+
+        for _ in range(connections):
+            threading.Thread(target=warm, daemon=True, name='provider-prewarm').start()
+        return connections
+
+    def prewarm_from_env(self) -> int:
+        """``prewarm`` with ``PROVIDER_PREWARM_CONNECTIONS``; called by servers at start-up, never on import"""
+        try:
+            return self.prewarm(int(os.getenv('PROVIDER_PREWARM_CONNECTIONS', '2')))
+        except Exception as e:
+            log_event('provider_prewarm_failed', level='warning', provider='openai', error=str(e))
+            return 0
+
+    def _pool_connections(self) -> Optional[Dict[str, int]]:
+        """Open and idle connections in the OpenAI pool, mirrored to the pool gauges"""
+        http_client = self._http_client
+        if http_client is None or not self._pool_introspection:
+            return None
+        # httpx/httpcore publish no pool counters; their private connection list
+        # may change between releases, so any surprise disables the gauges
+        pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+        try:
+            connections = list(getattr(pool, 'connections'))
+            idle = sum(1 for connection in connections if connection.is_idle())
+        except (AttributeError, TypeError) as e:
+            self._pool_introspection = False
+            log_event('provider_pool_stats_unavailable', level='warning',
+                      httpx_version=httpx.__version__, error=str(e))
+            return None
+        PROVIDER_POOL_CONNECTIONS.labels('openai', 'open').set(len(connections))
+        PROVIDER_POOL_CONNECTIONS.labels('openai', 'idle').set(idle)
+        return {'open': len(connections), 'idle': idle}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Open, idle and in-flight counts for the OpenAI connection pool"""
+        stats = {
+            'max_connections': self.limits.max_connections,
+            'max_keepalive_connections': self.limits.max_keepalive_connections,
+            'keepalive_expiry_seconds': self.limits.keepalive_expiry,
+            'in_flight': dict(self._in_flight),
+            'mock_url': self.mock_url,
+            'clients': sorted(self._clients)
+        }
+        connections = self._pool_connections()
+        if connections is not None:
+            stats['openai_connections'] = connections
+        in_flight = self._in_flight['openai']
+        stats['utilization'] = round(in_flight / self.limits.max_connections, 3) if self.limits.max_connections else 0.0
+        return stats
+
+
+provider_clients = ProviderClients(
+    max_connections=int(os.getenv('PROVIDER_POOL_MAX_CONNECTIONS', '20')),
+    max_keepalive=int(os.getenv('PROVIDER_POOL_MAX_KEEPALIVE', '10')),
+    keepalive_expiry=float(os.getenv('PROVIDER_POOL_KEEPALIVE_EXPIRY', '30')),
+    max_retries=int(os.getenv('PROVIDER_MAX_RETRIES', '0')),
+    mock_url=os.getenv('MOCK_LLM_URL') or None
+)
@@ -0,0 +1,139 @@
+"""
+Hedged Provider Requests
+Race a backup provider against a slow primary, delayed by the primary's observed p90
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.utils.latency_histogram import LatencyTracker
+from src.utils.metrics import PROVIDER_HEDGES
+from src.utils.striped_counters import StripedCounters
+
+ProviderCall = Tuple[str, Callable[[], Any]]
+
+
+class ProviderHedger:
+    """Issues a hedge request when the primary provider is slower than usual.
+
+    Every provider call is timed into rolling per-provider histograms. A
+    hedged call starts the primary; if it has not answered within the
+    primary's recent ``percentile`` latency (clamped to ``min_delay_ms``..
+    ``max_delay_ms``, ``default_delay_ms`` until ``min_samples`` calls have
+    been seen), the secondary is started too and the first success wins.
+    A losing call that has not started yet is cancelled; one already in
+    flight cannot be interrupted, so it runs to its own timeout and its
+    result is discarded (counted as extra spend, and passed to ``on_loser``
+    if it succeeds so its cost can be billed).
+    """
+
+    def __init__(self, enabled: bool = False, max_workers: int = 16, percentile: float = 90,
+                 min_delay_ms: float = 50, max_delay_ms: float = 3000, default_delay_ms: float = 1000,
+                 min_samples: int = 20, window_seconds: int = 300):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.default_delay_ms = default_delay_ms
+        self.min_samples = min_samples
+        self.window_seconds = window_seconds
+        self.latency = LatencyTracker(slice_seconds=10, retention_seconds=window_seconds)
+        self.counters = StripedCounters([
+            'calls', 'hedged', 'primary_wins', 'hedge_wins', 'both_failed',
+            'losers_cancelled', 'losers_completed'
+        ])
+        self.wins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='provider-hedge')
+
+    @contextmanager
+    def timed(self, provider: str):
+        """Record a provider call's latency (successful calls only) for hedge delays"""
+        start = time.perf_counter()
+        yield
+        self.latency.record((time.perf_counter() - start) * 1000, provider=provider)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on ``provider`` before hedging"""
+        observed = self.latency.histogram(self.window_seconds, provider=provider)
+        if observed.count < self.min_samples:
+            delay_ms = self.default_delay_ms
+        else:
+            delay_ms = observed.percentile(self.percentile)
+        return min(self.max_delay_ms, max(self.min_delay_ms, delay_ms)) / 1000
+
+    def call(self, primary: ProviderCall, secondary: ProviderCall,
+             on_loser: Optional[Callable[[str, Any], None]] = None) -> Tuple[Any, str, bool]:
+        """Run ``primary``, hedging with ``secondary`` when it is slow.
+
+        Returns ``(result, winning provider, hedged)``; raises the primary's
+        error when both providers fail. ``on_loser(provider, result)`` is
+        called from the pool when an abandoned call completes successfully.
+        """
+        self.counters.incr('calls')
+        primary_name, primary_fn = primary
+        secondary_name, secondary_fn = secondary
+
+        primary_future = self._executor.submit(primary_fn)
+        done, _ = wait([primary_future], timeout=self.hedge_delay(primary_name))
+        if done and primary_future.exception() is None:
+            self._record_win(primary_name, 'primary_wins')
+            return primary_future.result(), primary_name, False
+
+        # Primary is slow (or already failed): start the hedge and take the first success
+        self.counters.incr('hedged')
+        secondary_future = self._executor.submit(secondary_fn)
+        names = {primary_future: primary_name, secondary_future: secondary_name}
+        pending = {primary_future, secondary_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = names[future]
+                    self._record_win(winner, 'primary_wins' if winner == primary_name else 'hedge_wins')
+                    for loser in pending:
+                        self._abandon(loser, names[loser], on_loser)
+                    return future.result(), winner, True
+
+        self.counters.incr('both_failed')
+        PROVIDER_HEDGES.labels('both_failed').inc()
+        raise primary_future.exception()
+
+    def _record_win(self, provider: str, outcome: str) -> None:
+        self.counters.incr(outcome)
+        PROVIDER_HEDGES.labels(outcome).inc()
+        with self._lock:
+            self.wins[provider] = self.wins.get(provider, 0) + 1
+
+    def _abandon(self, future, provider: str, on_loser: Optional[Callable[[str, Any], None]]) -> None:
+        if future.cancel():
+            self.counters.incr('losers_cancelled')
+            return
+
+        # Already calling the provider: its tokens are spent either way
+        def completed(done) -> None:
+            self.counters.incr('losers_completed')
+            if on_loser is not None and done.exception() is None:
+                on_loser(provider, done.result())
+        future.add_done_callback(completed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        counters = self.counters.snapshot()
+        calls = counters['calls']
+        with self._lock:
+            wins = dict(self.wins)
+        delays = {provider: round(self.hedge_delay(provider) * 1000, 1) for provider in ('openai', 'gemini')}
+        return {
+            'enabled': self.enabled,
+            **counters,
+            'hedge_rate': round(counters['hedged'] / calls, 4) if calls else 0.0,
+            'wins_by_provider': wins,
+            'win_rate_by_provider': {provider: round(count / calls, 4) for provider, count in wins.items()} if calls else {},
+            # Each hedge is one more provider request; cancelled losers never reached the provider
+            'extra_requests': counters['hedged'] - counters['losers_cancelled'],
+            'extra_spend_rate': round((counters['hedged'] - counters['losers_cancelled']) / calls, 4) if calls else 0.0,
+            'hedge_delay_ms': delays
+        }
@@ -0,0 +1,129 @@
+"""
+Structured Request Log
+JSON access and event records written off the request path through a bounded queue
+"""
+
+import atexit
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TextIO
+
+from src.utils.metrics import LOG_RECORDS_DROPPED
+from src.utils.striped_counters import StripedCounters
+
+# Incoming X-Request-ID values are reused only when they look like an id
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+
+WRITE_BATCH = 256
+
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+
+class AsyncJsonLog:
+    """One JSON object per line, serialized and written by a background thread.
+
+    ``emit`` only appends to a bounded queue and never blocks: when the
+    writer falls behind and the queue is full, the record is dropped and
+    counted. The writer drains in batches and flushes once per batch.
+    """
+
+    def __init__(self, stream: TextIO = None, max_queue: int = 10000, enabled: bool = True):
+        self.stream = stream or sys.stdout
+        self.enabled = enabled
+        self.max_queue = max_queue
+        self.counters = StripedCounters(['emitted', 'dropped', 'written', 'write_errors'])
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize=max_queue)
+        if enabled:
+            threading.Thread(target=self._writer, daemon=True, name='request-log-writer').start()
+            atexit.register(self.flush)
+
+    def emit(self, record: Dict[str, Any]) -> bool:
+        if not self.enabled:
+            return False
+        record.setdefault('ts', time.time())
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.counters.incr('dropped')
+            LOG_RECORDS_DROPPED.inc()
+            return False
+        self.counters.incr('emitted')
+        return True
+
+    def _writer(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.stream.write(''.join(self._format(record) for record in batch))
+                self.stream.flush()
+                self.counters.incr('written', len(batch))
+            except Exception:
+                self.counters.incr('write_errors', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _format(record: Dict[str, Any]) -> str:
+        record['ts'] = datetime.fromtimestamp(record['ts'], timezone.utc).isoformat(timespec='milliseconds')
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str) + '\n'
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait (bounded) for queued records to be written, e.g. at shutdown"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'queued': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            **self.counters.snapshot()
+        }
+
+
+request_log = AsyncJsonLog(
+    max_queue=int(os.getenv('REQUEST_LOG_QUEUE_SIZE', '10000')),
+    enabled=os.getenv('REQUEST_LOG', 'true').lower() in ('1', 'true', 'yes')
+)
+
+
+def begin_request_log(incoming_id: Optional[str] = None) -> str:
+    """Bind a request id to the current context (reusing a well-formed incoming one)"""
+    request_id = incoming_id if incoming_id and REQUEST_ID_PATTERN.match(incoming_id) else uuid.uuid4().hex
+    _request_id.set(request_id)
+    return request_id
+
+
+def end_request_log() -> None:
+    _request_id.set(None)
+
+
+def log_event(event: str, level: str = 'info', exc_info: bool = False, **fields: Any) -> None:
+    """Queue an event record, tagged with the current request id when there is one.
+
+    ``exc_info=True`` adds the traceback of the exception being handled.
+    """
+    record = {'ts': time.time(), 'level': level, 'event': event}
+    request_id = _request_id.get()
+    if request_id:
+        record['request_id'] = request_id
+    record.update(fields)
+    if exc_info:
+        record['traceback'] = traceback.format_exc()
+    request_log.emit(record)
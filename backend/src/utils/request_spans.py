@@ -0,0 +1,83 @@
+"""
+Request Stage Spans
+Per-stage timings for the enhance pipeline, reported as a Server-Timing header
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from src.utils.metrics import STAGE_LATENCY
+
+SPANS_ENABLED = os.getenv('REQUEST_SPANS', 'true').lower() in ('1', 'true', 'yes')
+
+# (stage, seconds) pairs for the request being handled in this context
+_current_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_spans', default=None)
+
+
+class _Span:
+    __slots__ = ('name', 'spans', 'start')
+
+    def __init__(self, name: str, spans: List[Tuple[str, float]]):
+        self.name = name
+        self.spans = spans
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.spans.append((self.name, time.perf_counter() - self.start))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def begin_request() -> None:
+    """Start collecting spans for the current request (no-op when disabled)"""
+    if SPANS_ENABLED:
+        _current_spans.set([])
+
+
+def span(name: str):
+    """Context manager timing one stage of the current request.
+
+    Outside a request (background refreshes) or with ``REQUEST_SPANS=false``
+    this returns a shared no-op object, so instrumented code pays only a
+    context-variable lookup.
+    """
+    spans = _current_spans.get()
+    if spans is None:
+        return _NOOP_SPAN
+    return _Span(name, spans)
+
+
+def end_request() -> List[Tuple[str, float]]:
+    """Stop collecting and return the request's spans, summed per stage in first-seen order"""
+    spans = _current_spans.get()
+    if spans is None:
+        return []
+    _current_spans.set(None)
+
+    totals = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    for name, seconds in totals.items():
+        STAGE_LATENCY.labels(name).observe(seconds)
+    return list(totals.items())
+
+
+def server_timing_header(spans: List[Tuple[str, float]]) -> str:
+    return ', '.join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans)
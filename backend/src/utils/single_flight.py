@@ -0,0 +1,59 @@
+"""
+Single-Flight Request Coalescing
+Collapse identical concurrent enhancements into one provider call
+"""
+
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome.
+
+    The first caller for a key (the leader) executes the function; callers
+    arriving while it is in flight wait on the leader's future and receive
+    the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = defaultdict(int)
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Return ``(result, shared)`` where ``shared`` is True for coalesced callers.
+
+        Waiters raise ``concurrent.futures.TimeoutError`` if the leader does
+        not finish within ``timeout`` seconds, and re-raise the leader's
+        exception if it failed.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.stats['leaders'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return future.result(timeout=timeout), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.stats['errors'] += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
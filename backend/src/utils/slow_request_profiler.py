@@ -0,0 +1,160 @@
+"""
+Slow Request Profiler
+Stack sampling of armed requests, keeping collapsed stacks of the slow ones
+"""
+
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+# Frames are named relative to the backend root or site-packages
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MAX_STACK_DEPTH = 128
+
+
+class SlowProfile:
+    __slots__ = ('id', 'endpoint', 'started_at', 'duration_ms', 'severity', 'samples', 'stacks')
+
+    def __init__(self, profile_id: int, endpoint: str, started_at: float, duration_ms: float,
+                 severity: str, stacks: Counter):
+        self.id = profile_id
+        self.endpoint = endpoint
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.severity = severity
+        self.samples = sum(stacks.values())
+        self.stacks = stacks
+
+    def to_dict(self) -> Dict:
+        hottest = self.stacks.most_common(1)
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration_ms, 1),
+            'severity': self.severity,
+            'samples': self.samples,
+            'distinct_stacks': len(self.stacks),
+            'hottest_frame': hottest[0][0].rsplit(';', 1)[-1] if hottest else None
+        }
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of armed request threads; keeps profiles of requests over a threshold.
+
+    ``arm`` registers the calling thread and ``disarm`` stops sampling it.
+    A single daemon thread wakes every ``interval`` seconds while anything
+    is armed and records the armed threads' current stacks via
+    ``sys._current_frames()``, so profiled code runs uninstrumented. Only
+    a ``sample_rate`` fraction of requests is armed; of those, requests at
+    or over ``threshold_ms`` are kept, the most recent ``max_profiles``
+    of them. Requires real threads (sync or gthread workers, not gevent).
+    """
+
+    def __init__(self, threshold_ms: float, critical_ms: float, interval: float = 0.005,
+                 sample_rate: float = 1.0, max_profiles: int = 20):
+        self.threshold_ms = threshold_ms
+        self.critical_ms = critical_ms
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.profiles: 'deque[SlowProfile]' = deque(maxlen=max_profiles)
+        self._armed: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._ids = itertools.count(1)
+        self._frame_names: Dict[object, str] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self.stats = {'armed': 0, 'kept': 0, 'samples': 0}
+
+    def arm(self) -> bool:
+        """Start sampling the calling thread; returns False when this request is not sampled"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._armed[threading.get_ident()] = Counter()
+            self.stats['armed'] += 1
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, daemon=True, name='slow-request-profiler')
+                self._sampler.start()
+        self._wakeup.set()
+        return True
+
+    def disarm(self, endpoint: str, duration_ms: float, started_at: Optional[float] = None) -> Optional[SlowProfile]:
+        """Stop sampling the calling thread and keep its profile if the request was slow"""
+        with self._lock:
+            stacks = self._armed.pop(threading.get_ident(), None)
+            if not self._armed:
+                self._wakeup.clear()
+        if stacks is None or duration_ms < self.threshold_ms:
+            return None
+
+        severity = 'critical' if duration_ms >= self.critical_ms else 'slow'
+        started_at = time.time() - duration_ms / 1000 if started_at is None else started_at
+        profile = SlowProfile(next(self._ids), endpoint, started_at, duration_ms, severity, stacks)
+        with self._lock:
+            self.profiles.append(profile)
+            self.stats['kept'] += 1
+        return profile
+
+    def _sample_loop(self) -> None:
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._armed.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+                        self.stats['samples'] += 1
+            del frames
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            name = self._frame_names.get(code)
+            if name is None:
+                name = self._frame_names[code] = f"{self._short_path(code.co_filename)}:{code.co_name}"
+            names.append(name)
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+    @staticmethod
+    def _short_path(filename: str) -> str:
+        marker = 'site-packages' + os.sep
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+        if filename.startswith(BACKEND_ROOT + os.sep):
+            return os.path.relpath(filename, BACKEND_ROOT)
+        return os.path.basename(filename)
+
+    def list_profiles(self) -> List[Dict]:
+        with self._lock:
+            profiles = list(self.profiles)
+        return [profile.to_dict() for profile in reversed(profiles)]
+
+    def collapsed(self, profile_id: Optional[int] = None) -> Optional[str]:
+        """Profiles in collapsed-stack format (``frame;frame;... count`` lines) for flamegraph tools.
+
+        Each stack is rooted at the request's endpoint, so one file of all
+        stored profiles still separates the routes. Returns None for an
+        unknown ``profile_id``.
+        """
+        with self._lock:
+            profiles = [p for p in self.profiles if profile_id is None or p.id == profile_id]
+        if profile_id is not None and not profiles:
+            return None
+
+        merged: Counter = Counter()
+        for profile in profiles:
+            for stack, count in profile.stacks.items():
+                merged[f"{profile.endpoint};{stack}"] += count
+        return ''.join(f"{stack} {count}\n" for stack, count in merged.most_common())
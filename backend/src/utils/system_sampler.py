@@ -0,0 +1,179 @@
+"""
+System Metrics Sampler
+Background process sampling into fixed-size 1s/1m/1h ring buffers
+"""
+
+import gc
+import os
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from src.utils.request_log import log_event
+
+# Gauges are averaged when rolled up; cumulative counters keep their last value
+GAUGE_FIELDS = ('rss_mb', 'cpu_percent', 'threads', 'connections', 'cache_entries')
+COUNTER_FIELDS = ('gc_gen0', 'gc_gen1', 'gc_gen2')
+FIELDS = GAUGE_FIELDS + COUNTER_FIELDS
+
+# Resolution -> (seconds per point, points kept): 10 minutes, 24 hours, 7 days
+RESOLUTIONS = {
+    '1s': (1, 600),
+    '1m': (60, 1440),
+    '1h': (3600, 168)
+}
+
+
+class RingBuffer:
+    """Fixed-capacity columnar time series; the oldest point is overwritten when full"""
+
+    def __init__(self, capacity: int, fields=FIELDS):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.columns = {field: array('d', bytes(8 * capacity)) for field in self.fields}
+        self.count = 0
+        self._next = 0
+
+    def append(self, timestamp: float, values: Dict[str, float]) -> None:
+        slot = self._next
+        self.timestamps[slot] = timestamp
+        for field in self.fields:
+            self.columns[field][slot] = values[field]
+        self._next = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def series(self, limit: Optional[int] = None) -> Dict[str, List[float]]:
+        """The newest ``limit`` points, oldest first, as ``{'timestamps': [...], field: [...]}``"""
+        count = self.count if limit is None else max(0, min(limit, self.count))
+        slots = [(self._next - count + i) % self.capacity for i in range(count)]
+        series = {'timestamps': [self.timestamps[slot] for slot in slots]}
+        for field in self.fields:
+            column = self.columns[field]
+            series[field] = [round(column[slot], 3) for slot in slots]
+        return series
+
+
+class _Rollup:
+    """Accumulates finer points until a coarser period closes"""
+
+    __slots__ = ('period', 'start', 'count', 'sums', 'last')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.start = None
+        self.count = 0
+        self.sums = dict.fromkeys(GAUGE_FIELDS, 0.0)
+        self.last: Dict[str, float] = {}
+
+    def add(self, timestamp: float, values: Dict[str, float]) -> Optional[Tuple[float, Dict[str, float]]]:
+        """Fold a point in; returns ``(start, rollup)`` of the previous period once ``timestamp`` leaves it"""
+        period_start = timestamp - timestamp % self.period
+        closed = None
+        if self.start is not None and period_start != self.start and self.count:
+            rollup = {field: self.sums[field] / self.count for field in GAUGE_FIELDS}
+            rollup.update((field, self.last[field]) for field in COUNTER_FIELDS)
+            closed = (self.start, rollup)
+            self.count = 0
+            self.sums = dict.fromkeys(GAUGE_FIELDS, 0.0)
+        self.start = period_start
+        self.count += 1
+        for field in GAUGE_FIELDS:
+            self.sums[field] += values[field]
+        self.last = values
+        return closed
+
+
+class SystemSampler:
+    """Samples the process once per interval on a daemon thread.
+
+    Every sample goes into the 1s buffer and is rolled up into per-minute
+    averages, which are in turn rolled up into per-hour averages. Request
+    handlers only read ``latest`` and the buffers, so they never call into
+    psutil. Under gunicorn every worker samples (and reports) itself.
+    """
+
+    def __init__(self, cache_size: Callable[[], int] = lambda: 0, interval: float = 1.0,
+                 connections_every: int = 5):
+        self.cache_size = cache_size
+        self.interval = interval
+        # Listing sockets walks /proc/net; refresh it every few samples only
+        self.connections_every = connections_every
+        self.process = psutil.Process()
+        self.buffers = {name: RingBuffer(capacity) for name, (_, capacity) in RESOLUTIONS.items()}
+        self._minute = _Rollup(RESOLUTIONS['1m'][0])
+        self._hour = _Rollup(RESOLUTIONS['1h'][0])
+        self._lock = threading.Lock()
+        self._samples = 0
+        self._connections = 0
+        self.latest: Dict[str, float] = {'timestamp': 0.0, **dict.fromkeys(FIELDS, 0)}
+
+        # The first cpu_percent() call only primes psutil's counters
+        self.process.cpu_percent(None)
+
+    def start(self) -> None:
+        def sampler_worker():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.sample()
+                except Exception as e:
+                    log_event('system_sample_failed', level='error', error=str(e))
+
+        threading.Thread(target=sampler_worker, daemon=True, name='system-sampler').start()
+
+    def read(self) -> Dict[str, float]:
+        with self.process.oneshot():
+            rss = self.process.memory_info().rss
+            cpu = self.process.cpu_percent(None)
+            threads = self.process.num_threads()
+        if self._samples % self.connections_every == 0:
+            self._connections = len(self.process.connections())
+        try:
+            cache_entries = self.cache_size()
+        except Exception:
+            cache_entries = 0
+        generations = gc.get_stats()
+
+        return {
+            'rss_mb': rss / 1024 / 1024,
+            'cpu_percent': cpu,
+            'threads': threads,
+            'connections': self._connections,
+            'cache_entries': cache_entries,
+            'gc_gen0': generations[0]['collections'],
+            'gc_gen1': generations[1]['collections'],
+            'gc_gen2': generations[2]['collections']
+        }
+
+    def sample(self, now: Optional[float] = None) -> None:
+        values = self.read()
+        now = time.time() if now is None else now
+        with self._lock:
+            self._samples += 1
+            self.buffers['1s'].append(now, values)
+            minute = self._minute.add(now, values)
+            if minute is not None:
+                self.buffers['1m'].append(*minute)
+                hour = self._hour.add(*minute)
+                if hour is not None:
+                    self.buffers['1h'].append(*hour)
+        # Replaced wholesale, so readers never see a half-updated sample
+        self.latest = {'timestamp': now, **values}
+
+    def history(self, resolution: str = '1m', limit: Optional[int] = None) -> Dict:
+        interval, capacity = RESOLUTIONS[resolution]
+        with self._lock:
+            series = self.buffers[resolution].series(limit)
+        timestamps = series.pop('timestamps')
+        return {
+            'resolution': resolution,
+            'interval_seconds': interval,
+            'capacity': capacity,
+            'pid': os.getpid(),
+            'timestamps': timestamps,
+            'series': series
+        }
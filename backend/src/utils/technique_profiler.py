@@ -0,0 +1,199 @@
+"""
+Technique Cost Profiler
+Per-technique CPU time, added characters/tokens and usage for PromptTechniques
+"""
+
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.prompt_techniques import PromptTechniques
+from src.utils.striped_counters import StripedCounters
+from src.utils.token_accounting import TOKENIZER, count_tokens
+
+# Builders that rewrite the prompt rather than contributing a separate block
+TRANSFORM_BUILDERS = {'_wrap_xml_schema', '_apply_compression_techniques'}
+
+# _assemble_enhanced_prompt joins every block with this separator
+BLOCK_SEPARATOR = '\n\n'
+
+# Assembly (section joins and the output requirements block) is reported under this name
+ASSEMBLY = '_assembly'
+
+# (technique, cpu_ns, chars_added, tokens_added) for the profiled apply running in this context
+_current_costs: ContextVar[Optional[List[Tuple[str, int, int, int]]]] = ContextVar('technique_costs', default=None)
+
+
+def _profiled_builder(technique: str, name: str, builder):
+    transform = name in TRANSFORM_BUILDERS
+
+    def wrapper(cls, *args):
+        start = time.thread_time_ns()
+        output = builder.__func__(cls, *args)
+        elapsed = time.thread_time_ns() - start
+
+        costs = _current_costs.get()
+        if costs is not None:
+            if transform:
+                added, tokens = len(output) - len(args[0]), count_tokens(output) - count_tokens(args[0])
+            else:
+                added, tokens = len(output) + len(BLOCK_SEPARATOR), count_tokens(output) + 1
+            costs.append((technique, elapsed, added, tokens))
+        return output
+
+    return classmethod(wrapper)
+
+
+def _build_profiled_techniques():
+    """Subclass of PromptTechniques whose template builders report their cost.
+
+    ``apply_techniques`` dispatches through ``cls``, so running it on the
+    subclass profiles exactly the production code path, while the template
+    fingerprints (computed on PromptTechniques itself) stay untouched.
+    """
+    overrides = {}
+    for technique, builders in PromptTechniques.TEMPLATE_BUILDERS.items():
+        for name in builders:
+            overrides[name] = _profiled_builder(technique, name, getattr(PromptTechniques, name))
+    return type('ProfiledPromptTechniques', (PromptTechniques,), overrides)
+
+
+ProfiledPromptTechniques = _build_profiled_techniques()
+
+
+def profile_apply(original_prompt: str, enabled_techniques: List[str],
+                  method: str = 'llm') -> Tuple[str, Dict[str, Tuple[int, int, int]]]:
+    """Run ``apply_techniques`` and return the prompt with ``{technique: (cpu_ns, chars_added, tokens_added)}``.
+
+    Characters and tokens not attributed to an enabled technique (the output
+    requirements block and its separator, whitespace normalization) are
+    reported as ``_assembly`` together with the remaining CPU time, so the
+    costs always add up to the difference between the original and the
+    enhanced prompt.
+    """
+    costs: List[Tuple[str, int, int, int]] = []
+    token = _current_costs.set(costs)
+    try:
+        start = time.thread_time_ns()
+        enhanced = ProfiledPromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+        total_ns = time.thread_time_ns() - start
+    finally:
+        _current_costs.reset(token)
+
+    breakdown: Dict[str, Tuple[int, int, int]] = {}
+    for technique, cpu_ns, chars, tokens in costs:
+        # Compression-method whitespace normalization runs even when 'compression' is off
+        if technique not in enabled_techniques:
+            continue
+        previous_ns, previous_chars, previous_tokens = breakdown.get(technique, (0, 0, 0))
+        breakdown[technique] = (previous_ns + cpu_ns, previous_chars + chars, previous_tokens + tokens)
+
+    attributed_ns = sum(cpu_ns for cpu_ns, _, _ in breakdown.values())
+    attributed_chars = sum(chars for _, chars, _ in breakdown.values())
+    attributed_tokens = sum(tokens for _, _, tokens in breakdown.values())
+    breakdown[ASSEMBLY] = (
+        max(0, total_ns - attributed_ns),
+        len(enhanced) - len(original_prompt) - attributed_chars,
+        count_tokens(enhanced) - count_tokens(original_prompt) - attributed_tokens
+    )
+    return enhanced, breakdown
+
+
+class TechniqueProfiler:
+    """Usage counts for every technique application, plus sampled cost profiles.
+
+    ``apply_techniques`` is a drop-in for ``PromptTechniques.apply_techniques``.
+    Every call counts which techniques were enabled; a ``sample_rate``
+    fraction of calls also runs through the profiled builders and adds
+    their CPU time and added characters to the per-technique totals.
+    """
+
+    def __init__(self, sample_rate: float = 0.1):
+        self.sample_rate = sample_rate
+        self.usage = StripedCounters(['applications', *PromptTechniques.TECHNIQUES])
+        # technique -> [samples, cpu_ns, chars_added, tokens_added]
+        self._costs: Dict[str, List[int]] = {}
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def apply_techniques(self, original_prompt: str, enabled_techniques: List[str],
+                         method: str = 'llm') -> str:
+        self._count_usage(enabled_techniques)
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return PromptTechniques.apply_techniques(original_prompt, enabled_techniques, method)
+
+        enhanced, breakdown = profile_apply(original_prompt, enabled_techniques, method)
+        self.record(breakdown)
+        return enhanced
+
+    def _count_usage(self, enabled_techniques: List[str]) -> None:
+        self.usage.incr('applications')
+        for technique in enabled_techniques:
+            if technique in PromptTechniques.TECHNIQUES:
+                self.usage.incr(technique)
+
+    def record(self, breakdown: Dict[str, Tuple[int, int, int]]) -> None:
+        with self._lock:
+            self._samples += 1
+            for technique, (cpu_ns, chars, tokens) in breakdown.items():
+                totals = self._costs.setdefault(technique, [0, 0, 0, 0])
+                totals[0] += 1
+                totals[1] += cpu_ns
+                totals[2] += chars
+                totals[3] += tokens
+
+    def profile_corpus(self, prompts: Iterable[str], technique_sets: Iterable[List[str]],
+                       method: str = 'llm') -> None:
+        """Profile every prompt with every technique set (offline reports)"""
+        technique_sets = list(technique_sets)
+        for prompt in prompts:
+            for techniques in technique_sets:
+                self._count_usage(techniques)
+                self.record(profile_apply(prompt, techniques, method)[1])
+
+    def report(self) -> Dict[str, Dict]:
+        """Per-technique and per-preset cost rows, most expensive (in tokens) first"""
+        usage = self.usage.snapshot()
+        applications = usage.pop('applications')
+        with self._lock:
+            samples = self._samples
+            costs = {technique: list(totals) for technique, totals in self._costs.items()}
+
+        techniques = {}
+        for technique in [*PromptTechniques.TECHNIQUES, ASSEMBLY]:
+            profiled, cpu_ns, chars, tokens = costs.get(technique, (0, 0, 0, 0))
+            techniques[technique] = {
+                'technique': technique,
+                'enabled_count': usage.get(technique, applications),
+                'enabled_share': round(usage.get(technique, applications) / applications, 4) if applications else 0.0,
+                'profiled_count': profiled,
+                'cpu_us_mean': round(cpu_ns / profiled / 1000, 3) if profiled else 0.0,
+                'chars_added_mean': round(chars / profiled, 1) if profiled else 0.0,
+                'tokens_added_mean': round(tokens / profiled, 1) if profiled else 0.0,
+                'has_template': technique in PromptTechniques.TEMPLATE_BUILDERS or technique == ASSEMBLY
+            }
+        presets = []
+        for preset, members in PromptTechniques.PRESETS.items():
+            presets.append({
+                'preset': preset,
+                'techniques': members,
+                'tokens_added_mean': round(sum(techniques[t]['tokens_added_mean'] for t in members), 1),
+                'cpu_us_mean': round(sum(techniques[t]['cpu_us_mean'] for t in members), 3)
+            })
+
+        return {
+            'applications': applications,
+            'profiled_applications': samples,
+            'sample_rate': self.sample_rate,
+            'tokenizer': TOKENIZER,
+            'techniques': sorted(techniques.values(), key=lambda row: -row['tokens_added_mean']),
+            'presets': sorted(presets, key=lambda row: -row['tokens_added_mean'])
+        }
+
+
+technique_profiler = TechniqueProfiler(
+    sample_rate=float(os.getenv('TECHNIQUE_PROFILE_SAMPLE_RATE', '0.1'))
+)
@@ -0,0 +1,109 @@
+"""
+Token Accounting
+Local token estimates, per-enhancement output budgets and provider token counters
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict
+
+from src.utils.metrics import PROVIDER_TOKENS
+from src.utils.prompt_techniques import PromptTechniques
+
+# The only counter: an estimate of cl100k (gpt-3.5-turbo) tokens that needs no tokenizer
+# package or download. Gemini's tokenizer is close enough for budgeting
+TOKENIZER = 'heuristic:cl100k'
+
+# _assemble_enhanced_prompt joins blocks with this; technique blocks recur verbatim across requests
+BLOCK_SEPARATOR = '\n\n'
+
+# cl100k-style pre-tokenization: contractions, letter runs, 1-3 digit groups, punctuation, whitespace
+_PIECE = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?(?:[^\s\w]|_)+|\s+")
+
+
+def _heuristic_tokens(text: str) -> int:
+    """Estimate BPE tokens from cl100k-style pre-tokenization pieces"""
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        word = piece.lstrip(' ')
+        if not word or word.isspace():
+            tokens += 1
+        elif word.isascii() and word[0].isalpha():
+            # Common words are one token; long or rare ones split every ~8 characters
+            tokens += 1 + (len(word) - 1) // 8
+        elif word[0].isalpha():
+            tokens += len(word)  # CJK and most other scripts: about a token per character
+        elif word[0].isdigit():
+            tokens += 1
+        else:
+            tokens += math.ceil(len(word) / 2)
+    return tokens
+
+
+@lru_cache(maxsize=4096)
+def _block_tokens(block: str) -> int:
+    return _heuristic_tokens(block)
+
+
+def count_tokens(text: str) -> int:
+    """Estimated tokens in ``text``.
+
+    Counted per ``\\n\\n``-separated block with the block counts memoized,
+    so the technique templates that make up most of an enhanced prompt are
+    only ever tokenized once.
+    """
+    if not text:
+        return 0
+    blocks = text.split(BLOCK_SEPARATOR)
+    return sum(_block_tokens(block) for block in blocks) + len(blocks) - 1
+
+
+@lru_cache(maxsize=None)
+def assembly_tokens(method: str = 'llm') -> int:
+    """Tokens every assembled prompt adds around the original, whatever the techniques"""
+    if method == 'compression':
+        return 0
+    return count_tokens(PromptTechniques.apply_techniques('', [], method))
+
+
+@lru_cache(maxsize=None)
+def technique_tokens(technique: str, method: str = 'llm') -> int:
+    """Tokens one technique adds to a prompt (its template blocks and their separators)"""
+    if method == 'compression':
+        return 0
+    with_technique = count_tokens(PromptTechniques.apply_techniques('', [technique], method))
+    return max(0, with_technique - assembly_tokens(method))
+
+
+def output_token_budget(input_tokens: int, cap: int, ratio: float = 1.5, headroom: int = 64,
+                        floor: int = 256) -> int:
+    """``max_tokens`` for a refinement of ``input_tokens``: the answer is a rewrite of about the same size.
+
+    Providers reserve ``max_tokens`` against rate limits up front, so the
+    budget follows the input instead of always asking for ``cap``.
+    """
+    return max(floor, min(cap, math.ceil(input_tokens * ratio) + headroom))
+
+
+class TokenLedger:
+    """Prometheus token counters per provider, direction and call outcome.
+
+    No running totals are kept in memory: they would differ between workers,
+    reset on restart and need a cap on users. Per-user, per-provider and
+    per-technique totals are built from the stored prompts instead.
+    """
+
+    def record_enhancement(self, provider: str, usage: Dict[str, int]) -> None:
+        """Count one freshly computed enhancement (not a cache hit)"""
+        if usage['input_tokens']:
+            PROVIDER_TOKENS.labels(provider, 'input', 'served').inc(usage['input_tokens'])
+            PROVIDER_TOKENS.labels(provider, 'output', 'served').inc(usage['output_tokens'])
+
+    def record_hedge_loser(self, provider: str, usage: Dict[str, int]) -> None:
+        """Count a hedged call that lost the race but still completed: its tokens were billed all the same"""
+        PROVIDER_TOKENS.labels(provider, 'input', 'hedge_loser').inc(usage['input_tokens'])
+        PROVIDER_TOKENS.labels(provider, 'output', 'hedge_loser').inc(usage['output_tokens'])
+
+
+token_ledger = TokenLedger()
@@ -0,0 +1,10 @@
+"""
+Backend test configuration
+Makes the backend's ``src`` package importable from the test tree
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'backend')
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
@@ -0,0 +1,213 @@
+"""
+Enhancement cache backend tests
+Tier interface, TTL bookkeeping and invalidation across tiers
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils import cache_backends
+from src.utils.cache_backends import CacheBackend, DiskBackend, InProcessBackend, TieredBackend
+from src.utils.payload_codec import CachedResponse
+from src.utils.performance_optimizer import performance_optimizer
+
+pytestmark = pytest.mark.backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable ``time.time`` shared by the cache modules"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def entry(stored_at, prompt='p'):
+    return CachedResponse.from_result({'enhanced_prompt': prompt}, stored_at).to_bytes()
+
+
+def test_incomplete_backend_fails_on_construction():
+    class NoDelete(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value, tags=()):
+            pass
+
+    with pytest.raises(TypeError):
+        NoDelete()
+
+
+def test_in_process_round_trip_and_tags():
+    cache = InProcessBackend(max_size=100, ttl=60, stripes=1)
+    cache.set('a', b'alpha', ('technique:x',))
+    cache.set('b', b'beta', ('technique:y',))
+
+    assert cache.get_many(['a', 'b', 'c']) == {'a': b'alpha', 'b': b'beta'}
+    assert cache.invalidate_tags(['technique:x']) == ['a']
+    assert cache.get('a') is None
+    assert cache.get('b') == b'beta'
+
+
+def test_promotion_keeps_remaining_ttl(clock):
+    l1 = InProcessBackend(max_size=100, ttl=60, stripes=1)
+    l2 = InProcessBackend(max_size=100, ttl=60, stripes=1)
+    tiered = TieredBackend(l1, l2)
+    l2.set('k', entry(clock[0] - 50))
+
+    assert tiered.get('k') is not None
+    clock[0] += 10
+    assert l1.get('k') is None
+    assert l2.get('k') is None
+
+
+def test_expired_copy_is_not_stored(clock):
+    cache = InProcessBackend(max_size=100, ttl=60, stripes=1)
+    cache.set('k', entry(clock[0] - 60))
+    assert cache.get('k') is None
+    assert cache.size() == 0
+
+
+def test_snapshot_keeps_original_store_time(clock, tmp_path):
+    l1 = InProcessBackend(max_size=100, ttl=60, stripes=1)
+    disk = DiskBackend(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    tiered = TieredBackend(l1, disk)
+    l1.set('k', entry(clock[0] - 30))
+
+    clock[0] += 20
+    assert tiered.snapshot(10) == 1
+    assert disk.get('k') is not None
+
+    clock[0] += 10
+    assert disk.get('k') is None
+    disk.close()
+
+
+def test_disk_skips_entries_past_their_ttl(clock, tmp_path):
+    disk = DiskBackend(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    disk.set_many({'old': entry(clock[0] - 61), 'new': entry(clock[0] - 1)})
+    assert disk.get_many(['old', 'new']).keys() == {'new'}
+    disk.close()
+
+
+def test_lookup_rejects_entries_past_the_hard_ttl():
+    cache = performance_optimizer.cache
+    now = time.time()
+    cache.set('test:stale', entry(now - performance_optimizer.cache_ttl - 1))
+    # Put straight into the stripe, bypassing the tier's own TTL check, as an
+    # older tier that extended the entry's life would have
+    dead = entry(now - performance_optimizer.cache_hard_ttl - 1)
+    cache._stripe('test:dead').cache.put('test:dead', cache.codec.compress(dead))
+
+    response, stale = performance_optimizer.lookup_cached_result('test:stale')
+    assert response is not None and stale
+    assert performance_optimizer.lookup_cached_result('test:dead') == (None, False)
+    assert performance_optimizer.get_cached_results(['test:dead']) == {}
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.results = []
+
+    def __getattr__(self, command):
+        def queue(*args, **kwargs):
+            self.results.append(getattr(self.client, command)(*args, **kwargs))
+        return queue
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class FakeRedis:
+    """Just enough of a Redis server, shared by every client, for the shared tier"""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.published = []
+        self.subscribed = threading.Event()
+        self.closed = threading.Event()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    def expire(self, key, seconds):
+        pass
+
+    def smembers(self, key):
+        return self.sets.get(key, set())
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.sets.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        server = self
+
+        class PubSub:
+            def subscribe(self, channel):
+                server.subscribed.set()
+
+            def listen(self):
+                delivered = 0
+                while not server.closed.is_set():
+                    for channel, message in server.published[delivered:]:
+                        delivered += 1
+                        yield {'channel': channel, 'data': message}
+                    time.sleep(0.01)
+
+        return PubSub()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = FakeRedis()
+    monkeypatch.setattr(cache_backends.redis.Redis, 'from_url', lambda *args, **kwargs: server)
+    yield server
+    server.closed.set()
+
+
+def test_invalidation_reaches_every_workers_l1(fake_redis, monkeypatch):
+    monkeypatch.setenv('CACHE_BACKEND', 'tiered')
+    monkeypatch.delenv('CACHE_DISK_PATH', raising=False)
+    admin_worker = cache_backends.create_cache_backend(ttl=600)
+    other_worker = cache_backends.create_cache_backend(ttl=600)
+    assert fake_redis.subscribed.wait(1)
+
+    admin_worker.set('k', entry(time.time()), ('technique:x',))
+    assert other_worker.get('k') is not None
+    assert other_worker.l1.size() == 1
+
+    assert admin_worker.invalidate_tags(['technique:x']) == ['k']
+    deadline = time.time() + 1
+    while other_worker.l1.size() and time.time() < deadline:
+        time.sleep(0.01)
+    assert other_worker.l1.size() == 0
+    assert other_worker.get('k') is None
+
+
+def test_l1_holds_entries_for_at_most_local_ttl(clock):
+    l1 = InProcessBackend(max_size=100, ttl=600, stripes=1, local_ttl=60)
+    l1.set('k', entry(clock[0]))
+
+    clock[0] += 59
+    assert l1.get('k') is not None
+    clock[0] += 1
+    assert l1.get('k') is None
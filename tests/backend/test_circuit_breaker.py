@@ -0,0 +1,154 @@
+"""
+Provider circuit breaker tests
+State transitions, half-open trials and adaptive timeouts
+"""
+
+import pytest
+
+from src.utils import circuit_breaker
+from src.utils.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ProviderBreakers
+)
+from src.utils.latency_histogram import LatencyTracker
+
+pytestmark = pytest.mark.backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable ``time.monotonic`` for the breaker module"""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.acquire()
+        breaker.record_failure(RuntimeError('boom'))
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('openai', failure_threshold=3, open_seconds=10)
+    breaker.record_failure(RuntimeError('boom'))
+    breaker.record_failure(RuntimeError('boom'))
+    breaker.record_success()
+    breaker.record_failure(RuntimeError('boom'))
+    breaker.record_failure(RuntimeError('boom'))
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(RuntimeError('boom'))
+    assert breaker.state == OPEN
+    assert breaker.trips == 1
+    assert breaker.last_error == 'RuntimeError: boom'
+
+
+def test_open_circuit_refuses_calls_until_open_seconds_pass(clock):
+    breaker = CircuitBreaker('openai', failure_threshold=2, open_seconds=10)
+    trip(breaker)
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.acquire()
+    assert error.value.retry_in == pytest.approx(10)
+    assert not breaker.available()
+
+    clock[0] += 10
+    assert breaker.available()
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker('openai', failure_threshold=2, open_seconds=10)
+    trip(breaker)
+    clock[0] += 10
+    breaker.acquire()
+
+    assert not breaker.available()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.release()
+    assert breaker.available()
+
+
+def test_trial_success_closes_and_resets_backoff(clock):
+    breaker = CircuitBreaker('openai', failure_threshold=2, open_seconds=10)
+    trip(breaker)
+    clock[0] += 10
+    breaker.acquire()
+    breaker.record_failure(RuntimeError('still down'))
+    assert (breaker.state, breaker.open_seconds) == (OPEN, 20)
+
+    clock[0] += 20
+    breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.open_seconds == 10
+    assert breaker.consecutive_failures == 0
+
+
+def test_trial_failure_backoff_is_capped(clock):
+    breaker = CircuitBreaker('openai', failure_threshold=1, open_seconds=100, max_open_seconds=300)
+    trip(breaker)
+    for _ in range(4):
+        clock[0] += breaker.open_seconds
+        breaker.acquire()
+        breaker.record_failure(RuntimeError('down'))
+    assert breaker.open_seconds == 300
+
+
+def test_guard_records_outcomes(clock):
+    breakers = ProviderBreakers(LatencyTracker(), providers=['openai'], failure_threshold=1, open_seconds=10)
+
+    with pytest.raises(TimeoutError):
+        with breakers.guard('openai'):
+            raise TimeoutError('slow')
+    with pytest.raises(CircuitOpenError):
+        with breakers.guard('openai'):
+            pass
+
+    stats = breakers.get_stats()
+    assert (stats['failures'], stats['timeouts'], stats['short_circuited']) == (1, 1, 1)
+    assert stats['providers']['openai']['state'] == OPEN
+
+
+def test_guard_releases_trial_on_abandoned_call(clock):
+    breakers = ProviderBreakers(LatencyTracker(), providers=['openai'], failure_threshold=1, open_seconds=10)
+    with pytest.raises(RuntimeError):
+        with breakers.guard('openai'):
+            raise RuntimeError('down')
+    clock[0] += 10
+
+    with pytest.raises(GeneratorExit):
+        with breakers.guard('openai'):
+            raise GeneratorExit()
+    assert breakers.breakers['openai'].state == HALF_OPEN
+    assert breakers.available('openai')
+
+
+def test_timeout_adapts_to_recent_latency():
+    latency = LatencyTracker()
+    breakers = ProviderBreakers(latency, providers=['openai'], min_samples=5, multiplier=1.5,
+                                min_timeout=1.0, max_timeout=6.0)
+    assert breakers.timeout('openai') == 6.0
+
+    for _ in range(20):
+        latency.record(1000, provider='openai')
+    assert 1.4 <= breakers.timeout('openai') <= 1.7
+
+    for _ in range(20):
+        latency.record(100, provider='gemini')
+    assert 1.4 <= breakers.timeout('openai') <= 1.7
+
+
+def test_timeout_is_clamped():
+    latency = LatencyTracker()
+    breakers = ProviderBreakers(latency, providers=['openai'], min_samples=1, min_timeout=1.0, max_timeout=6.0)
+    latency.record(10, provider='openai')
+    assert breakers.timeout('openai') == 1.0
+
+    latency = LatencyTracker()
+    breakers = ProviderBreakers(latency, providers=['openai'], min_samples=1, min_timeout=1.0, max_timeout=6.0)
+    latency.record(60000, provider='openai')
+    assert breakers.timeout('openai') == 6.0
@@ -0,0 +1,102 @@
+"""
+LRU+TTL enhancement cache tests
+Constant-time eviction order, lazy expiry and the byte budget
+"""
+
+import pytest
+
+from src.utils.enhancement_cache import LRUTTLCache
+
+pytestmark = pytest.mark.backend
+
+
+def test_evicts_least_recently_used():
+    cache = LRUTTLCache(max_size=3, ttl=100)
+    for key in 'abc':
+        cache.put(key, key.upper(), now=0)
+
+    cache.get('a', now=1)
+    cache.put('d', 'D', now=2)
+
+    assert list(cache) == ['c', 'a', 'd']
+    assert cache.evicted == 1
+
+
+def test_replacing_a_key_does_not_evict():
+    cache = LRUTTLCache(max_size=2, ttl=100)
+    cache.put('a', 1, now=0)
+    cache.put('b', 2, now=0)
+    cache.put('a', 3, now=1)
+
+    assert len(cache) == 2
+    assert cache.get('a', now=2).result == 3
+    assert cache.evicted == 0
+
+
+def test_get_expires_entries_lazily():
+    cache = LRUTTLCache(max_size=10, ttl=10)
+    cache.put('a', 1, now=0)
+
+    assert cache.get('a', now=9.9) is not None
+    assert cache.get('a', now=10) is None
+    assert 'a' not in cache
+    assert cache.expired == 1
+
+
+def test_eviction_of_an_expired_entry_counts_as_expired():
+    cache = LRUTTLCache(max_size=2, ttl=10)
+    cache.put('a', 1, now=0)
+    cache.put('b', 2, now=5)
+    cache.put('c', 3, now=11)
+
+    assert list(cache) == ['b', 'c']
+    assert (cache.expired, cache.evicted) == (1, 0)
+
+
+def test_purge_expired_stops_at_first_live_entry():
+    cache = LRUTTLCache(max_size=10, ttl=10)
+    cache.put('old', 1, now=0)
+    cache.put('live', 2, now=8)
+    cache.put('also_old', 3, now=0)
+
+    # 'also_old' sits behind a live entry in recency order and is left for lazy expiry
+    assert cache.purge_expired(now=12) == 1
+    assert list(cache) == ['live', 'also_old']
+
+
+def test_purge_expired_respects_limit():
+    cache = LRUTTLCache(max_size=10, ttl=1)
+    for i in range(5):
+        cache.put(str(i), i, now=0)
+
+    assert cache.purge_expired(limit=2, now=5) == 2
+    assert len(cache) == 3
+
+
+def test_byte_budget_evicts_until_entry_fits():
+    cache = LRUTTLCache(max_size=10, ttl=100, max_bytes=100)
+    cache.put('a', 1, now=0, size=40)
+    cache.put('b', 2, now=0, size=40)
+    cache.put('c', 3, now=0, size=40)
+
+    assert list(cache) == ['b', 'c']
+    assert cache.total_bytes == 80
+
+
+def test_entry_larger_than_budget_is_rejected():
+    cache = LRUTTLCache(max_size=10, ttl=100, max_bytes=100)
+    cache.put('a', 1, now=0, size=40)
+
+    assert cache.put('huge', 2, now=0, size=101) is None
+    assert list(cache) == ['a']
+    assert cache.rejected == 1
+
+
+def test_keys_with_tags_and_most_recent():
+    cache = LRUTTLCache(max_size=10, ttl=100)
+    cache.put('a', 1, now=0, tags=('technique:x',))
+    cache.put('b', 2, now=1, tags=('technique:y',))
+    cache.put('c', 3, now=2, tags=('technique:x', 'method:llm'))
+
+    assert cache.keys_with_tags(['technique:x']) == ['a', 'c']
+    assert [key for key, _ in cache.most_recent(2)] == ['c', 'b']
@@ -0,0 +1,54 @@
+"""
+Near-duplicate index tests
+Canonical matches, verified similar matches and meaning-changing edits
+"""
+
+import pytest
+
+from src.utils.prompt_fingerprint import NearDuplicateIndex
+
+pytestmark = pytest.mark.backend
+
+REPORT = ('Write a SQL query that lists total revenue per region for the last fiscal year, joining the '
+          'orders and regions tables, grouping by region name, sorting the totals in descending order, '
+          '{} including regions with zero revenue, and explain each clause of the query briefly')
+
+
+@pytest.fixture
+def index():
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add('original', REPORT.format(''), 'llm:abc')
+    return index
+
+
+def test_canonical_match_ignores_politeness_and_punctuation(index):
+    assert index.find('Please ' + REPORT.format('').upper() + '!', 'llm:abc') == ('original', 'canonical')
+
+
+def test_similar_match_is_scoped_by_namespace(index):
+    prompt = REPORT.format('').replace('briefly', 'concisely')
+    assert index.find(prompt, 'llm:abc') == ('original', 'similar')
+    assert index.find(prompt, 'llm:other') is None
+
+
+@pytest.mark.parametrize('edit', [
+    REPORT.format('not'),
+    REPORT.format('').replace('including', "don't include"),
+    REPORT.format('without'),
+    REPORT.format('').replace('last fiscal year', 'last 3 fiscal years'),
+])
+def test_negations_and_numbers_are_never_similar(index, edit):
+    assert index.find(edit, 'llm:abc') is None
+
+
+@pytest.mark.parametrize('word', ['not', 'without', 'no', 'never'])
+def test_one_word_negation_passes_overlap_but_is_rejected(index, word):
+    assert index.find(REPORT.format(word), 'llm:abc') is None
+    assert index.get_stats()['meaning_changes'] == 1
+
+
+def test_number_change_is_rejected():
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add('original', REPORT.format('').replace('last fiscal year', 'last 2 fiscal years'), 'llm:abc')
+    assert index.find(REPORT.format('').replace('last fiscal year', 'last 3 fiscal years'), 'llm:abc') is None
+    assert index.get_stats()['meaning_changes'] == 1
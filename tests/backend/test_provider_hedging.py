@@ -0,0 +1,71 @@
+"""
+Hedged provider request tests
+Winner selection and billing of abandoned calls
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.provider_hedging import ProviderHedger
+
+pytestmark = pytest.mark.backend
+
+
+@pytest.fixture
+def hedger():
+    return ProviderHedger(enabled=True, min_delay_ms=10, default_delay_ms=10)
+
+
+def test_fast_primary_is_not_hedged(hedger):
+    result = hedger.call(('openai', lambda: 'a'), ('gemini', lambda: 'b'))
+    assert result == ('a', 'openai', False)
+    assert hedger.get_stats()['hedged'] == 0
+
+
+def test_completed_loser_is_reported(hedger):
+    losers = []
+    billed = threading.Event()
+
+    def on_loser(provider, result):
+        losers.append((provider, result))
+        billed.set()
+
+    def slow_primary():
+        time.sleep(0.2)
+        return 'slow'
+
+    result = hedger.call(('openai', slow_primary), ('gemini', lambda: 'fast'), on_loser=on_loser)
+
+    assert result == ('fast', 'gemini', True)
+    assert billed.wait(1)
+    assert losers == [('openai', 'slow')]
+    assert hedger.get_stats()['losers_completed'] == 1
+
+
+def test_failed_loser_is_not_billed(hedger):
+    losers = []
+    done = threading.Event()
+
+    def failing_primary():
+        time.sleep(0.1)
+        done.set()
+        raise RuntimeError('down')
+
+    hedger.call(('openai', failing_primary), ('gemini', lambda: 'fast'), on_loser=lambda *args: losers.append(args))
+
+    assert done.wait(1)
+    time.sleep(0.05)
+    assert losers == []
+
+
+def test_both_failing_raises_primary_error(hedger):
+    def fail(message):
+        def call():
+            raise RuntimeError(message)
+        return call
+
+    with pytest.raises(RuntimeError, match='primary'):
+        hedger.call(('openai', fail('primary')), ('gemini', fail('secondary')))
+    assert hedger.get_stats()['both_failed'] == 1
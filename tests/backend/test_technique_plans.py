@@ -0,0 +1,68 @@
+"""
+Compiled technique plan tests
+Plans and batch processing must match PromptTechniques.apply_techniques exactly
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+from src.utils import prompt_techniques
+from src.utils.performance_optimizer import FastPromptProcessor
+from src.utils.prompt_techniques import PromptTechniques
+
+pytestmark = pytest.mark.backend
+
+TECHNIQUES = sorted(PromptTechniques.TECHNIQUES)
+WORDS = ['data', 'code', 'business', 'creative', 'research', 'please', 'could', 'you', 'in', 'order',
+         'to', 'make', 'sure', 'that', 'analyze', 'the', 'market', 'as', 'well', 'software', '<xml>',
+         '{braces}', '$1', '\\n', 'über', '数据']
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2031, 2, 3, 4, 5)
+
+
+def random_prompt(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 30)))
+
+
+@pytest.mark.parametrize('method', ['llm', 'compression'])
+def test_plan_matches_apply_techniques(method, monkeypatch):
+    # A minute boundary between the two renders would change the clockwork block
+    monkeypatch.setattr(prompt_techniques, 'datetime', FrozenDatetime)
+    rng = random.Random(method)
+    for _ in range(500):
+        techniques = tuple(sorted(rng.sample(TECHNIQUES, rng.randint(0, len(TECHNIQUES)))))
+        prompt = random_prompt(rng)
+        plan = FastPromptProcessor.compile_technique_plan(techniques, method)
+        assert plan(prompt) == PromptTechniques.apply_techniques(prompt, list(techniques), method)
+
+
+def test_role_prompting_is_chosen_per_prompt():
+    plan = FastPromptProcessor.compile_technique_plan(('role_prompting', 'xml_schema'), 'llm')
+    assert 'Chief Data Scientist' in plan('summarize this data')
+    assert 'Senior Software Architect' in plan('review my code')
+
+
+def test_clockwork_context_is_rendered_per_call(monkeypatch):
+    plan = FastPromptProcessor.compile_technique_plan(('clockwork', 'zero_shot_cot'), 'llm')
+    plan('warm the plan cache')
+
+    monkeypatch.setattr(prompt_techniques, 'datetime', FrozenDatetime)
+    assert 'Current context: 2031-02-03 04:05 UTC' in plan('what changed?')
+
+
+def test_batch_keeps_request_order_across_technique_sets():
+    rng = random.Random(7)
+    items = [
+        (random_prompt(rng), rng.sample(TECHNIQUES, rng.randint(0, 5)))
+        for _ in range(50)
+    ]
+
+    results = FastPromptProcessor.batch_process_techniques(items, 'llm')
+
+    assert results == [PromptTechniques.apply_techniques(prompt, techniques, 'llm') for prompt, techniques in items]